@@ -3,7 +3,7 @@ from typing import List
 
 import matplotlib
 
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg, NavigationToolbar2QT
 from matplotlib.figure import Figure
 
 # from PyQt5.QtCore import QSize, Qt
@@ -11,7 +11,11 @@ from matplotlib.figure import Figure
 from PyQt5.QtWidgets import QApplication, QMainWindow, QPushButton, QVBoxLayout, QHBoxLayout, QWidget, QLabel, \
     QDoubleSpinBox, QGridLayout, QStackedLayout, QCheckBox, QFileDialog
 
-from test import get_values, GRAPH_DETAILS, FLUIDS, create_excel_sheet
+from calculations import GRAPH_DETAILS, FLUIDS, LENGTHS, ENV_TYPES_GRAVITY
+from decimation import connect_decimation, set_line_data
+from instrumentation import stage, count
+from records import FluidData
+from result_cache import get_cached_values_for_fluids
 
 
 def get_formatted_name_for_graph(word: str) -> str:
@@ -31,14 +35,6 @@ def get_quantity_unit(quantity: str) -> str:
     pass
 
 
-class FluidData:
-    def __init__(self, name, density, shc, viscosity):
-        self.name = name
-        self.density = 0
-        self.shc = 0
-        self.viscosity = 0
-
-
 matplotlib.use('Qt5Agg')
 
 
@@ -47,13 +43,38 @@ class MplCanvas(FigureCanvasQTAgg):
     def __init__(self, parent=None, width=5, height=4, dpi=100):
         self.fig = Figure(figsize=(width, height), dpi=dpi)
         self.axes = self.fig.add_subplot(111)
+        self.legend = None
         super(MplCanvas, self).__init__(self.fig)
 
+    def set_legend(self, lines: list, names: list):
+        # Replace the legend of the figure with one for the given lines
+        if self.legend is not None:
+            self.legend.remove()
+            self.legend = None
+
+        if len(lines) > 0:
+            self.legend = self.fig.legend(lines, names)
+
+    def redraw(self):
+        # Rescale the axes to the visible lines and draw again when Qt is idle
+        self.axes.relim(visible_only=True)
+        self.axes.autoscale_view()
+        self.draw_idle()
+
+    def draw(self):
+        # draw_idle ends up here as well, this is where matplotlib renders the figure
+        with stage('draw_figure'):
+            super().draw()
+
+        count('figures_drawn')
+
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.datas = []  # This would contain the data needed to draw the graphs
+        self.fluids_lines = {}  # The lines of each fluid, one for each graph in GRAPH_DETAILS
+        self.are_graphs_shown = False
         self.current_index_for_graph = 0
 
         self.setWindowTitle('MEE 307 Graph Calculator by MEE23')
@@ -99,6 +120,19 @@ class MainWindow(QMainWindow):
         save_excel_sheets_btn.clicked.connect(self.open_dialog_and_get_directory_to_save_files)
         fluids_values_v_layout.addWidget(save_excel_sheets_btn)
 
+        # Is single workbook check #
+        is_single_workbook_check_layout = QHBoxLayout()
+        self.is_single_workbook_check = QCheckBox()
+        is_single_workbook_label = QLabel('Single workbook (vertical and horizontal)')
+
+        is_single_workbook_check_layout.addWidget(self.is_single_workbook_check)
+        is_single_workbook_check_layout.addWidget(is_single_workbook_label)
+
+        is_single_workbook_check_widget = QWidget()
+        is_single_workbook_check_widget.setLayout(is_single_workbook_check_layout)
+
+        fluids_values_v_layout.addWidget(is_single_workbook_check_widget)
+
         # Add the contents of axis_h_layout
         # It would contain the buttons that would control the graoh that is being shown
 
@@ -122,6 +156,12 @@ class MainWindow(QMainWindow):
         self.headloss_against_reynolds_plot = MplCanvas(self, width=5, height=4, dpi=100)
         self.shc_against_reynolds_plot = MplCanvas(self, width=5, height=4, dpi=100)
 
+        # The canvases in the same order as GRAPH_DETAILS.
+        # They are created once and only the data of their lines changes after that
+        self.graph_canvases = [self.headloss_against_reynolds_plot, self.shc_against_reynolds_plot,
+                               self.f_against_reynolds_plot]
+        self.setup_graphs()
+
         self.info_label = QLabel('Please Enter values and Click on the calculate values button')
         self.graph_plot_layout.addWidget(self.info_label)
 
@@ -224,67 +264,96 @@ class MainWindow(QMainWindow):
         valid_fluid_names = []
         for data in self.datas:
 
-            if len(data.name) == 0 or data.density <= 0 or data.shc <= 0 or data.viscosity <= 0:
+            if not data.is_valid():
                 continue
             valid_fluid_data.append(data)
             valid_fluid_names.append(data.name)
 
         return valid_fluid_data, valid_fluid_names
 
-    def plot_graphs(self):
+    @staticmethod
+    def get_fluids_properties(fluids_data: list) -> dict:
+        # The properties of the fluids laid out like test.FLUIDS_VALUES
+        return {fluid.name: fluid.get_properties() for fluid in fluids_data}
+
+    def setup_graphs(self):
         """
-        This would plot the graphs for us
+        This would set up the labels of the graphs and a line for each fluid on every graph.
+        The lines are hidden until the fluid has valid values.
         """
         colors = ['r', 'g', 'b', 'c', 'm', 'y', 'k', 'pink', 'chartreuse', 'burlywood']
-        fluids_data, fluids_names = self.get_valid_fluid_data()
 
-        fluids_tables = {}
+        for row in range(len(GRAPH_DETAILS)):
+            graph_detail = GRAPH_DETAILS[row]
+            y_axis = graph_detail[0]
+            x_axis = graph_detail[1]
+
+            plt = self.graph_canvases[row]
 
-        if len(fluids_data) == 0:
+            for specific_graph_number in range(len(self.datas)):
+                line, = plt.axes.plot([], [], color=colors[specific_graph_number % len(colors)])
+                line.set_visible(False)
+                self.fluids_lines.setdefault(self.datas[specific_graph_number].name, []).append(line)
+
+            # The lines only get the points that can be seen, again on every zoom and pan
+            connect_decimation(plt.axes)
+
+            plt.axes.set_xlabel(f'{get_formatted_name_for_graph(x_axis)} {get_quantity_unit(x_axis)}')
+            plt.axes.set_ylabel(f'{get_formatted_name_for_graph(y_axis)} {get_quantity_unit(y_axis)}')
+            plt.axes.set_title(
+                f'Graph of {get_formatted_name_for_graph(y_axis)} against {get_formatted_name_for_graph(x_axis)}')
+
+    def show_graphs(self):
+        # Swap the info label for the graphs, this is only done once
+        if self.are_graphs_shown:
             return
 
         self.info_label.setParent(None)
 
-        for fluid in fluids_data:
-            fluid_value = get_values(fluid.shc, fluid.viscosity,
-                                     fluid.density, self.get_acceleration_due_to_gravity())
-            fluids_tables[fluid.name] = fluid_value
+        for plt in self.graph_canvases:
+            # Each graph gets a toolbar to zoom and pan it
+            graph_v_layout = QVBoxLayout()
+            graph_v_layout.addWidget(NavigationToolbar2QT(plt, self))
+            graph_v_layout.addWidget(plt)
 
-        for row in range(len(GRAPH_DETAILS)):
+            graph_widget = QWidget()
+            graph_widget.setLayout(graph_v_layout)
+            self.graph_plot_layout.addWidget(graph_widget)
 
-            graph_detail = GRAPH_DETAILS[row]
-            y_axis = graph_detail[0]
-            x_axis = graph_detail[1]
+        self.are_graphs_shown = True
+
+    def plot_graphs(self):
+        """
+        This would plot the graphs for us
+        """
+        with stage('plot_graphs'):
+            fluids_data, fluids_names = self.get_valid_fluid_data()
 
-            if row == 0:
-                self.headloss_against_reynolds_plot.setParent(None)
-                plt = self.headloss_against_reynolds_plot = MplCanvas(self, width=5, height=4, dpi=100)
+            if len(fluids_data) == 0 and not self.are_graphs_shown:
+                return
 
-            elif row == 1:
-                self.shc_against_reynolds_plot.setParent(None)
-                plt = self.shc_against_reynolds_plot = MplCanvas(self, width=5, height=4, dpi=100)
+            self.show_graphs()
 
-            else:
-                self.f_against_reynolds_plot.setParent(None)
-                plt = self.f_against_reynolds_plot = MplCanvas(self, width=5, height=4, dpi=100)
+            # Only the fluids whose values changed are calculated, the rest come from the cache
+            fluids_tables = get_cached_values_for_fluids(self.get_fluids_properties(fluids_data),
+                                                         self.get_acceleration_due_to_gravity())
 
-            # plt = MplCanvas(self, width=5, height=4, dpi=100)
+            for fluid_data in self.datas:
+                is_plotted = fluid_data.name in fluids_tables
 
-            for specific_graph_number in range(len(fluids_data)):
-                # Plot all the graphs on a canvas
+                for row, line in enumerate(self.fluids_lines[fluid_data.name]):
+                    if is_plotted:
+                        y_axis, x_axis = GRAPH_DETAILS[row]
+                        set_line_data(line, fluids_tables[fluid_data.name][x_axis],
+                                      fluids_tables[fluid_data.name][y_axis])
 
-                plt.axes.plot(fluids_tables[fluids_data[specific_graph_number].name][x_axis],
-                              fluids_tables[fluids_data[specific_graph_number].name][y_axis],
-                              color=colors[specific_graph_number])
+                    line.set_visible(is_plotted)
 
-            plt.axes.set_xlabel(f'{get_formatted_name_for_graph(x_axis)} {get_quantity_unit(x_axis)}')
-            plt.axes.set_ylabel(f'{get_formatted_name_for_graph(y_axis)} {get_quantity_unit(y_axis)}')
-            plt.axes.set_title(
-                f'Graph of {get_formatted_name_for_graph(y_axis)} against {get_formatted_name_for_graph(x_axis)}')
-            plt.fig.legend(fluids_names)
+            for row, plt in enumerate(self.graph_canvases):
+                plt.set_legend([self.fluids_lines[name][row] for name in fluids_names], fluids_names)
+                plt.redraw()
 
-            self.graph_plot_layout.addWidget(plt)
-        self.graph_plot_layout.setCurrentIndex(self.current_index_for_graph)
+            self.graph_plot_layout.setCurrentIndex(self.current_index_for_graph)
 
     def get_acceleration_due_to_gravity(self) -> float:
         """
@@ -309,17 +378,30 @@ class MainWindow(QMainWindow):
         if len(fluids_data) == 0:
             return
 
-        for fluid in fluids_data:
-            fluid_value = get_values(fluid.shc, fluid.viscosity,
-                                     fluid.density, self.get_acceleration_due_to_gravity())
+        # openpyxl is only imported the first time something is saved
+        from excel_export import write_fluids_workbook, get_workbook_path
+        from test import create_excel_sheet
+
+        if self.is_single_workbook_check.isChecked():
+            # Every fluid, for both env types, goes into one workbook
+            fluids_tables_by_env = {env: get_cached_values_for_fluids(self.get_fluids_properties(fluids_data), g)
+                                    for env, g in ENV_TYPES_GRAVITY.items()}
+            write_fluids_workbook(get_workbook_path(directory), fluids_tables_by_env, LENGTHS)
+            return
+
+        # The values were calculated when the graphs were plotted, so they come from the cache
+        fluids_tables = get_cached_values_for_fluids(self.get_fluids_properties(fluids_data),
+                                                     self.get_acceleration_due_to_gravity())
 
-            create_excel_sheet(fluid_value, fluid.name, env_type=env_type, directory=directory)
+        for fluid in fluids_data:
+            create_excel_sheet(fluids_tables[fluid.name], fluid.name, env_type=env_type, directory=directory)
 
 
 
-app = QApplication(sys.argv)
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
 
-window = MainWindow()
-window.show()
+    window = MainWindow()
+    window.show()
 
-app.exec()
+    app.exec()
@@ -3,15 +3,21 @@ from typing import List
 
 import matplotlib
 
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg, NavigationToolbar2QT
 from matplotlib.figure import Figure
 
 # from PyQt5.QtCore import QSize, Qt
 # from PyQt5.QtGui import QPalette, QColor
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, Qt, pyqtSignal
 from PyQt5.QtWidgets import QApplication, QMainWindow, QPushButton, QVBoxLayout, QHBoxLayout, QWidget, QLabel, \
-    QDoubleSpinBox, QGridLayout, QStackedLayout, QCheckBox, QFileDialog
+    QDoubleSpinBox, QGridLayout, QStackedLayout, QCheckBox, QFileDialog, QSlider
 
-from test import get_values, GRAPH_DETAILS, FLUIDS, create_excel_sheet
+from calculations import GRAPH_DETAILS, FLUIDS, LENGTHS, ENV_TYPES_GRAVITY
+from decimation import connect_decimation, set_line_data
+from instrumentation import stage, count
+from records import FluidData
+from result_cache import get_cached_values_for_fluids
+from slider_sweep import SweepGrid, get_scales, get_gravities
 
 
 def get_formatted_name_for_graph(word: str) -> str:
@@ -31,15 +37,44 @@ def get_quantity_unit(quantity: str) -> str:
     pass
 
 
-class FluidData:
-    def __init__(self, name, density, shc, viscosity):
-        self.name = name
-        self.density = 0
-        self.shc = 0
-        self.viscosity = 0
+matplotlib.use('Qt5Agg')
 
+COMPUTATION_DELAY_MS = 50  # Edits that come in quicker than this are calculated together
+# A sweep slider moved with the keyboard or the wheel is blitted like a drag, until it is left alone this long
+SWEEP_SETTLE_MS = 400
+# The sweep sliders, in the order SweepGrid.get_frame takes their positions
+SWEEP_SLIDERS = ['Length', 'Diameter', 'Velocity', 'Gravity']
 
-matplotlib.use('Qt5Agg')
+
+class ComputationSignals(QObject):
+    # QRunnable is not a QObject, so the signals live here
+    finished = pyqtSignal(int, object)
+    sweep_grid_ready = pyqtSignal(int, object)
+
+
+class ComputationJob(QRunnable):
+    """
+    This calculates the values of some fluids on a worker thread, then the SweepGrid of the fluids
+    that will be plotted (sweep_fluids_properties) for the sweep sliders.
+    The results are sent back to the GUI thread with the id of the job, so results of old jobs can be dropped.
+    fluids_properties is None when the values were already calculated and only the grid is needed.
+    """
+
+    def __init__(self, job_id: int, fluids_properties: dict, g: float, sweep_fluids_properties: dict):
+        super().__init__()
+        self.job_id = job_id
+        self.fluids_properties = fluids_properties
+        self.g = g
+        self.sweep_fluids_properties = sweep_fluids_properties
+        self.signals = ComputationSignals()
+
+    def run(self):
+        if self.fluids_properties is not None:
+            fluids_tables = get_cached_values_for_fluids(self.fluids_properties, self.g)
+            self.signals.finished.emit(self.job_id, fluids_tables)
+
+        # The lines are drawn first, the grid is only needed once a slider moves
+        self.signals.sweep_grid_ready.emit(self.job_id, SweepGrid(self.sweep_fluids_properties))
 
 
 class MplCanvas(FigureCanvasQTAgg):
@@ -47,14 +82,124 @@ class MplCanvas(FigureCanvasQTAgg):
     def __init__(self, parent=None, width=5, height=4, dpi=100):
         self.fig = Figure(figsize=(width, height), dpi=dpi)
         self.axes = self.fig.add_subplot(111)
+        self.legend = None
+        # While a sweep slider is dragged only these lines are drawn, over a copy of the rest of the figure
+        self.blitted_lines = []
+        self.background = None
+        self.background_key = None  # The lines, limits and size the background was drawn with
         super(MplCanvas, self).__init__(self.fig)
 
+    def set_legend(self, lines: list, names: list):
+        # Replace the legend of the figure with one for the given lines
+        if self.legend is not None:
+            self.legend.remove()
+            self.legend = None
+
+        if len(lines) > 0:
+            self.legend = self.fig.legend(lines, names)
+
+        self.background = None
+
+    def redraw(self):
+        # Rescale the axes to the visible lines and draw again when Qt is idle
+        self.axes.relim(visible_only=True)
+        self.axes.autoscale_view()
+        self.draw_idle()
+
+    def draw(self):
+        # draw_idle ends up here as well, this is where matplotlib renders the figure
+        with stage('draw_figure'):
+            super().draw()
+
+        count('figures_drawn')
+
+    def start_blitting(self, lines: list, x_range: tuple, y_range: tuple):
+        """
+        This would fix the limits of the axes to the ranges (with the usual margins), draw everything but lines
+        once and keep a copy of it, so blit_lines only has to draw the lines.
+        The copy is kept after stop_blitting, the figure is not drawn again when the same lines are blitted
+        within the same limits (the same slider is pressed again without anything else moving).
+        """
+        x_margin, y_margin = self.axes.margins()
+        limits = []
+        for (lowest, highest), margin in [(x_range, x_margin), (y_range, y_margin)]:
+            padding = (highest - lowest) * margin or abs(lowest) * margin or 1
+            limits.append((lowest - padding, highest + padding))
+
+        self.axes.set_xlim(*limits[0])
+        self.axes.set_ylim(*limits[1])
+
+        self.blitted_lines = lines
+        for line in lines:
+            line.set_animated(True)
+
+        background_key = (tuple(lines), tuple(limits), self.get_width_height())
+
+        if self.background is not None and background_key == self.background_key:
+            # The tick labels are outside the axes, so the whole figure is put back once
+            self.restore_region(self.background)
+            self.blit(self.fig.bbox)
+            return
+
+        self.draw()
+        self.background = self.copy_from_bbox(self.fig.bbox)
+        self.background_key = background_key
+
+    def blit_lines(self):
+        with stage('blit_lines'):
+            self.restore_region(self.background)
+
+            for line in self.blitted_lines:
+                self.axes.draw_artist(line)
+
+            self.blit(self.axes.bbox)
+
+    def stop_blitting(self):
+        for line in self.blitted_lines:
+            line.set_animated(False)
+
+        self.blitted_lines = []
+        self.axes.set_autoscale_on(True)
+
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.datas = []  # This would contain the data needed to draw the graphs
+        self.fluids_lines = {}  # The lines of each fluid, one for each graph in GRAPH_DETAILS
+        self.are_graphs_shown = False
         self.current_index_for_graph = 0
+
+        # The edits are collected while the user is typing and calculated on a worker thread once they stop
+        self.edited_fluids = {}  # Fluids edited since the last job was started
+        self.computing_fluids = {}  # Fluids in the jobs that were started but whose results were not drawn yet
+        self.latest_job_id = 0
+        self.is_latest_job_full = False
+
+        self.computation_timer = QTimer(self)
+        self.computation_timer.setSingleShot(True)
+        self.computation_timer.setInterval(COMPUTATION_DELAY_MS)
+        self.computation_timer.timeout.connect(self.start_computation)
+
+        # A single worker, so a job that is still queued when a newer one comes in can be removed
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
+
+        # Dragging a sweep slider only looks the values up in the grid of the plotted fluids
+        self.sweep_grid = None  # Made by the worker after the plotted fluids changed, None until it is ready
+        self.sweep_scales = get_scales()
+        self.sweep_gravities = get_gravities()
+        self.sweep_sliders = {}
+        self.sweep_labels = {}
+        self.stale_graphs = set()  # Graphs that are not shown and were not drawn since their lines changed
+        self.blitting_graph = None  # The graph whose lines are blitted while a slider is dragged
+        self.blitting_slider = None
+
+        self.sweep_settle_timer = QTimer(self)
+        self.sweep_settle_timer.setSingleShot(True)
+        self.sweep_settle_timer.setInterval(SWEEP_SETTLE_MS)
+        self.sweep_settle_timer.timeout.connect(self.on_sweep_settled)
+
         self.setWindowTitle('MEE 307 Graph Calculator by MEE23')
 
         fluids_values_v_layout = QGridLayout()
@@ -83,7 +228,7 @@ class MainWindow(QMainWindow):
         is_horizontal_view_check_layout = QHBoxLayout()
         self.is_horizontal_check = QCheckBox()
 
-        self.is_horizontal_check.clicked.connect(lambda check_state: self.plot_graphs())
+        self.is_horizontal_check.clicked.connect(lambda check_state: self.on_horizontal_check_clicked())
         is_horizontal_label = QLabel('Horizontal')
 
         is_horizontal_view_check_layout.addWidget(self.is_horizontal_check)
@@ -98,6 +243,22 @@ class MainWindow(QMainWindow):
         save_excel_sheets_btn.clicked.connect(self.open_dialog_and_get_directory_to_save_files)
         fluids_values_v_layout.addWidget(save_excel_sheets_btn)
 
+        # Is single workbook check #
+        is_single_workbook_check_layout = QHBoxLayout()
+        self.is_single_workbook_check = QCheckBox()
+        is_single_workbook_label = QLabel('Single workbook (vertical and horizontal)')
+
+        is_single_workbook_check_layout.addWidget(self.is_single_workbook_check)
+        is_single_workbook_check_layout.addWidget(is_single_workbook_label)
+
+        is_single_workbook_check_widget = QWidget()
+        is_single_workbook_check_widget.setLayout(is_single_workbook_check_layout)
+
+        fluids_values_v_layout.addWidget(is_single_workbook_check_widget)
+
+        # Sweep sliders #
+        fluids_values_v_layout.addWidget(self.get_sweep_widget())
+
         # Add the contents of axis_h_layout
         # It would contain the buttons that would control the graoh that is being shown
 
@@ -121,6 +282,12 @@ class MainWindow(QMainWindow):
         self.headloss_against_reynolds_plot = MplCanvas(self, width=5, height=4, dpi=100)
         self.shc_against_reynolds_plot = MplCanvas(self, width=5, height=4, dpi=100)
 
+        # The canvases in the same order as GRAPH_DETAILS.
+        # They are created once and only the data of their lines changes after that
+        self.graph_canvases = [self.headloss_against_reynolds_plot, self.shc_against_reynolds_plot,
+                               self.f_against_reynolds_plot]
+        self.setup_graphs()
+
         self.info_label = QLabel('Please Enter values and Click on the calculate values button')
         self.graph_plot_layout.addWidget(self.info_label)
 
@@ -195,6 +362,172 @@ class MainWindow(QMainWindow):
 
         return container
 
+    def get_sweep_widget(self) -> QWidget:
+        """
+        This would make a slider for each of SWEEP_SLIDERS, the length, diameter and velocity ones scale
+        the points on the graphs and the gravity one goes from the horizontal to the vertical case.
+        """
+        sweep_layout = QGridLayout()
+
+        for row, name in enumerate(SWEEP_SLIDERS):
+            slider = QSlider(Qt.Horizontal)
+            slider.setRange(0, len(self.sweep_scales) - 1)
+            slider.setValue(self.get_default_sweep_step(name))
+            slider.valueChanged.connect(lambda step, name=name: self.on_sweep_slider_moved(name))
+            slider.sliderPressed.connect(lambda name=name: self.start_sweep_drag(name))
+            slider.sliderReleased.connect(self.stop_sweep_drag)
+
+            value_label = QLabel()
+
+            sweep_layout.addWidget(QLabel(name), row, 0)
+            sweep_layout.addWidget(slider, row, 1)
+            sweep_layout.addWidget(value_label, row, 2)
+
+            self.sweep_sliders[name] = slider
+            self.sweep_labels[name] = value_label
+            self.set_sweep_label(name)
+
+        reset_sweep_btn = QPushButton('Reset Sweep')
+        reset_sweep_btn.clicked.connect(self.reset_sweep)
+        sweep_layout.addWidget(reset_sweep_btn, len(SWEEP_SLIDERS), 0, 1, 3)
+
+        sweep_widget = QWidget()
+        sweep_widget.setLayout(sweep_layout)
+
+        return sweep_widget
+
+    def get_default_sweep_step(self, name: str) -> int:
+        if name == 'Gravity':
+            return int(abs(self.sweep_gravities - self.get_acceleration_due_to_gravity()).argmin())
+
+        # A scale of 1, the points of the normal graphs
+        return len(self.sweep_scales) // 2
+
+    def set_sweep_label(self, name: str):
+        step = self.sweep_sliders[name].value()
+
+        if name == 'Gravity':
+            self.sweep_labels[name].setText(f'{self.sweep_gravities[step]:.2f} m/s2')
+        else:
+            self.sweep_labels[name].setText(f'x{self.sweep_scales[step]:.2f}')
+
+    def is_sweeping(self) -> bool:
+        # The graphs show the sweep as soon as a slider is away from the values of the normal graphs
+        return any(slider.value() != self.get_default_sweep_step(name) for name, slider in self.sweep_sliders.items())
+
+    def on_sweep_slider_moved(self, name: str):
+        self.set_sweep_label(name)
+
+        if not self.sweep_sliders[name].isSliderDown():
+            # Moved with the keyboard, the wheel or a click beside the handle, it is blitted like a drag
+            self.start_sweep_drag(name)
+            self.sweep_settle_timer.start()
+
+        self.draw_sweep_frame()
+
+    def on_sweep_settled(self):
+        if not any(slider.isSliderDown() for slider in self.sweep_sliders.values()):
+            self.stop_sweep_drag()
+
+    def reset_sweep(self):
+        self.stop_sweep_drag()
+
+        for name, slider in self.sweep_sliders.items():
+            # The graphs are drawn once below and not for every slider
+            slider.blockSignals(True)
+            slider.setValue(self.get_default_sweep_step(name))
+            slider.blockSignals(False)
+            self.set_sweep_label(name)
+
+        self.draw_sweep_frame()
+
+    def on_horizontal_check_clicked(self):
+        # The gravity slider follows the checkbox, the fluids are calculated again for the new gravity anyway
+        slider = self.sweep_sliders['Gravity']
+        slider.blockSignals(True)
+        slider.setValue(self.get_default_sweep_step('Gravity'))
+        slider.blockSignals(False)
+        self.set_sweep_label('Gravity')
+
+        self.schedule_computation(is_full=True)
+
+    def get_sweep_steps(self) -> list:
+        return [self.sweep_sliders[name].value() for name in SWEEP_SLIDERS]
+
+    def start_sweep_drag(self, name: str):
+        """
+        This would fix the axes of the graph that is shown to the range of its lines over the whole slider,
+        so while it is dragged only the lines have to be drawn and each frame fits in a screen refresh.
+        """
+        self.sweep_settle_timer.stop()
+        sweep_grid = self.sweep_grid
+
+        if not self.are_graphs_shown or sweep_grid is None or len(sweep_grid.fluids) == 0:
+            return
+
+        if self.blitting_graph is not None:
+            if self.blitting_slider == name:
+                return
+
+            # Another slider moves, the axes are fixed to its range instead
+            self.graph_canvases[self.blitting_graph].stop_blitting()
+
+        ranges = sweep_grid.get_ranges(self.get_sweep_steps(), SWEEP_SLIDERS.index(name))
+        y_axis, x_axis = GRAPH_DETAILS[self.current_index_for_graph]
+        lines = [self.fluids_lines[fluid_name][self.current_index_for_graph] for fluid_name in sweep_grid.fluids]
+
+        self.graph_canvases[self.current_index_for_graph].start_blitting(lines, ranges[x_axis], ranges[y_axis])
+        self.blitting_graph = self.current_index_for_graph
+        self.blitting_slider = name
+
+    def stop_sweep_drag(self):
+        self.sweep_settle_timer.stop()
+
+        if self.blitting_graph is None:
+            return
+
+        self.graph_canvases[self.blitting_graph].stop_blitting()
+        self.blitting_graph = None
+        self.blitting_slider = None
+
+        # The axes are scaled to the lines again
+        self.stale_graphs.add(self.current_index_for_graph)
+        self.redraw_stale_graph()
+
+    def draw_sweep_frame(self):
+        """
+        This would set the lines of the plotted fluids to the values at the positions of the sliders.
+        Only the graph that is shown is drawn, the other ones are drawn when they are shown.
+        """
+        if not self.are_graphs_shown or self.sweep_grid is None:
+            # The frame is drawn when the grid of the plotted fluids is ready
+            return
+
+        with stage('draw_sweep_frame'):
+            sweep_grid = self.sweep_grid
+            frame = sweep_grid.get_frame(*self.get_sweep_steps())
+
+            for index, fluid_name in enumerate(sweep_grid.fluids):
+                for row, line in enumerate(self.fluids_lines[fluid_name]):
+                    y_axis, x_axis = GRAPH_DETAILS[row]
+                    set_line_data(line, frame[x_axis][index], frame[y_axis][index])
+
+            self.stale_graphs.update(range(len(self.graph_canvases)))
+
+            if self.blitting_graph is None:
+                self.redraw_stale_graph()
+            else:
+                # The graph is drawn in full again when the slider is let go
+                self.graph_canvases[self.blitting_graph].blit_lines()
+
+        count('sweep_frames')
+
+    def redraw_stale_graph(self):
+        # This would draw the graph that is shown when its lines changed while it was hidden
+        if self.current_index_for_graph in self.stale_graphs:
+            self.stale_graphs.discard(self.current_index_for_graph)
+            self.graph_canvases[self.current_index_for_graph].redraw()
+
     def open_dialog_and_get_directory_to_save_files(self):
         dlg = QFileDialog()
         dlg.setFileMode(QFileDialog.Directory)
@@ -214,12 +547,17 @@ class MainWindow(QMainWindow):
         else:
             fluid_data.viscosity = d
 
-        self.plot_graphs()
+        # Only the edited fluid has to be calculated again
+        self.edited_fluids[fluid_data.name] = fluid_data
+        self.schedule_computation()
 
     def set_current_index_for_plot(self, index: int):
+        # Only the graph that was shown was blitted
+        self.stop_sweep_drag()
         self.graph_plot_layout.setCurrentIndex(index)
 
         self.current_index_for_graph = index
+        self.redraw_stale_graph()
 
     def get_valid_fluid_data(self) -> (list, list):
         # This would return the valid data and those data would be used to plot the graph
@@ -227,65 +565,227 @@ class MainWindow(QMainWindow):
         valid_fluid_names = []
         for data in self.datas:
 
-            if len(data.name) == 0 or data.density <= 0 or data.shc <= 0 or data.viscosity <= 0:
+            if not self.is_valid_fluid_data(data):
                 continue
             valid_fluid_data.append(data)
             valid_fluid_names.append(data.name)
 
         return valid_fluid_data, valid_fluid_names
 
-    def plot_graphs(self):
+    @staticmethod
+    def is_valid_fluid_data(fluid_data) -> bool:
+        return fluid_data.is_valid()
+
+    @staticmethod
+    def get_fluids_properties(fluids_data: list) -> dict:
+        # The properties of the fluids laid out like test.FLUIDS_VALUES
+        return {fluid.name: fluid.get_properties() for fluid in fluids_data}
+
+    def setup_graphs(self):
         """
-        This would plot the graphs for us
+        This would set up the labels of the graphs and a line for each fluid on every graph.
+        The lines are hidden until the fluid has valid values.
         """
         colors = ['r', 'g', 'b', 'c', 'm', 'y', 'k', 'pink', 'chartreuse', 'burlywood']
-        fluids_data, fluids_names = self.get_valid_fluid_data()
 
-        fluids_tables = {}
+        for row in range(len(GRAPH_DETAILS)):
+            graph_detail = GRAPH_DETAILS[row]
+            y_axis = graph_detail[0]
+            x_axis = graph_detail[1]
+
+            plt = self.graph_canvases[row]
 
-        if len(fluids_data) == 0:
+            for specific_graph_number in range(len(self.datas)):
+                line, = plt.axes.plot([], [], color=colors[specific_graph_number % len(colors)])
+                line.set_visible(False)
+                self.fluids_lines.setdefault(self.datas[specific_graph_number].name, []).append(line)
+
+            # The lines only get the points that can be seen, again on every zoom and pan
+            connect_decimation(plt.axes)
+
+            plt.axes.set_xlabel(f'{get_formatted_name_for_graph(x_axis)} {get_quantity_unit(x_axis)}')
+            plt.axes.set_ylabel(f'{get_formatted_name_for_graph(y_axis)} {get_quantity_unit(y_axis)}')
+            plt.axes.set_title(
+                f'Graph of {get_formatted_name_for_graph(y_axis)} against {get_formatted_name_for_graph(x_axis)}')
+
+    def show_graphs(self):
+        # Swap the info label for the graphs, this is only done once
+        if self.are_graphs_shown:
             return
 
         self.info_label.setParent(None)
 
-        for fluid in fluids_data:
-            fluid_value = get_values(fluid.shc, fluid.viscosity,
-                                     fluid.density, self.get_acceleration_due_to_gravity())
-            fluids_tables[fluid.name] = fluid_value
+        for plt in self.graph_canvases:
+            # Each graph gets a toolbar to zoom and pan it
+            graph_v_layout = QVBoxLayout()
+            graph_v_layout.addWidget(NavigationToolbar2QT(plt, self))
+            graph_v_layout.addWidget(plt)
 
-        for row in range(len(GRAPH_DETAILS)):
+            graph_widget = QWidget()
+            graph_widget.setLayout(graph_v_layout)
+            self.graph_plot_layout.addWidget(graph_widget)
 
-            graph_detail = GRAPH_DETAILS[row]
-            y_axis = graph_detail[0]
-            x_axis = graph_detail[1]
+        self.are_graphs_shown = True
 
-            if row == 0:
-                self.headloss_against_reynolds_plot.setParent(None)
-                plt = self.headloss_against_reynolds_plot = MplCanvas(self, width=5, height=4, dpi=100)
+    def plot_graphs(self):
+        """
+        This would plot the graphs for us
+        """
+        with stage('plot_graphs'):
+            fluids_data, fluids_names = self.get_valid_fluid_data()
 
-            elif row == 1:
-                self.shc_against_reynolds_plot.setParent(None)
-                plt = self.shc_against_reynolds_plot = MplCanvas(self, width=5, height=4, dpi=100)
+            if len(fluids_data) == 0 and not self.are_graphs_shown:
+                return
 
-            else:
-                self.f_against_reynolds_plot.setParent(None)
-                plt = self.f_against_reynolds_plot = MplCanvas(self, width=5, height=4, dpi=100)
+            # Only the fluids whose values changed are calculated, the rest come from the cache
+            fluids_tables = get_cached_values_for_fluids(self.get_fluids_properties(fluids_data),
+                                                         self.get_acceleration_due_to_gravity())
 
-            for specific_graph_number in range(len(fluids_data)):
-                # Plot all the graphs on a canvas
+            # Results of jobs that are still running are older than these
+            self.latest_job_id += 1
+            self.computing_fluids = {}
 
-                plt.axes.plot(fluids_tables[fluids_data[specific_graph_number].name][x_axis],
-                              fluids_tables[fluids_data[specific_graph_number].name][y_axis],
-                              color=colors[specific_graph_number])
+            self.draw_graphs(fluids_tables)
 
-            plt.axes.set_xlabel(f'{get_formatted_name_for_graph(x_axis)} {get_quantity_unit(x_axis)}')
-            plt.axes.set_ylabel(f'{get_formatted_name_for_graph(y_axis)} {get_quantity_unit(y_axis)}')
-            plt.axes.set_title(
-                f'Graph of {get_formatted_name_for_graph(y_axis)} against {get_formatted_name_for_graph(x_axis)}')
-            plt.fig.legend(fluids_names)
+            # The values are there already, the worker only makes the grid of the sweep sliders
+            self.thread_pool.clear()
+            self.start_job(None, self.get_fluids_properties(fluids_data))
+
+    def draw_graphs(self, fluids_tables: dict):
+        """
+        This would show the lines of the fluids in fluids_tables and hide the rest.
+        """
+        with stage('draw_graphs'):
+            fluids_names = list(fluids_tables.keys())
+
+            self.show_graphs()
+
+            for fluid_data in self.datas:
+                is_plotted = fluid_data.name in fluids_tables
+
+                for row, line in enumerate(self.fluids_lines[fluid_data.name]):
+                    if is_plotted:
+                        y_axis, x_axis = GRAPH_DETAILS[row]
+                        set_line_data(line, fluids_tables[fluid_data.name][x_axis],
+                                      fluids_tables[fluid_data.name][y_axis])
+
+                    line.set_visible(is_plotted)
+
+            for row, plt in enumerate(self.graph_canvases):
+                plt.set_legend([self.fluids_lines[name][row] for name in fluids_names], fluids_names)
+
+            self.graph_plot_layout.setCurrentIndex(self.current_index_for_graph)
+            self.redraw_lines()
 
-            self.graph_plot_layout.addWidget(plt)
-        self.graph_plot_layout.setCurrentIndex(self.current_index_for_graph)
+    def is_fluid_plotted(self, fluid_data) -> bool:
+        return self.fluids_lines[fluid_data.name][0].get_visible()
+
+    def schedule_computation(self, is_full: bool = False):
+        """
+        This (re)starts the timer, so a burst of edits ends up in a single job.
+        """
+        if is_full:
+            # Every fluid has to be calculated again, say when the gravity changes
+            for fluid_data in self.datas:
+                self.edited_fluids[fluid_data.name] = fluid_data
+
+        self.computation_timer.start()
+
+    def start_computation(self):
+        """
+        This would start a job for the edited fluids on the worker thread.
+        When the fluids that are on the graphs change, all the valid fluids are calculated and every graph is drawn
+        again, otherwise only the edited fluids are calculated and only their lines are updated.
+        """
+        self.computing_fluids.update(self.edited_fluids)
+        self.edited_fluids = {}
+
+        is_full = any(self.is_valid_fluid_data(fluid_data) != self.is_fluid_plotted(fluid_data)
+                      for fluid_data in self.computing_fluids.values())
+
+        if is_full:
+            fluids_data, fluids_names = self.get_valid_fluid_data()
+
+            if len(fluids_data) == 0 and not self.are_graphs_shown:
+                self.computing_fluids = {}
+                return
+        else:
+            fluids_data = [fluid_data for fluid_data in self.computing_fluids.values()
+                           if self.is_valid_fluid_data(fluid_data)]
+
+            if len(fluids_data) == 0:
+                # Nothing that is on the graphs changed
+                self.computing_fluids = {}
+                return
+
+        # The queued job is older than this one, running it would be a waste
+        self.thread_pool.clear()
+
+        self.latest_job_id += 1
+        self.is_latest_job_full = is_full
+
+        # After a full job the valid fluids are the ones on the graphs, the others stay the same
+        sweep_fluids_data = self.get_valid_fluid_data()[0] if is_full else \
+            [fluid_data for fluid_data in self.datas if self.is_fluid_plotted(fluid_data)]
+
+        self.start_job(self.get_fluids_properties(fluids_data), self.get_fluids_properties(sweep_fluids_data))
+
+    def start_job(self, fluids_properties: dict, sweep_fluids_properties: dict):
+        job = ComputationJob(self.latest_job_id, fluids_properties, self.get_acceleration_due_to_gravity(),
+                             sweep_fluids_properties)
+        job.signals.finished.connect(self.on_computation_finished)
+        job.signals.sweep_grid_ready.connect(self.on_sweep_grid_ready)
+        self.thread_pool.start(job)
+
+    def on_computation_finished(self, job_id: int, fluids_tables: dict):
+        if job_id != self.latest_job_id:
+            # A newer job was started after this one, so this result is stale
+            return
+
+        self.computing_fluids = {}
+
+        if self.is_latest_job_full:
+            self.draw_graphs(fluids_tables)
+        else:
+            self.update_fluids_lines(fluids_tables)
+
+    def on_sweep_grid_ready(self, job_id: int, sweep_grid: SweepGrid):
+        if job_id != self.latest_job_id:
+            return
+
+        self.sweep_grid = sweep_grid
+
+        if self.is_sweeping():
+            self.draw_sweep_frame()
+
+    def update_fluids_lines(self, fluids_tables: dict):
+        """
+        This would update only the lines of the fluids in fluids_tables, the fluids on the graphs stay the same.
+        """
+        for fluid_name, fluid_table in fluids_tables.items():
+            for row, line in enumerate(self.fluids_lines[fluid_name]):
+                y_axis, x_axis = GRAPH_DETAILS[row]
+                set_line_data(line, fluid_table[x_axis], fluid_table[y_axis])
+
+        self.redraw_lines()
+
+    def redraw_lines(self):
+        """
+        This would draw every graph again after the fluids changed,
+        with the values at the sweep sliders when they are away from the values of the normal graphs.
+        """
+        # The grid of the old fluids can not be used any more, and the lines being dragged may have changed
+        self.stop_sweep_drag()
+        self.sweep_grid = None
+
+        if self.is_sweeping():
+            # The graphs are drawn when the worker has the grid of the new fluids
+            return
+
+        self.stale_graphs.clear()
+
+        for plt in self.graph_canvases:
+            plt.redraw()
 
     def get_acceleration_due_to_gravity(self) -> float:
         """
@@ -310,16 +810,29 @@ class MainWindow(QMainWindow):
         if len(fluids_data) == 0:
             return
 
-        for fluid in fluids_data:
-            fluid_value = get_values(fluid.shc, fluid.viscosity,
-                                     fluid.density, self.get_acceleration_due_to_gravity())
+        # openpyxl is only imported the first time something is saved
+        from excel_export import write_fluids_workbook, get_workbook_path
+        from test import create_excel_sheet
+
+        if self.is_single_workbook_check.isChecked():
+            # Every fluid, for both env types, goes into one workbook
+            fluids_tables_by_env = {env: get_cached_values_for_fluids(self.get_fluids_properties(fluids_data), g)
+                                    for env, g in ENV_TYPES_GRAVITY.items()}
+            write_fluids_workbook(get_workbook_path(directory), fluids_tables_by_env, LENGTHS)
+            return
 
-            create_excel_sheet(fluid_value, fluid.name, env_type=env_type, directory=directory)
+        # The values were calculated when the graphs were plotted, so they come from the cache
+        fluids_tables = get_cached_values_for_fluids(self.get_fluids_properties(fluids_data),
+                                                     self.get_acceleration_due_to_gravity())
+
+        for fluid in fluids_data:
+            create_excel_sheet(fluids_tables[fluid.name], fluid.name, env_type=env_type, directory=directory)
 
 
-app = QApplication(sys.argv)
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
 
-window = MainWindow()
-window.show()
+    window = MainWindow()
+    window.show()
 
-app.exec()
+    app.exec()
@@ -0,0 +1,446 @@
+"""
+Headless batch runs, for when there is nobody to answer the prompts of main.py.
+
+A job file lists the fluids and, optionally, the points to calculate them at:
+
+    fluids:
+      Water: {shc: 4187, density: 1000, viscosity: 0.000895}
+      Ammonia: {shc: 4744, density: 696, viscosity: 0.000255}
+      R134a: {temperature: 40}            # any fluid in property_tables.py, at a temperature in °C
+    env_types: [vertical, horizontal]     # or {name: g}, every env type in test.ENV_TYPES_GRAVITY by default
+    lengths: [0.2, 0.4, 0.6]              # or {start: 0.2, stop: 2, num: 100}, test.LENGTHS by default
+    diameters: [0.00159, 0.00318, 0.00477]
+    velocities: [0.05, 0.1, 0.15]
+    grid: false                           # true for every combination of the axes instead of zipping them
+    sink: excel                           # any of result_sinks.SINKS
+    workbook: true                        # also write every fluid into one workbook
+    plots: true
+    image_format: png
+
+It can be YAML (needs PyYAML), JSON, or CSV with a name, shc, density and viscosity column and a row per fluid,
+and an optional temperature column for the fluids in property_tables.py.
+Everything goes to "{output directory}/generated", like test.py.
+
+Run from the root of the project:
+    python batch.py job.yaml
+    python batch.py job.json --workers 4 --backend numba --output-dir results --summary summary.json
+    python batch.py job.yaml --instrument cprofile,tracemalloc --instrument-report report.json
+
+The exit status is 0 when everything was written, 1 when a part of the job failed and 2 when the job file is wrong.
+
+matplotlib, openpyxl and the process pools are only imported by the stages that use them,
+so a job that does not plot or sweep a grid does not pay for importing them.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import traceback
+
+import numpy as np
+
+from calculations import ENV_TYPES_GRAVITY, LENGTHS, DIAMETERS, VELOCITY
+from disk_cache import get_disk_cache, get_values_hash
+from instrumentation import INSTRUMENT_OPTIONS, stage, count, enable, parse_options, write_report
+from kernels import KERNEL_BACKENDS, set_kernel_backend, get_kernel_backend
+from records import ResultTable
+from result_cache import get_cached_values_for_fluids
+from rendering import IMAGE_FORMATS
+from result_sinks import RESULT_COLUMNS, SINKS, get_sink, get_result_columns, get_result_path
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_INVALID_JOB = 2
+
+FLUID_PROPERTIES = ['shc', 'density', 'viscosity']
+
+
+def read_job_file(path_to_file: str) -> dict:
+    """
+    This would read a job file into a dictionary, the kind of file is taken from its extension.
+    """
+    extension = os.path.splitext(path_to_file)[1].lower()
+
+    if extension in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError('Reading YAML job files needs PyYAML, install it or use a JSON job file')
+
+        with open(path_to_file) as file:
+            try:
+                return yaml.safe_load(file) or {}
+            except yaml.YAMLError as e:
+                raise ValueError(f'The job file is not valid YAML: {e}')
+
+    if extension == '.json':
+        with open(path_to_file) as file:
+            try:
+                return json.load(file)
+            except json.JSONDecodeError as e:
+                raise ValueError(f'The job file is not valid JSON: {e}')
+
+    if extension == '.csv':
+        with open(path_to_file, newline='') as file:
+            rows = list(csv.DictReader(file))
+
+        if len(rows) > 0 and 'name' not in rows[0]:
+            raise ValueError(f'The CSV job file needs a name column next to {", ".join(FLUID_PROPERTIES)}')
+
+        # A temperature column is optional, the properties left empty are then looked up at it
+        columns = FLUID_PROPERTIES + (['temperature'] if len(rows) > 0 and 'temperature' in rows[0] else [])
+
+        return {'fluids': {row['name']: {key: row.get(key) for key in columns} for row in rows}}
+
+    raise ValueError(f'Unknown job file type {extension}, it should be .yaml, .yml, .json or .csv')
+
+
+def _get_axis(job: dict, key: str, default: list) -> np.ndarray:
+    values = job.get(key)
+
+    if values is None:
+        return np.asarray(default, dtype=float)
+
+    try:
+        if isinstance(values, dict):
+            values = np.linspace(float(values['start']), float(values['stop']), int(values['num']))
+
+        values = np.asarray(values, dtype=float).ravel()
+    except KeyError as e:
+        raise ValueError(f'{key} needs a start, a stop and a num, {e} is missing')
+    except (TypeError, ValueError):
+        raise ValueError(f'{key} should be a list of positive numbers or {{start: , stop: , num: }}')
+
+    if len(values) == 0 or not np.all(values > 0):
+        raise ValueError(f'{key} should be a list of positive numbers')
+
+    return values
+
+
+def parse_job(job: dict) -> dict:
+    """
+    This would check a job read by read_job_file and fill in the defaults.
+    It raises ValueError with what is wrong.
+    """
+    if not isinstance(job, dict):
+        raise ValueError('The job file should hold a mapping')
+
+    fluids = job.get('fluids')
+
+    # The fluids can be a mapping of name to properties or a list with a name in each
+    if isinstance(fluids, list):
+        if not all(isinstance(fluid, dict) for fluid in fluids):
+            raise ValueError('Every fluid in the list should be a mapping with a name and its properties')
+
+        fluids = {fluid.get('name'): fluid for fluid in fluids}
+
+    if not isinstance(fluids, dict) or len(fluids) == 0:
+        raise ValueError('The job file should have at least one fluid')
+
+    fluids_values = {}
+
+    for name, properties in fluids.items():
+        if not name:
+            raise ValueError('Every fluid needs a name')
+
+        if not isinstance(properties, dict):
+            raise ValueError(f'The properties of {name} should be a mapping of {", ".join(FLUID_PROPERTIES)}')
+
+        if properties.get('temperature') not in [None, '']:
+            from property_tables import get_fluid_properties
+
+            # The properties that are not given are looked up at the temperature
+            try:
+                looked_up = get_fluid_properties(str(name), float(properties['temperature']))
+            except (TypeError, ValueError) as e:
+                raise ValueError(f'The properties of {name} can not be looked up: {e}')
+
+            looked_up.update({key: properties[key] for key in FLUID_PROPERTIES
+                              if properties.get(key) not in [None, '']})
+            properties = looked_up
+
+        try:
+            fluids_values[str(name)] = {key: float(properties[key]) for key in FLUID_PROPERTIES}
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f'{name} needs a number for each of {", ".join(FLUID_PROPERTIES)}')
+
+        if not all(value > 0 for value in fluids_values[str(name)].values()):
+            raise ValueError(f'The properties of {name} should be positive')
+
+    env_types = job.get('env_types', ENV_TYPES_GRAVITY)
+
+    if isinstance(env_types, list):
+        unknown_env_types = [env_type for env_type in env_types
+                             if not isinstance(env_type, str) or env_type not in ENV_TYPES_GRAVITY]
+
+        if len(unknown_env_types) > 0:
+            raise ValueError(f'Unknown env types {", ".join(map(str, unknown_env_types))}, '
+                             f'give them as {{name: g}} or use {", ".join(ENV_TYPES_GRAVITY)}')
+
+        env_types = {env_type: ENV_TYPES_GRAVITY[env_type] for env_type in env_types}
+
+    if not isinstance(env_types, dict) or len(env_types) == 0:
+        raise ValueError('env_types should be a list of env types or a mapping of env type to g')
+
+    try:
+        env_types = {str(env_type): float(g) for env_type, g in env_types.items()}
+    except (TypeError, ValueError):
+        raise ValueError('The g of every env type should be a number')
+
+    lengths = _get_axis(job, 'lengths', LENGTHS)
+    diameters = _get_axis(job, 'diameters', DIAMETERS)
+    velocities = _get_axis(job, 'velocities', VELOCITY)
+    is_grid = bool(job.get('grid', False))
+
+    if not is_grid and len({len(lengths), len(diameters), len(velocities)} - {1}) > 1:
+        raise ValueError('Without grid, lengths, diameters and velocities should all be as long as each other')
+
+    sink = job.get('sink', 'excel')
+    if not isinstance(sink, str) or sink not in SINKS:
+        raise ValueError(f'Unknown sink {sink}, it should be one of {", ".join(SINKS)}')
+
+    image_format = job.get('image_format', 'png')
+    if not isinstance(image_format, str) or image_format not in IMAGE_FORMATS:
+        raise ValueError(f'Unknown image format {image_format}, it should be one of {", ".join(IMAGE_FORMATS)}')
+
+    return {
+        'fluids': fluids_values,
+        'env_types': env_types,
+        'lengths': lengths,
+        'diameters': diameters,
+        'velocities': velocities,
+        'grid': is_grid,
+        'sink': sink,
+        'workbook': bool(job.get('workbook', True)),
+        'plots': bool(job.get('plots', True)),
+        'image_format': image_format,
+    }
+
+
+def calculate_job(job: dict, workers: int = 1) -> dict:
+    """
+    This would return {env_type: ResultTable} with the columns in RESULT_COLUMNS as flat arrays.
+    Zipped points go through the result caches, a grid is swept in workers processes.
+    """
+    tables_by_env = {}
+
+    if job['grid']:
+        from parallel import sweep_values_parallel
+
+        with stage('compute'):
+            result = sweep_values_parallel(job['fluids'], lengths=job['lengths'], diameters=job['diameters'],
+                                           velocities=job['velocities'], gravities=list(job['env_types'].values()),
+                                           workers=workers)
+
+        count('points_computed', result.size)
+
+        for env_index, env_type in enumerate(job['env_types']):
+            fluids_tables = {}
+
+            for fluid_index, fluid_name in enumerate(job['fluids']):
+                values = result.isel(fluid=fluid_index, g=env_index)
+                fluids_tables[fluid_name] = get_result_columns({column: values[column] for column in RESULT_COLUMNS})
+
+            tables_by_env[env_type] = ResultTable.from_tables(fluids_tables, RESULT_COLUMNS)
+
+        return tables_by_env
+
+    for env_type, g in job['env_types'].items():
+        fluids_tables = get_cached_values_for_fluids(job['fluids'], g, lengths=job['lengths'],
+                                                     diameters=job['diameters'], velocities=job['velocities'])
+        tables_by_env[env_type] = ResultTable.from_tables(
+            {fluid_name: get_result_columns(fluid_values, job['lengths'])
+             for fluid_name, fluid_values in fluids_tables.items()}, RESULT_COLUMNS)
+
+    return tables_by_env
+
+
+def _write_fluid(sink_name: str, path_to_file: str, table: ResultTable, title: str):
+    # table only has the fluid that is written, so it goes to a worker as one buffer
+    get_sink(sink_name).write(path_to_file, table.get_fluid(table.fluids[0]), title=title)
+
+
+def export_job(job: dict, tables_by_env: dict, directory: str, workers: int = 1) -> list:
+    """
+    This would save every fluid in tables_by_env (from calculate_job) with the job's sink,
+    and the single workbook when the job asks for it.
+    Files that were already written from the same values are skipped.
+    It returns the paths that were written.
+    """
+    from excel_export import write_fluids_workbook, get_workbook_path
+
+    disk_cache = get_disk_cache()
+    sink = get_sink(job['sink'])
+    outputs = []
+
+    for env_type, table in tables_by_env.items():
+        for fluid_name in table.fluids:
+            path_to_file = get_result_path(fluid_name, env_type, sink, directory)
+            values_hash = get_values_hash(table.get_fluid(fluid_name))
+
+            if disk_cache is None or not disk_cache.is_output_current(path_to_file, values_hash):
+                outputs.append((path_to_file, values_hash, table.get_fluid_table(fluid_name),
+                                f'Values for Fluid {fluid_name}'))
+
+    count('files_written', len(outputs))
+
+    with stage('write_fluid_files'):
+        if workers > 1 and len(outputs) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_write_fluid, sink.name, path_to_file, fluid_table, title)
+                           for path_to_file, _, fluid_table, title in outputs]
+
+                for future in futures:
+                    future.result()
+        else:
+            for path_to_file, _, fluid_table, title in outputs:
+                _write_fluid(sink.name, path_to_file, fluid_table, title)
+
+    if disk_cache is not None:
+        for path_to_file, values_hash, _, _ in outputs:
+            disk_cache.set_output(path_to_file, values_hash)
+
+    written = [path_to_file for path_to_file, _, _, _ in outputs]
+
+    if job['workbook']:
+        fluids_tables_by_env = {env_type: table.to_tables() for env_type, table in tables_by_env.items()}
+        path_to_workbook = get_workbook_path(directory)
+        workbook_values = {f'{env_type}/{fluid_name}/{column}': values
+                           for env_type, fluids_tables in fluids_tables_by_env.items()
+                           for fluid_name, columns in fluids_tables.items() for column, values in columns.items()}
+        values_hash = get_values_hash(workbook_values)
+
+        if disk_cache is None or not disk_cache.is_output_current(path_to_workbook, values_hash):
+            write_fluids_workbook(path_to_workbook, fluids_tables_by_env, job['lengths'], workers=workers)
+            written.append(path_to_workbook)
+
+            if disk_cache is not None:
+                disk_cache.set_output(path_to_workbook, values_hash)
+
+    return written
+
+
+def plot_job(job: dict, tables_by_env: dict, directory: str, workers: int = 1) -> list:
+    """
+    This would save the graphs test.py shows, one image per graph and env type, to
+    "{directory}/generated/images/{env_type}". It returns the paths of the images.
+    """
+    from rendering import render_figures
+
+    # A grid has no natural order for a line to follow, so its points are drawn on their own
+    line_style = {'linestyle': 'none', 'marker': '.', 'markersize': 2} if job['grid'] else None
+
+    fluids_tables_by_env = {env_type: table.to_tables() for env_type, table in tables_by_env.items()}
+
+    return render_figures(fluids_tables_by_env, image_format=job['image_format'], directory=directory,
+                          workers=workers, line_style=line_style)
+
+
+def run_job(job: dict, directory: str, workers: int = 1, timings: dict = None) -> dict:
+    """
+    This would calculate, save and plot a job parsed by parse_job.
+    The seconds each stage took are put in timings.
+    """
+    timings = {} if timings is None else timings
+
+    start = time.perf_counter()
+    tables_by_env = calculate_job(job, workers=workers)
+    timings['calculate'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    exported = export_job(job, tables_by_env, directory, workers=workers)
+    timings['export'] = time.perf_counter() - start
+
+    plotted = []
+    if job['plots']:
+        start = time.perf_counter()
+        plotted = plot_job(job, tables_by_env, directory, workers=workers)
+        timings['plot'] = time.perf_counter() - start
+
+    number_of_points = sum(table[RESULT_COLUMNS[0]].size for table in tables_by_env.values())
+
+    return {'points': number_of_points, 'exported': exported, 'plotted': plotted}
+
+
+def main(arguments: list = None) -> int:
+    parser = argparse.ArgumentParser(description='Calculate, save and plot the fluids in a job file without a UI')
+    parser.add_argument('job_file', help='a .yaml, .yml, .json or .csv job file')
+    parser.add_argument('--output-dir', default='', help='where the generated folder goes, the cwd by default')
+    parser.add_argument('--workers', type=int, default=1, help='processes for grid sweeps and exports')
+    parser.add_argument('--backend', choices=KERNEL_BACKENDS, default=None,
+                        help='the frictional factor kernel backend')
+    parser.add_argument('--no-plots', action='store_true', help='do not save the graphs')
+    parser.add_argument('--summary', default=None, help='also write the summary to this JSON file')
+    parser.add_argument('--instrument', nargs='?', const='timers', default=None, metavar='OPTIONS',
+                        help=f'time the stages and count the work, OPTIONS is some of '
+                             f'{",".join(INSTRUMENT_OPTIONS)}')
+    parser.add_argument('--instrument-report', default=None,
+                        help='where the instrumentation report goes, generated/reports by default')
+    arguments = parser.parse_args(arguments)
+
+    if arguments.instrument is not None:
+        try:
+            enable(parse_options(arguments.instrument))
+        except ValueError as e:
+            parser.error(str(e))
+
+    timings = {}
+    summary = {'job_file': arguments.job_file, 'status': EXIT_OK, 'timings': timings}
+    total_start = time.perf_counter()
+
+    try:
+        start = time.perf_counter()
+        job = parse_job(read_job_file(arguments.job_file))
+        timings['read_job'] = time.perf_counter() - start
+
+        if arguments.no_plots:
+            job['plots'] = False
+
+        if arguments.backend is not None:
+            set_kernel_backend(arguments.backend)
+            # Worker processes that do not fork pick the backend up from here
+            os.environ['FLUID_KERNEL_BACKEND'] = arguments.backend
+    except (OSError, ValueError, ImportError) as e:
+        print(f'Invalid job: {e}', file=sys.stderr)
+        summary['status'] = EXIT_INVALID_JOB
+        summary['error'] = str(e)
+    else:
+        summary.update({'fluids': len(job['fluids']), 'env_types': list(job['env_types']), 'sink': job['sink'],
+                        'backend': get_kernel_backend(), 'workers': arguments.workers})
+
+        try:
+            summary.update(run_job(job, arguments.output_dir or os.getcwd(), workers=arguments.workers,
+                                   timings=timings))
+        except Exception as e:
+            traceback.print_exc()
+            summary['status'] = EXIT_FAILED
+            summary['error'] = str(e)
+
+    timings['total'] = time.perf_counter() - total_start
+
+    print(f'Status: {summary["status"]}')
+    if 'points' in summary:
+        print(f'Points: {summary["points"]}, files exported: {len(summary["exported"])}, '
+              f'images: {len(summary["plotted"])}')
+    for stage_name, seconds in timings.items():
+        print(f'{stage_name:>10}: {seconds:.3f} s')
+
+    # Also written when it was enabled with FLUID_INSTRUMENT
+    path_to_report = write_report(arguments.instrument_report)
+    if path_to_report is not None:
+        summary['instrumentation'] = path_to_report
+        print(f'Instrumentation report: {path_to_report}')
+
+    if arguments.summary is not None:
+        with open(arguments.summary, 'w') as file:
+            json.dump(summary, file, indent=2)
+
+    return summary['status']
+
+
+if __name__ == '__main__':
+    sys.exit(main())
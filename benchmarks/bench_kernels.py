@@ -0,0 +1,90 @@
+"""
+Benchmark of the frictional factor kernels against the scalar path in test.py.
+
+Run from the root of the project:
+    python -m benchmarks.bench_kernels
+    python -m benchmarks.bench_kernels --sizes 1000 1000000
+
+The array backends are run in chunks of CHUNK_SIZE points so 10^8 points fit in memory.
+The scalar path is only timed up to MAX_SCALAR_POINTS, above that its time is extrapolated from the
+time per point (it would take minutes otherwise) and it is marked with a *.
+"""
+import argparse
+import time
+
+import numpy as np
+
+import kernels
+from calculations import PIPE_ROUGHNESS, get_frictional_factor
+from vectorized import LAMINAR_REYNOLDS_NUMBER_LIMIT
+
+SIZES = [10 ** 3, 10 ** 6, 10 ** 8]
+CHUNK_SIZE = 10 ** 6
+MAX_SCALAR_POINTS = 10 ** 6
+
+
+def get_inputs(number_of_points: int, seed: int = 0) -> (np.ndarray, np.ndarray):
+    # Reynolds numbers on both sides of the laminar limit and diameters in the range of DIAMETERS
+    random = np.random.default_rng(seed)
+    reynold_numbers = 10 ** random.uniform(1, 6, number_of_points)
+    diameters = random.uniform(0.00159, 0.0159, number_of_points)
+
+    return reynold_numbers, diameters
+
+
+def time_scalar(number_of_points: int) -> float:
+    reynold_numbers, diameters = get_inputs(number_of_points)
+    reynold_numbers = reynold_numbers.tolist()
+    diameters = diameters.tolist()
+
+    start = time.perf_counter()
+    for reynold_number, diameter in zip(reynold_numbers, diameters):
+        get_frictional_factor(reynold_number=reynold_number, pipe_roughness=PIPE_ROUGHNESS,
+                              is_laminar=reynold_number < LAMINAR_REYNOLDS_NUMBER_LIMIT, diameter=diameter)
+
+    return time.perf_counter() - start
+
+
+def time_backend(number_of_points: int, backend: str) -> float:
+    # Run once on a few points first so the numba compile time is not counted
+    reynold_numbers, diameters = get_inputs(10)
+    kernels.get_frictional_factors(reynold_numbers, PIPE_ROUGHNESS, diameters, backend=backend)
+
+    total = 0.0
+    for start in range(0, number_of_points, CHUNK_SIZE):
+        reynold_numbers, diameters = get_inputs(min(CHUNK_SIZE, number_of_points - start), seed=start)
+
+        started_at = time.perf_counter()
+        kernels.get_frictional_factors(reynold_numbers, PIPE_ROUGHNESS, diameters, backend=backend)
+        total += time.perf_counter() - started_at
+
+    return total
+
+
+def run(sizes: list):
+    backends = ['numpy'] + (['numba'] if kernels.is_numba_available() else [])
+
+    print(f'{"points":>12} {"scalar (s)":>14} ' + ' '.join(f'{backend + " (s)":>12} {"speed-up":>9}'
+                                                          for backend in backends))
+
+    for number_of_points in sizes:
+        if number_of_points <= MAX_SCALAR_POINTS:
+            scalar_time = time_scalar(number_of_points)
+            scalar_text = f'{scalar_time:14.4f}'
+        else:
+            scalar_time = time_scalar(MAX_SCALAR_POINTS) * number_of_points / MAX_SCALAR_POINTS
+            scalar_text = f'{scalar_time:13.4f}*'
+
+        row = f'{number_of_points:>12} {scalar_text} '
+        for backend in backends:
+            backend_time = time_backend(number_of_points, backend)
+            row += f'{backend_time:12.4f} {scalar_time / backend_time:8.1f}x '
+
+        print(row)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the frictional factor kernels')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='Numbers of points to time')
+
+    run(parser.parse_args().sizes)
@@ -0,0 +1,85 @@
+"""
+Benchmark of the write and read throughput of the result sinks.
+
+Run from the root of the project:
+    python -m benchmarks.bench_sinks
+    python -m benchmarks.bench_sinks --rows 100000 1000000 --sinks npz npy parquet
+
+Excel is much slower than the others, so it is skipped above MAX_EXCEL_ROWS rows.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from result_sinks import RESULT_COLUMNS, get_available_sinks, get_sink
+
+ROWS = [10 ** 4, 10 ** 5, 10 ** 6]
+MAX_EXCEL_ROWS = 10 ** 5
+
+
+def get_columns(number_of_rows: int) -> dict:
+    random = np.random.default_rng(0)
+    return {column: random.uniform(0, 1, number_of_rows) for column in RESULT_COLUMNS}
+
+
+def get_size(path: str) -> int:
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+    return os.path.getsize(path)
+
+
+def time_sink(sink_name: str, columns: dict, directory: str) -> (float, float, int):
+    sink = get_sink(sink_name)
+    path_to_file = os.path.join(directory, f'values.{sink.extension}')
+
+    start = time.perf_counter()
+    sink.write(path_to_file, columns, title='Values')
+    write_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    values = sink.read(path_to_file)
+    # Touch every value so lazy (memory mapped) reads are counted too
+    for column in RESULT_COLUMNS:
+        np.sum(values[column])
+    read_time = time.perf_counter() - start
+
+    size = get_size(path_to_file)
+    del values
+
+    return write_time, read_time, size
+
+
+def run(rows: list, sinks: list):
+    print(f'{"sink":>8} {"rows":>10} {"write (s)":>10} {"write MB/s":>11} {"read (s)":>10} {"read MB/s":>10} '
+          f'{"file MB":>8}')
+
+    for number_of_rows in rows:
+        columns = get_columns(number_of_rows)
+        megabytes = sum(values.nbytes for values in columns.values()) / 1e6
+
+        for sink_name in sinks:
+            if sink_name == 'excel' and number_of_rows > MAX_EXCEL_ROWS:
+                continue
+
+            directory = tempfile.mkdtemp()
+            try:
+                write_time, read_time, size = time_sink(sink_name, columns, directory)
+            finally:
+                shutil.rmtree(directory)
+
+            print(f'{sink_name:>8} {number_of_rows:>10} {write_time:10.4f} {megabytes / write_time:11.1f} '
+                  f'{read_time:10.4f} {megabytes / read_time:10.1f} {size / 1e6:8.2f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the result sinks')
+    parser.add_argument('--rows', type=int, nargs='+', default=ROWS, help='Numbers of rows to write and read')
+    parser.add_argument('--sinks', nargs='+', default=get_available_sinks(), help='The sinks to benchmark')
+
+    arguments = parser.parse_args()
+    run(arguments.rows, arguments.sinks)
@@ -0,0 +1,108 @@
+"""
+Benchmark of how long the modules take to import, with a budget for each one.
+
+Every module is imported in a new interpreter with python -X importtime, the best of --repeat runs is kept.
+A module fails when it takes longer than its budget, or when it imports one of the heavy libraries
+(matplotlib, openpyxl, pyarrow, numba, PyQt5) that it should only import when they are used.
+
+Run from the root of the project:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --repeat 10 --modules calculations batch
+
+It exits with 1 when a module is over its budget, so it can be used as a check.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+# Milliseconds, numpy alone takes about 100 ms to import on a laptop
+MODULE_BUDGETS_MS = {
+    'calculations': 20,
+    'test': 20,
+    'vectorized': 250,
+    'kernels': 250,
+    'sweep': 250,
+    'streaming': 250,
+    'disk_cache': 250,
+    'result_cache': 250,
+    'result_sinks': 300,
+    'batch': 300,
+    'instrumentation': 50,
+    'prepared': 250,
+    'records': 250,
+    'property_tables': 250,
+    'decimation': 250,
+    'rendering': 250,
+    'parallel': 250,
+    'memmap_sweep': 250,
+    'slider_sweep': 250,
+}
+HEAVY_MODULES = ['matplotlib', 'openpyxl', 'pyarrow', 'numba', 'PyQt5']
+
+
+def get_import_times(module: str) -> dict:
+    """
+    This would import module in a new interpreter and return the cumulative import time,
+    in microseconds, of every package that was imported for it.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=root,
+                             capture_output=True, text=True, check=True)
+    import_times = {}
+
+    # The lines look like "import time:       320 |        707 | calculations"
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or line.endswith('imported package'):
+            continue
+
+        _, cumulative, package = line.split('|')
+        import_times[package.strip()] = int(cumulative)
+
+    return import_times
+
+
+def time_module(module: str, repeat: int) -> (float, list):
+    """
+    This would return the best import time of module in milliseconds and the heavy modules it imported.
+    """
+    best_time = None
+    heavy_modules = set()
+
+    for _ in range(repeat):
+        import_times = get_import_times(module)
+        module_time = import_times[module] / 1000
+
+        best_time = module_time if best_time is None else min(best_time, module_time)
+        heavy_modules.update(package for package in import_times if package.split('.')[0] in HEAVY_MODULES)
+
+    return best_time, sorted({package.split('.')[0] for package in heavy_modules})
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the import time of the modules against their budgets')
+    parser.add_argument('--modules', nargs='+', default=list(MODULE_BUDGETS_MS), choices=list(MODULE_BUDGETS_MS))
+    parser.add_argument('--repeat', type=int, default=5)
+    arguments = parser.parse_args()
+
+    print(f'{"module":>16} | {"import ms":>10} | {"budget ms":>10} | result')
+    is_within_budget = True
+
+    for module in arguments.modules:
+        module_time, heavy_modules = time_module(module, arguments.repeat)
+        budget = MODULE_BUDGETS_MS[module]
+
+        result = 'ok'
+        if module_time > budget:
+            result = 'over budget'
+        if len(heavy_modules) > 0:
+            result = f'imports {", ".join(heavy_modules)}'
+
+        is_within_budget = is_within_budget and result == 'ok'
+        print(f'{module:>16} | {module_time:>10.1f} | {budget:>10} | {result}')
+
+    sys.exit(0 if is_within_budget else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,404 @@
+"""
+Benchmark suite for the calculations and the whole pipeline, with results kept as JSON to compare commits.
+
+It covers every calculation in calculations.py (the ones test.py has always had), get_values,
+vectorized.get_values_array, prepared.PreparedFluid, create_excel_sheet, and MainWindow.plot_graphs and the sweep
+sliders of the realtime app (run headless, on Qt's offscreen platform). Each benchmark runs at a small, medium and
+huge size, what the size counts (points, fluids, rows or frames) is in its description.
+
+Run from the root of the project:
+    python -m benchmarks.bench_suite run
+    python -m benchmarks.bench_suite run --sizes small medium --filter calculate_ --output before.json
+    python -m benchmarks.bench_suite compare before.json after.json --threshold 0.1
+    python -m benchmarks.bench_suite run --compare-to before.json
+
+The results go to benchmarks/results/{commit}.json by default.
+compare exits with 1 when a benchmark got slower by more than the threshold (10% by default),
+the best of the repeats is compared since it is the least noisy.
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+from collections import deque
+
+import numpy as np
+
+import calculations
+
+SIZES = {'small': 10, 'medium': 10 ** 4, 'huge': 10 ** 6}
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.1
+ROOT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIRECTORY = os.path.join(ROOT_DIRECTORY, 'benchmarks', 'results')
+
+# name: (description, sizes, function that takes a size and returns what is timed)
+BENCHMARKS = {}
+# What a setup leaves behind (temporary directories, the cwd), undone once its benchmark was timed
+CLEANUP = contextlib.ExitStack()
+
+
+def benchmark(name: str, description: str, sizes: dict = None):
+    def register(setup):
+        BENCHMARKS[name] = (description, SIZES if sizes is None else sizes, setup)
+        return setup
+
+    return register
+
+
+def get_inputs(number_of_points: int, seed: int = 0) -> dict:
+    """
+    This would return random inputs for the scalar calculations, in the ranges the project uses.
+    """
+    random = np.random.default_rng(seed)
+    density = random.uniform(495, 1339, number_of_points)
+    viscosity = random.uniform(0.00011, 0.000895, number_of_points)
+    diameter = random.uniform(0.00159, 0.0159, number_of_points)
+    velocity = random.uniform(0.05, 0.5, number_of_points)
+    reynold_number = density * diameter * velocity / viscosity
+
+    shc = random.uniform(1322, 4744, number_of_points)
+
+    inputs = {
+        'density': density,
+        'viscosity': viscosity,
+        'diameter': diameter,
+        'velocity': velocity,
+        'length': random.uniform(0.2, 2, number_of_points),
+        'shc': shc,
+        'g': random.choice([9.81, 0.01], number_of_points),
+        'reynold_number': reynold_number,
+        'is_laminar': reynold_number < 2000,
+        'prandtl_number': viscosity * shc / calculations.THERMAL_CONDUCTIVITY,
+        'frictional_factor': random.uniform(0.02, 0.6, number_of_points),
+        'head_loss': random.uniform(0, 2, number_of_points),
+        'pipe_roughness': np.full(number_of_points, calculations.PIPE_ROUGHNESS),
+        'conductivity': np.full(number_of_points, float(calculations.THERMAL_CONDUCTIVITY)),
+    }
+
+    # The scalar functions are called with python floats, like test.get_values does
+    return {name: values.tolist() for name, values in inputs.items()}
+
+
+# The arguments each calculation is called with, in order
+SCALAR_CALCULATIONS = {
+    'calculate_reynolds_number': ['density', 'diameter', 'velocity', 'viscosity'],
+    'calculate_frictional_factor_for_laminar_flow': ['reynold_number'],
+    'calculate_frictional_factor_for_turbulent': ['reynold_number', 'pipe_roughness', 'diameter'],
+    'get_frictional_factor': ['reynold_number', 'pipe_roughness', 'is_laminar', 'diameter'],
+    'calculate_head_loss': ['frictional_factor', 'length', 'diameter', 'velocity', 'g'],
+    'calculate_prandtl_number': ['viscosity', 'shc', 'conductivity'],
+    'calculate_pressure': ['density', 'head_loss', 'g'],
+    'calculate_coefficient_of_heat_transfer': ['reynold_number', 'diameter', 'prandtl_number', 'conductivity'],
+}
+
+
+def _register_scalar_calculation(function_name: str, argument_names: list):
+    @benchmark(function_name, f'calculations.{function_name} called once for each of size points')
+    def setup(size: int):
+        function = getattr(calculations, function_name)
+        inputs = get_inputs(size)
+        arguments = [inputs[name] for name in argument_names]
+
+        # deque with maxlen 0 runs the map without keeping the results
+        return lambda: deque(map(function, *arguments), maxlen=0)
+
+
+for _function_name, _argument_names in SCALAR_CALCULATIONS.items():
+    _register_scalar_calculation(_function_name, _argument_names)
+
+
+@benchmark('get_values', 'calculations.get_values for size fluids (ten points each)',
+           sizes={'small': 1, 'medium': 100, 'huge': 10 ** 4})
+def setup_get_values(size: int):
+    inputs = get_inputs(size)
+    fluids = list(zip(inputs['shc'], inputs['viscosity'], inputs['density'], inputs['g']))
+
+    return lambda: deque((calculations.get_values(*fluid) for fluid in fluids), maxlen=0)
+
+
+@benchmark('get_values_array', 'vectorized.get_values_array for one fluid at size points')
+def setup_get_values_array(size: int):
+    from vectorized import get_values_array
+
+    inputs = {name: np.asarray(values) for name, values in get_inputs(size).items()}
+
+    return lambda: get_values_array(4187, 0.000895, 1000, 9.81, lengths=inputs['length'],
+                                    diameters=inputs['diameter'], velocities=inputs['velocity'])
+
+
+@benchmark('prepared_get_values',
+           'prepared.PreparedFluid.get_values for ten fluids sharing one geometry of size points')
+def setup_prepared_get_values(size: int):
+    from prepared import PreparedGeometry, prepare_fluid
+
+    inputs = {name: np.asarray(values) for name, values in get_inputs(size).items()}
+    fluids = [prepare_fluid(fluid_values, 9.81) for fluid_values in calculations.FLUIDS_VALUES.values()]
+
+    def get_values():
+        geometry = PreparedGeometry(inputs['diameter'])
+
+        for fluid in fluids:
+            fluid.get_values(inputs['length'], geometry, inputs['velocity'])
+
+    return get_values
+
+
+@benchmark('create_excel_sheet', 'test.create_excel_sheet of size rows',
+           sizes={'small': 10, 'medium': 10 ** 4, 'huge': 2 * 10 ** 5})
+def setup_create_excel_sheet(size: int):
+    from test import create_excel_sheet
+    from vectorized import get_values_array, VALUES_KEYS
+
+    inputs = {name: np.asarray(values) for name, values in get_inputs(size).items()}
+    values = get_values_array(4187, 0.000895, 1000, 9.81, lengths=inputs['length'], diameters=inputs['diameter'],
+                              velocities=inputs['velocity'])
+    fluid_values = {key: values[key] for key in VALUES_KEYS}
+
+    directory = CLEANUP.enter_context(tempfile.TemporaryDirectory())
+    # create_excel_sheet writes its file relative to the cwd, so it is moved into the temporary directory
+    # until the benchmark is done (the cwd is restored before the directory is removed)
+    CLEANUP.callback(os.chdir, os.getcwd())
+    os.chdir(directory)
+
+    return lambda: create_excel_sheet(fluid_values, 'Water', 'vertical', directory=directory)
+
+
+def get_main_window():
+    """
+    This would make the MainWindow of the realtime app without showing it, on Qt's offscreen platform.
+    """
+    import importlib.util
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    from PyQt5.QtWidgets import QApplication
+
+    get_main_window.app = QApplication.instance() or QApplication([])
+
+    spec = importlib.util.spec_from_file_location('app_realtime', os.path.join(ROOT_DIRECTORY, 'UI',
+                                                                               'app_realtime.py'))
+    app_realtime = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app_realtime)
+
+    return app_realtime.MainWindow()
+
+
+@benchmark('plot_graphs', 'MainWindow.plot_graphs of the realtime app with size fluids, calculated and drawn',
+           sizes={'small': 1, 'medium': 5, 'huge': 10})
+def setup_plot_graphs(size: int):
+    from result_cache import RESULT_CACHE
+
+    window = get_main_window()
+
+    for fluid_data, (name, properties) in zip(window.datas[:size], calculations.FLUIDS_VALUES.items()):
+        fluid_data.name = name
+        fluid_data.density = properties['density']
+        fluid_data.shc = properties['shc']
+        fluid_data.viscosity = properties['viscosity']
+
+    def plot_graphs():
+        # Calculate every time, like the first click
+        RESULT_CACHE.clear()
+        window.plot_graphs()
+
+        for canvas in window.graph_canvases:
+            canvas.draw()
+
+    return plot_graphs
+
+
+@benchmark('draw_graphs', 'MainWindow.draw_graphs of the realtime app with ten fluids of size points each')
+def setup_draw_graphs(size: int):
+    from vectorized import get_values_array
+
+    window = get_main_window()
+    inputs = {name: np.asarray(values) for name, values in get_inputs(size).items()}
+    fluids_tables = {fluid_data.name: get_values_array(properties['shc'], properties['viscosity'],
+                                                       properties['density'], 9.81, lengths=inputs['length'],
+                                                       diameters=inputs['diameter'], velocities=inputs['velocity'])
+                     for fluid_data, properties in zip(window.datas, calculations.FLUIDS_VALUES.values())}
+
+    def draw_graphs():
+        window.draw_graphs(fluids_tables)
+
+        for canvas in window.graph_canvases:
+            canvas.draw()
+
+    return draw_graphs
+
+
+@benchmark('sweep_frames', 'Dragging the velocity slider of the realtime app size steps with ten fluids plotted, '
+                           'the press draws the graph at most once and every step after it has to fit in 16 ms',
+           sizes={'small': 1, 'medium': 10, 'huge': 40})
+def setup_sweep_frames(size: int):
+    window = get_main_window()
+
+    for fluid_data, properties in zip(window.datas, calculations.FLUIDS_VALUES.values()):
+        fluid_data.density = properties['density']
+        fluid_data.shc = properties['shc']
+        fluid_data.viscosity = properties['viscosity']
+
+    from PyQt5.QtWidgets import QApplication
+
+    window.plot_graphs()
+    # The grid of the sweep is made on the worker thread and handed over by a queued signal
+    window.thread_pool.waitForDone()
+    QApplication.processEvents()
+    slider = window.sweep_sliders['Velocity']
+
+    def sweep_frames():
+        slider.setSliderDown(True)
+
+        for step in range(size):
+            slider.setValue((slider.value() + 1) % (slider.maximum() + 1))
+
+        slider.setSliderDown(False)
+
+    return sweep_frames
+
+
+def time_benchmark(name: str, size_label: str, repeat: int) -> dict:
+    description, sizes, setup = BENCHMARKS[name]
+
+    with CLEANUP:
+        function = setup(sizes[size_label])
+
+        # As many calls as take about 0.2 s, then the best and the median of repeat runs of them
+        timer = timeit.Timer(function)
+        number, _ = timer.autorange()
+        times = [seconds / number for seconds in timer.repeat(repeat=repeat, number=number)]
+
+    return {'name': name, 'size_label': size_label, 'size': sizes[size_label], 'number': number,
+            'repeat': repeat, 'min': min(times), 'median': statistics.median(times)}
+
+
+def get_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT_DIRECTORY, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(names: list, size_labels: list, repeat: int) -> dict:
+    # Nothing should come from the disk cache or skip writing a file that did not change
+    os.environ['FLUID_DISK_CACHE'] = '0'
+    cwd = os.getcwd()
+
+    report = {
+        'commit': get_commit(),
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.platform(),
+        'results': [],
+    }
+
+    try:
+        for name in names:
+            for size_label in size_labels:
+                result = time_benchmark(name, size_label, repeat)
+                report['results'].append(result)
+
+                print(f'{name:>45} {size_label:>6} {result["size"]:>9} | {result["min"] * 1000:>12.4f} ms '
+                      f'| {result["median"] * 1000:>12.4f} ms')
+    finally:
+        os.chdir(cwd)
+
+    return report
+
+
+def compare(old_report: dict, new_report: dict, threshold: float) -> bool:
+    """
+    This would print how every benchmark in both reports changed, it returns False when one got slower
+    by more than threshold.
+    """
+    old_results = {(result['name'], result['size_label']): result for result in old_report['results']}
+    is_ok = True
+
+    print(f'{"benchmark":>45} {"size":>6} | {"old ms":>12} | {"new ms":>12} | {"change":>8} | result')
+
+    for new_result in new_report['results']:
+        key = (new_result['name'], new_result['size_label'])
+
+        if key not in old_results or old_results[key]['size'] != new_result['size']:
+            continue
+
+        ratio = new_result['min'] / old_results[key]['min']
+
+        result = ''
+        if ratio > 1 + threshold:
+            result = 'regression'
+            is_ok = False
+        elif ratio < 1 / (1 + threshold):
+            result = 'improvement'
+
+        print(f'{key[0]:>45} {key[1]:>6} | {old_results[key]["min"] * 1000:>12.4f} | '
+              f'{new_result["min"] * 1000:>12.4f} | {ratio - 1:>+8.1%} | {result}')
+
+    return is_ok
+
+
+def read_report(path_to_file: str) -> dict:
+    with open(path_to_file) as file:
+        return json.load(file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the calculations and the pipeline')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='run the benchmarks and save the results')
+    run_parser.add_argument('--sizes', nargs='+', default=list(SIZES), choices=list(SIZES))
+    run_parser.add_argument('--filter', default='', help='only run the benchmarks with this in their name')
+    run_parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    run_parser.add_argument('--output', default=None, help='by default benchmarks/results/{commit}.json')
+    run_parser.add_argument('--compare-to', default=None, help='a saved result to compare the new one with')
+    run_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+
+    compare_parser = subparsers.add_parser('compare', help='compare two saved results')
+    compare_parser.add_argument('old')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                                help='how much slower (0.1 is 10%%) counts as a regression')
+
+    subparsers.add_parser('list', help='list the benchmarks')
+    arguments = parser.parse_args()
+
+    if arguments.command == 'list':
+        for name, (description, sizes, _) in BENCHMARKS.items():
+            print(f'{name}: {description}, {", ".join(f"{label} {size}" for label, size in sizes.items())}')
+        return
+
+    if arguments.command == 'compare':
+        sys.exit(0 if compare(read_report(arguments.old), read_report(arguments.new), arguments.threshold) else 1)
+
+    names = [name for name in BENCHMARKS if arguments.filter in name]
+    report = run(names, arguments.sizes, arguments.repeat)
+
+    output = arguments.output
+    if output is None:
+        if not os.path.exists(RESULTS_DIRECTORY):
+            os.makedirs(RESULTS_DIRECTORY)
+
+        output = os.path.join(RESULTS_DIRECTORY, f'{(report["commit"] or "local")[:12]}.json')
+
+    with open(output, 'w') as file:
+        json.dump(report, file, indent=2)
+
+    print(f'Saved the results to {output}')
+
+    if arguments.compare_to is not None:
+        sys.exit(0 if compare(read_report(arguments.compare_to), report, arguments.threshold) else 1)
+
+
+if __name__ == '__main__':
+    main()
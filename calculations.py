@@ -0,0 +1,173 @@
+"""
+The constants and the calculations for a single point, without any plotting or exporting.
+
+Everything that only needs the numbers imports them from here, this module only imports math
+so it is cheap to import (the batch workers and the desktop apps import it many times).
+test.py imports all of it too, so the names can still be used from there.
+"""
+import math
+
+ENV_TYPE = 'vertical'
+ACCELERATION_DUE_GRAVITY = 9.81
+ENV_TYPES_GRAVITY = {'vertical': ACCELERATION_DUE_GRAVITY, 'horizontal': 0.01}
+VELOCITY = [0.05, 0.1, 0.15, 0.2, 0.25, 0.3, 0.35, 0.4, 0.45, 0.5]
+DIAMETERS = [0.00159, 0.00318, 0.00477, 0.00636, 0.00795, 0.00954, 0.01113, 0.01272, 0.01431, 0.0159]
+LENGTHS = [0.2, 0.4, 0.6, 0.8, 1.0, 1.2, 1.4, 1.6, 1.8, 2.0]
+PIPE_ROUGHNESS = 0.03
+THERMAL_CONDUCTIVITY = 401
+GRAPH_DETAILS = [['head_loss', 'reynolds_number'], ['heat_transfer_coefficient', 'reynolds_number'],
+                 ['frictional_factor', 'reynolds_number']]
+
+FLUIDS = ['R407a', 'R245fa', 'R1234ze', 'R1234yf', 'Water', 'Ammonia', 'R134a', 'Propane', 'R600a', 'R407c']
+
+# The properties of each fluid in FLUIDS
+FLUIDS_VALUES = {
+    FLUIDS[0]: {
+        'shc': 1520,
+        'density': 1145.1,
+        'viscosity': 0.000151
+    }, FLUIDS[1]: {
+        'shc': 1322,
+        'density': 1339,
+        'viscosity': 0.000401
+    }, FLUIDS[2]: {
+        'shc': 1386,
+        'density': 1163.1,
+        'viscosity': 0.000199
+    }, FLUIDS[3]: {
+        'shc': 1392,
+        'density': 1092,
+        'viscosity': 0.000154
+    }, FLUIDS[4]: {
+        'shc': 4187,
+        'density': 1000,
+        'viscosity': 0.000895
+    }, FLUIDS[5]: {
+        'shc': 4744,
+        'density': 696,
+        'viscosity': 0.000255
+    }, FLUIDS[6]: {
+        'shc': 1430,
+        'density': 1207.2,
+        'viscosity': 0.000181
+    }, FLUIDS[7]: {
+        'shc': 1630,
+        'density': 495,
+        'viscosity': 0.00011
+    }, FLUIDS[8]: {
+        'shc': 2430,
+        'density': 551,
+        'viscosity': 0.000151
+    }, FLUIDS[9]: {
+        'shc': 1540,
+        'density': 1134,
+        'viscosity': 0.000154
+    },
+}
+
+
+def calculate_reynolds_number(density: float, diameter: float, velocity: float, dynamic_viscosity: float) -> float:
+    # This function calculates the reynolds number
+
+    reynolds_number = (density * diameter * velocity) / dynamic_viscosity
+
+    return reynolds_number
+
+
+def calculate_frictional_factor_for_laminar_flow(reynold_number: float) -> float:
+    return 64 / reynold_number
+
+
+def calculate_frictional_factor_for_turbulent(reynold_number: float, pipe_roughness: float, diameter: float) -> float:
+    return 2 * ((8 / reynold_number) ** 12 + (
+            (2.457 * math.log((0.27 * pipe_roughness / diameter) + (7 / reynold_number) ** 0.9)) ** 16 + (
+            37530 / reynold_number) ** 16) ** (-3 / 2)) ** (
+                   1 / 12)
+
+
+def get_frictional_factor(reynold_number: float, pipe_roughness: float, is_laminar: bool, diameter: float) -> float:
+    if is_laminar:
+        frictional_factor = calculate_frictional_factor_for_laminar_flow(reynold_number)
+    else:
+        frictional_factor = calculate_frictional_factor_for_turbulent(reynold_number=reynold_number,
+                                                                      pipe_roughness=pipe_roughness, diameter=diameter)
+
+    return frictional_factor
+
+
+def calculate_head_loss(friction_factor: float, pipe_length: float, diameter: float, velocity: float, g: float):
+    head_loss = (friction_factor * pipe_length * velocity ** 2) / (diameter * 2 * g)
+    return head_loss
+
+
+def calculate_prandtl_number(dynamic_viscosity: float, specific_heat_capacity: float, conductivity: float) -> float:
+    prandtl_number = (dynamic_viscosity * specific_heat_capacity) / conductivity
+
+    return prandtl_number
+
+
+def calculate_pressure(density: float, head_loss: float, g: float) -> float:
+    return -density * g * head_loss
+
+
+def calculate_coefficient_of_heat_transfer(reynold_number: float, diameter: float, prandtl_number: float,
+                                           conductivity: float) -> float:
+    return 0.023 * (reynold_number ** 0.8) * (prandtl_number ** 0.4) * conductivity / diameter
+
+
+def get_values(specific_heat_capacity: float, dynamic_viscosity: float, density: float, g: float) -> dict:
+    # This function gets the various values and does the operation for each fluid
+
+    reynolds_number_values = []  # This list would store the reynold number for the fluid in what ever case
+    head_loss_values = []  # This list would store the head loss for the fluid in varuous cases
+    coefficient_of_heat_transfer_values = []
+    frictional_factors = []
+
+    # Get the values that would be used for all fluids
+    # specific_heat_capacity = float(input('Enter specific heat capacity: '))
+    # dynamic_viscosity = float(input('Enter the dynamic viscosity: '))
+    # density = float(input('Enter the density of the fluid: '))
+
+    # Get the prandtl number, it only depends on the fluid so it is the same for every point
+    prandtl_number = calculate_prandtl_number(specific_heat_capacity=specific_heat_capacity,
+                                              conductivity=THERMAL_CONDUCTIVITY,
+                                              dynamic_viscosity=dynamic_viscosity)
+
+    for length, diameter, velocity in zip(LENGTHS, DIAMETERS, VELOCITY):
+        # Calculate the reynold's number.
+        reynold_number = calculate_reynolds_number(diameter=diameter, density=density, velocity=velocity,
+                                                   dynamic_viscosity=dynamic_viscosity)
+
+        # Get if the fluid is laminar or not
+        is_laminar = reynold_number < 2000
+
+        # Get the frictional factor
+        frictional_factor = get_frictional_factor(reynold_number=reynold_number, pipe_roughness=PIPE_ROUGHNESS,
+                                                  is_laminar=is_laminar, diameter=diameter)
+
+        # Get the head loss
+        head_loss = calculate_head_loss(friction_factor=frictional_factor, pipe_length=length, diameter=diameter,
+                                        velocity=velocity, g=g)
+
+        # Get the pressure
+        pressure = calculate_pressure(density=density, head_loss=head_loss, g=g)
+
+        # Get the coefficient of heat transfer.
+        coefficient_of_heat_transfer = calculate_coefficient_of_heat_transfer(reynold_number=reynold_number,
+                                                                              diameter=diameter,
+                                                                              prandtl_number=prandtl_number,
+                                                                              conductivity=THERMAL_CONDUCTIVITY)
+
+        frictional_factors.append(frictional_factor)
+        coefficient_of_heat_transfer_values.append(coefficient_of_heat_transfer)
+        head_loss_values.append(head_loss)
+        reynolds_number_values.append(reynold_number)
+
+    return {
+        'head_loss': head_loss_values,
+        'frictional_factor': frictional_factors,
+        'heat_transfer_coefficient': coefficient_of_heat_transfer_values,
+        'reynolds_number': reynolds_number_values,
+        'velocity': VELOCITY,
+        'diameter': DIAMETERS,
+    }
@@ -0,0 +1,243 @@
+"""
+Fewer points for the plots of big sweeps.
+
+A line can not show more detail than the pixels it is drawn on, so before the values go to matplotlib
+they are cut down to a few points per pixel column:
+    minmax: the range of x is split into CELLS_PER_PIXEL columns per pixel and the first, last, smallest and
+            largest point of each column are kept, so every spike is still drawn.
+    lttb: largest triangle three buckets, keeps the point of each bucket that makes the largest triangle
+          with its neighbours, it looks closer to the full line but can miss spikes.
+Both need the points sorted by x, a line that goes back and forth along x is drawn with all its points.
+Points drawn as markers (the scatter plots of grid sweeps) are cut down with decimate_points instead,
+which keeps one point for every pixel that has any, so no pixel that would be drawn is lost.
+
+Lines whose data is set with set_line_data keep all their values, and connect_decimation makes the axes cut
+them down again for the visible range every time it is zoomed or panned, so how long a draw takes depends on
+the size of the axes and not on the number of values.
+"""
+import weakref
+
+import numpy as np
+
+DECIMATION_METHODS = ['minmax', 'lttb']
+DEFAULT_METHOD = 'minmax'
+MIN_BUCKETS = 100
+# The lines are cut into two columns per pixel and decimate_points keeps a point for every half pixel,
+# the columns do not line up with the pixels, so with one per pixel a few pixels would be drawn differently
+CELLS_PER_PIXEL = 2
+
+# All the values of the lines that are decimated, the lines only hold the points that are drawn
+_lines_values = weakref.WeakKeyDictionary()
+
+
+def get_sorted_order(x: np.ndarray):
+    """
+    This would return slice(None) when x goes up, slice(None, None, -1) when it goes down and None otherwise.
+    A line through points whose x goes back and forth does not cover the pixel columns in order,
+    so it can not be cut down by column.
+    """
+    steps = np.diff(x)
+
+    if np.all(steps >= 0):
+        return slice(None)
+
+    if np.all(steps <= 0):
+        return slice(None, None, -1)
+
+    return None
+
+
+def _get_first_in_buckets(indices: np.ndarray, bucket_numbers: np.ndarray) -> np.ndarray:
+    # indices go up, this keeps the first of them in each bucket
+    buckets = bucket_numbers[indices]
+
+    return indices[np.concatenate([[True], buckets[1:] != buckets[:-1]])]
+
+
+def decimate_min_max(x, y, number_of_buckets: int) -> (np.ndarray, np.ndarray):
+    """
+    This would split the range of x into number_of_buckets columns of the same width and keep the first, last,
+    smallest and largest point of each column, in their order.
+    The points have to be sorted by x (either way), otherwise they are all kept.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    number_of_points = len(y)
+
+    if number_of_points <= 4 * number_of_buckets:
+        return x, y
+
+    order = get_sorted_order(x)
+    if order is None:
+        return x, y
+
+    x = x[order]
+    y = y[order]
+
+    span = x[-1] - x[0]
+    columns = np.zeros(number_of_points, dtype=int) if not span > 0 else \
+        np.minimum(((x - x[0]) * (number_of_buckets / span)).astype(int), number_of_buckets - 1)
+
+    is_start = np.concatenate([[True], columns[1:] != columns[:-1]])
+    starts = np.flatnonzero(is_start)
+    ends = np.concatenate([starts[1:], [number_of_points]]) - 1
+    bucket_numbers = np.cumsum(is_start) - 1
+
+    # Treating nan as inf (-inf for the maximum) means a nan is never picked over a real value
+    lowest_values = np.where(np.isnan(y), np.inf, y)
+    smallest = _get_first_in_buckets(
+        np.flatnonzero(lowest_values == np.minimum.reduceat(lowest_values, starts)[bucket_numbers]), bucket_numbers)
+
+    highest_values = np.where(np.isnan(y), -np.inf, y)
+    largest = _get_first_in_buckets(
+        np.flatnonzero(highest_values == np.maximum.reduceat(highest_values, starts)[bucket_numbers]), bucket_numbers)
+
+    indices = np.unique(np.concatenate([starts, ends, smallest, largest]))
+
+    return x[indices], y[indices]
+
+
+def decimate_points(x, y, transform) -> (np.ndarray, np.ndarray):
+    """
+    This would keep one point for every half pixel that has points in it, for points drawn as markers without
+    a line between them. transform takes the points to pixels, axes.transData once the limits are set.
+    Points that are not finite are left out, matplotlib does not draw them either.
+    """
+    x = np.asarray(x, dtype=float).ravel()
+    y = np.asarray(y, dtype=float).ravel()
+
+    is_finite = np.isfinite(x) & np.isfinite(y)
+    x = x[is_finite]
+    y = y[is_finite]
+
+    if len(x) == 0:
+        return x, y
+
+    pixels = np.floor(CELLS_PER_PIXEL * transform.transform(np.column_stack([x, y]))).astype(np.int64)
+    pixels -= pixels.min(axis=0)
+
+    _, indices = np.unique(pixels[:, 0] * (pixels[:, 1].max() + 1) + pixels[:, 1], return_index=True)
+    indices.sort()
+
+    return x[indices], y[indices]
+
+
+def decimate_lttb(x, y, number_of_points: int) -> (np.ndarray, np.ndarray):
+    """
+    This would keep number_of_points points with largest triangle three buckets,
+    the first and the last point are always kept.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    if len(y) <= number_of_points or number_of_points < 3:
+        return x, y
+
+    # Everything between the first and last point is split into number_of_points - 2 buckets
+    edges = np.linspace(1, len(y) - 1, number_of_points - 1).astype(int)
+    indices = np.empty(number_of_points, dtype=int)
+    indices[0] = 0
+    indices[-1] = len(y) - 1
+
+    for bucket in range(number_of_points - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+
+        # The average of the next bucket is the third corner of the triangles
+        next_stop = edges[bucket + 2] if bucket + 2 < len(edges) else len(y)
+        next_x = np.mean(x[stop:next_stop])
+        next_y = np.mean(y[stop:next_stop])
+
+        previous_x = x[indices[bucket]]
+        previous_y = y[indices[bucket]]
+
+        areas = np.abs((previous_x - next_x) * (y[start:stop] - previous_y) -
+                       (previous_x - x[start:stop]) * (next_y - previous_y))
+        indices[bucket + 1] = start + np.argmax(areas)
+
+    return x[indices], y[indices]
+
+
+def decimate(x, y, number_of_buckets: int, x_range: tuple = None,
+             method: str = DEFAULT_METHOD) -> (np.ndarray, np.ndarray):
+    """
+    This would cut the line through x and y down to what can be seen on number_of_buckets columns,
+    when x is sorted. When x_range is given only the points in it are kept, with one more point on each side
+    so the line still runs off the edges of the axes.
+    Points drawn as markers without a line go through decimate_points instead.
+    """
+    if method not in DECIMATION_METHODS:
+        raise ValueError(f'Unknown decimation method {method}, it should be one of {", ".join(DECIMATION_METHODS)}')
+
+    x = np.asarray(x, dtype=float).ravel()
+    y = np.asarray(y, dtype=float).ravel()
+
+    # Every point of a line that goes back and forth along x is kept
+    if len(x) <= 4 * number_of_buckets or get_sorted_order(x) is None:
+        return x, y
+
+    if x_range is not None:
+        is_in_range = (x >= min(x_range)) & (x <= max(x_range))
+        is_visible = is_in_range.copy()
+        is_visible[1:] |= is_in_range[:-1]
+        is_visible[:-1] |= is_in_range[1:]
+
+        x = x[is_visible]
+        y = y[is_visible]
+
+    if method == 'lttb':
+        return decimate_lttb(x, y, 2 * number_of_buckets)
+
+    return decimate_min_max(x, y, number_of_buckets)
+
+
+def get_number_of_buckets(axes) -> int:
+    # CELLS_PER_PIXEL buckets for each pixel column of the axes
+    return max(MIN_BUCKETS, int(CELLS_PER_PIXEL * axes.bbox.width))
+
+
+def _set_decimated_data(line):
+    x, y, method = _lines_values[line]
+    axes = line.axes
+
+    # While the axes scale themselves to the data every value is in view
+    x_range = None if axes.get_autoscalex_on() else axes.get_xlim()
+
+    line.set_data(*decimate(x, y, get_number_of_buckets(axes), x_range=x_range, method=method))
+
+
+def set_line_data(line, x, y, method: str = DEFAULT_METHOD):
+    """
+    This would be used instead of line.set_data, the line only gets the points that can be seen.
+    """
+    _lines_values[line] = (np.asarray(x, dtype=float).ravel(), np.asarray(y, dtype=float).ravel(), method)
+    _set_decimated_data(line)
+
+
+def redecimate_lines(axes):
+    """
+    This would cut the values of every decimated line on axes down again for the range that is shown now.
+    """
+    for line in axes.get_lines():
+        if line in _lines_values:
+            _set_decimated_data(line)
+
+
+def connect_decimation(axes) -> int:
+    """
+    This would make the axes decimate its lines again whenever its x range changes (zoom, pan, home).
+    It returns the callback id, to disconnect it with axes.callbacks.disconnect.
+    """
+    return axes.callbacks.connect('xlim_changed', redecimate_lines)
+
+
+def plot_decimated(axes, x, y, method: str = DEFAULT_METHOD, **kwargs):
+    """
+    The same as axes.plot(x, y, **kwargs) for one line, but the line is decimated.
+    connect_decimation still has to be called once for the axes for it to follow zooming and panning.
+    """
+    line, = axes.plot([], [], **kwargs)
+    set_line_data(line, x, y, method=method)
+    axes.relim()
+    axes.autoscale_view()
+
+    return line
@@ -0,0 +1,367 @@
+"""
+Cache of the values calculated for each fluid that is kept on disk between runs.
+
+Each entry is a {key}.npz file in the cache directory, the key is a hash of everything the values depend on:
+the fluid properties, g, the grid of lengths, diameters and velocities, PIPE_ROUGHNESS, THERMAL_CONDUCTIVITY
+and the version of the code that calculates them (CACHE_FORMAT_VERSION and the source of every module in
+CODE_FILES), so changing any of them never gives back old values.
+
+The cache also remembers which values each file under generated/ was last written from,
+so a file that would be written again with the same values can be skipped.
+
+When the entries take more than max_size bytes the ones that were used last the longest time ago are removed,
+until they take EVICTION_TARGET of it.
+The cache is in "cwd/generated/cache" unless the FLUID_CACHE_DIR environment variable says otherwise,
+and FLUID_DISK_CACHE=0 turns it off.
+
+It can be looked at and emptied from the command line:
+    python disk_cache.py info
+    python disk_cache.py list
+    python disk_cache.py purge
+    python disk_cache.py purge --max-size 10000000
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import zipfile
+
+import numpy as np
+
+from calculations import LENGTHS, DIAMETERS, VELOCITY, PIPE_ROUGHNESS, THERMAL_CONDUCTIVITY
+
+CACHE_FORMAT_VERSION = 1
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024  # 256 MB
+ENTRY_EXTENSION = '.npz'
+OUTPUTS_FILE_NAME = 'outputs.json'
+# When the entries go over max_size they are cut down to this much of it, so a cache that is full does not
+# list its directory on every put
+EVICTION_TARGET = 0.9
+# Every module the cached values are calculated with: get_values_for_fluids in vectorized.py evaluates them
+# with prepared.py, calculations.py has the formulas they follow and kernels.py the other frictional factor backends
+CODE_FILES = ['calculations.py', 'prepared.py', 'vectorized.py', 'kernels.py']
+
+_code_version = None
+
+
+def get_code_version() -> str:
+    """
+    This would return a hash of the source of the modules the values are calculated with.
+    """
+    global _code_version
+
+    if _code_version is None:
+        digest = hashlib.sha256(str(CACHE_FORMAT_VERSION).encode())
+
+        for file_name in CODE_FILES:
+            with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), file_name), 'rb') as file:
+                digest.update(file.read())
+
+        _code_version = digest.hexdigest()
+
+    return _code_version
+
+
+def get_cache_key(specific_heat_capacity: float, dynamic_viscosity: float, density: float, g: float,
+                  lengths=None, diameters=None, velocities=None) -> str:
+    digest = hashlib.sha256(get_code_version().encode())
+
+    for value in (specific_heat_capacity, dynamic_viscosity, density, g, PIPE_ROUGHNESS, THERMAL_CONDUCTIVITY):
+        digest.update(np.float64(value).tobytes())
+
+    for values in (LENGTHS if lengths is None else lengths, DIAMETERS if diameters is None else diameters,
+                   VELOCITY if velocities is None else velocities):
+        values = np.ascontiguousarray(values, dtype=float)
+        digest.update(str(values.shape).encode())
+        digest.update(values.tobytes())
+
+    return digest.hexdigest()
+
+
+def get_values_hash(values: dict) -> str:
+    """
+    This would return a hash of the values that are written to a file, to know if the file has to be written again.
+    """
+    digest = hashlib.sha256()
+
+    for key in sorted(values):
+        array = np.ascontiguousarray(values[key], dtype=float)
+        digest.update(key.encode())
+        digest.update(str(array.shape).encode())
+        digest.update(array.tobytes())
+
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    The entries are only ever replaced as a whole (written to a temporary file and renamed),
+    so a run that is stopped half way never leaves a broken entry behind.
+    The modification time of an entry is when it was last used, that is what the eviction goes by.
+    """
+
+    def __init__(self, directory: str, max_size: int = DEFAULT_MAX_SIZE):
+        assert max_size > 0
+
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        # The size of the entries, counted once and then kept up to date by put and evict,
+        # so the directory is only listed again when something has to be removed
+        self._size = None
+        self._lock = threading.RLock()
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}{ENTRY_EXTENSION}')
+
+    def get(self, key: str):
+        # This would return None when the key is not in the cache
+        path_to_file = self._get_path(key)
+
+        with self._lock:
+            try:
+                with np.load(path_to_file) as archive:
+                    values = {name: archive[name] for name in archive.files}
+            except FileNotFoundError:
+                self.misses += 1
+                return None
+            except (OSError, ValueError, EOFError, zipfile.BadZipFile):
+                # An entry that can not be read (cut short or written by something else) is removed,
+                # so it is calculated and put again
+                self.misses += 1
+                self._remove_entry(path_to_file)
+                return None
+
+            self.hits += 1
+            os.utime(path_to_file)
+
+            return values
+
+    def _remove_entry(self, path_to_file: str):
+        try:
+            entry_size = os.path.getsize(path_to_file)
+            os.remove(path_to_file)
+        except OSError:
+            return
+
+        if self._size is not None:
+            self._size -= entry_size
+
+    def put(self, key: str, values: dict):
+        with self._lock:
+            if not os.path.exists(self.directory):
+                os.makedirs(self.directory)
+
+            path_to_file = self._get_path(key)
+            path_to_temporary_file = f'{path_to_file}.{os.getpid()}.tmp'
+
+            with open(path_to_temporary_file, 'wb') as file:
+                np.savez(file, **values)
+
+            if self._size is not None:
+                self._size += os.path.getsize(path_to_temporary_file)
+
+                if os.path.exists(path_to_file):
+                    self._size -= os.path.getsize(path_to_file)
+
+            os.replace(path_to_temporary_file, path_to_file)
+
+            if self._size is None:
+                self._size = self.get_size()
+
+            # Other processes can write to the same directory, evict lists it to get the real size
+            if self._size > self.max_size:
+                self.evict(int(self.max_size * EVICTION_TARGET))
+
+    def get_entries(self) -> list:
+        """
+        This would return (key, size, last used) for every entry, the least recently used first.
+        """
+        if not os.path.exists(self.directory):
+            return []
+
+        entries = []
+
+        for file_name in os.listdir(self.directory):
+            if not file_name.endswith(ENTRY_EXTENSION):
+                continue
+
+            try:
+                stat = os.stat(os.path.join(self.directory, file_name))
+            except FileNotFoundError:
+                continue
+
+            entries.append((file_name[:-len(ENTRY_EXTENSION)], stat.st_size, stat.st_mtime))
+
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def get_size(self) -> int:
+        return sum(size for _, size, _ in self.get_entries())
+
+    def evict(self, max_size: int = None) -> int:
+        """
+        This would remove the least recently used entries until they take at most max_size bytes.
+        It returns the number of entries that were removed.
+        """
+        max_size = self.max_size if max_size is None else max_size
+
+        with self._lock:
+            entries = self.get_entries()
+            size = sum(entry_size for _, entry_size, _ in entries)
+            removed = 0
+
+            for key, entry_size, _ in entries:
+                if size <= max_size:
+                    break
+
+                try:
+                    os.remove(self._get_path(key))
+                except FileNotFoundError:
+                    pass
+
+                size -= entry_size
+                removed += 1
+
+            self._size = size
+
+        return removed
+
+    def purge(self) -> int:
+        """
+        This would remove every entry and forget every output file, it returns the number of entries removed.
+        """
+        with self._lock:
+            removed = self.evict(0)
+
+            if os.path.exists(os.path.join(self.directory, OUTPUTS_FILE_NAME)):
+                os.remove(os.path.join(self.directory, OUTPUTS_FILE_NAME))
+
+        return removed
+
+    def _read_outputs(self) -> dict:
+        try:
+            with open(os.path.join(self.directory, OUTPUTS_FILE_NAME)) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def is_output_current(self, path_to_file: str, values_hash: str) -> bool:
+        """
+        This would tell if path_to_file was last written from the values with values_hash
+        and was not changed or removed since.
+        """
+        with self._lock:
+            output = self._read_outputs().get(os.path.abspath(path_to_file))
+
+        if output is None or output['hash'] != values_hash:
+            return False
+
+        try:
+            stat = os.stat(path_to_file)
+        except FileNotFoundError:
+            return False
+
+        return stat.st_size == output['size'] and stat.st_mtime == output['mtime']
+
+    def set_output(self, path_to_file: str, values_hash: str):
+        # Called after path_to_file was written from the values with values_hash
+        with self._lock:
+            if not os.path.exists(self.directory):
+                os.makedirs(self.directory)
+
+            stat = os.stat(path_to_file)
+            outputs = self._read_outputs()
+            outputs[os.path.abspath(path_to_file)] = {'hash': values_hash, 'size': stat.st_size,
+                                                      'mtime': stat.st_mtime}
+
+            path_to_outputs = os.path.join(self.directory, OUTPUTS_FILE_NAME)
+            with open(f'{path_to_outputs}.{os.getpid()}.tmp', 'w') as file:
+                json.dump(outputs, file)
+
+            os.replace(f'{path_to_outputs}.{os.getpid()}.tmp', path_to_outputs)
+
+    def get_stats(self) -> dict:
+        entries = self.get_entries()
+
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(entries),
+                'size': sum(size for _, size, _ in entries), 'max_size': self.max_size,
+                'outputs': len(self._read_outputs()), 'directory': self.directory}
+
+
+def get_cache_directory() -> str:
+    return os.environ.get('FLUID_CACHE_DIR', os.path.join(os.getcwd(), 'generated', 'cache'))
+
+
+def is_disk_cache_enabled() -> bool:
+    return os.environ.get('FLUID_DISK_CACHE', '1') != '0'
+
+
+_disk_caches = {}
+
+
+def get_disk_cache():
+    """
+    This would return the cache for the current cache directory, or None when the disk cache is turned off.
+    """
+    if not is_disk_cache_enabled():
+        return None
+
+    directory = get_cache_directory()
+
+    if directory not in _disk_caches:
+        _disk_caches[directory] = DiskCache(directory)
+
+    return _disk_caches[directory]
+
+
+def write_output_if_changed(path_to_file: str, values: dict, write) -> bool:
+    """
+    This would call write() to write path_to_file from values, unless it was already written from the same values.
+    It returns whether the file was written.
+    """
+    disk_cache = get_disk_cache()
+    values_hash = get_values_hash(values)
+
+    if disk_cache is not None and disk_cache.is_output_current(path_to_file, values_hash):
+        return False
+
+    write()
+
+    if disk_cache is not None:
+        disk_cache.set_output(path_to_file, values_hash)
+
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Look at or empty the on disk cache of fluid values')
+    parser.add_argument('command', choices=['info', 'list', 'purge'])
+    parser.add_argument('--directory', default=None, help='the cache directory, by default the one the apps use')
+    parser.add_argument('--max-size', type=int, default=None,
+                        help='with purge, only remove the least recently used entries above this many bytes')
+    arguments = parser.parse_args()
+
+    cache = DiskCache(arguments.directory or get_cache_directory())
+
+    if arguments.command == 'info':
+        stats = cache.get_stats()
+        print(f'Directory: {stats["directory"]}')
+        print(f'Entries: {stats["entries"]}')
+        print(f'Size: {stats["size"]} bytes')
+        print(f'Output files: {stats["outputs"]}')
+    elif arguments.command == 'list':
+        for key, size, last_used in cache.get_entries():
+            print(f'{key}  {size:>10} bytes  {np.datetime64(int(last_used), "s")}')
+    else:
+        if arguments.max_size is None:
+            removed = cache.purge()
+        else:
+            removed = cache.evict(arguments.max_size)
+
+        print(f'Removed {removed} entries')
+
+
+if __name__ == '__main__':
+    main()
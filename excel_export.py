@@ -0,0 +1,321 @@
+"""
+Streaming Excel writer.
+
+The workbooks are opened in openpyxl write-only mode and whole rows are appended at a time,
+so the rows go straight to a temporary file instead of being kept in memory as cells.
+The columns are turned into rows a chunk at a time, which keeps the memory used the same
+however many rows are written.
+
+write_fluids_workbook puts every fluid, for both the vertical and horizontal cases, into a single workbook.
+"""
+import itertools
+import os
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree import ElementTree
+from xml.sax.saxutils import quoteattr
+
+import numpy as np
+import openpyxl
+from openpyxl.cell.rich_text import CellRichText
+
+from instrumentation import stage, count
+
+EXCEL_MAX_ROWS = 1048576  # The most rows a sheet can have, including the header
+EXCEL_MAX_SHEET_TITLE_LENGTH = 31
+ROWS_PER_CHUNK = 10000
+
+
+def iter_column_rows(columns: list):
+    """
+    This would turn a list of columns (lists or arrays) into rows, a chunk at a time.
+    Columns that are shorter than the others are padded with None.
+    """
+    columns = [np.asarray(column).ravel() for column in columns]
+    number_of_rows = max((len(column) for column in columns), default=0)
+
+    for start in range(0, number_of_rows, ROWS_PER_CHUNK):
+        chunk = [column[start:start + ROWS_PER_CHUNK].tolist() for column in columns]
+
+        yield from itertools.zip_longest(*chunk)
+
+
+def get_sheet_title(title: str, part: int = 1) -> str:
+    # Excel limits sheet titles to 31 characters, the part number is added when a sheet is continued
+    if part > 1:
+        suffix = f' ({part})'
+        return title[:EXCEL_MAX_SHEET_TITLE_LENGTH - len(suffix)] + suffix
+
+    return title[:EXCEL_MAX_SHEET_TITLE_LENGTH]
+
+
+def get_unique_sheet_titles(titles: list) -> list:
+    """
+    This would cut the titles to the length Excel allows and add a number to the ones that end up the same
+    as an earlier one. Excel does not open a workbook with two sheets of the same title, whatever their case.
+    """
+    unique_titles = []
+    used_titles = set()
+
+    for title in titles:
+        unique_title = get_sheet_title(title)
+        number = 1
+
+        while unique_title.lower() in used_titles:
+            number += 1
+            suffix = f' ~{number}'
+            unique_title = title[:EXCEL_MAX_SHEET_TITLE_LENGTH - len(suffix)].rstrip() + suffix
+
+        used_titles.add(unique_title.lower())
+        unique_titles.append(unique_title)
+
+    return unique_titles
+
+
+def append_sheet_rows(workbook: openpyxl.Workbook, title: str, headers: list, rows) -> int:
+    """
+    This would add a sheet to a write-only workbook and write the headers and the rows to it.
+    When there are more rows than a sheet can hold, they continue on another sheet with the same headers.
+    It returns the number of rows written, without the headers.
+    """
+    part = 1
+    sheet = workbook.create_sheet(title=get_sheet_title(title, part))
+    sheet.append(headers)
+
+    rows_in_sheet = 1
+    number_of_rows = 0
+
+    for row in rows:
+        if rows_in_sheet == EXCEL_MAX_ROWS:
+            part += 1
+            sheet = workbook.create_sheet(title=get_sheet_title(title, part))
+            sheet.append(headers)
+            rows_in_sheet = 1
+
+        sheet.append(row)
+        rows_in_sheet += 1
+        number_of_rows += 1
+
+    return number_of_rows
+
+
+def write_excel_sheet(path_to_file: str, title: str, columns: dict) -> int:
+    """
+    This would write the columns to a new workbook at path_to_file.
+    The keys of columns are the headers:
+    {
+        length: [] # The numbers in the list would be the column values,
+        head_loss: [] # Same as this one
+    }
+    """
+    with stage('write_excel_sheet'):
+        workbook = openpyxl.Workbook(write_only=True)
+
+        number_of_rows = append_sheet_rows(workbook, title, list(columns.keys()),
+                                           iter_column_rows(list(columns.values())))
+        workbook.save(filename=path_to_file)
+
+    count('cells_written', number_of_rows * len(columns))
+
+    return number_of_rows
+
+
+SUMMARY_SHEET_TITLE = 'Summary'
+WORKBOOK_NAME = 'fluids.xlsx'
+SUMMARY_QUANTITIES = ['head_loss', 'frictional_factor', 'heat_transfer_coefficient', 'reynolds_number']
+
+_CONTENT_TYPES = {
+    'worksheet': 'application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml',
+    'workbook': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml',
+    'styles': 'application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml',
+    'theme': 'application/vnd.openxmlformats-officedocument.theme+xml',
+    'core': 'application/vnd.openxmlformats-package.core-properties+xml',
+    'app': 'application/vnd.openxmlformats-officedocument.extended-properties+xml',
+    'relationships': 'application/vnd.openxmlformats-package.relationships+xml',
+}
+_SPREADSHEET_NAMESPACE = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_RELATIONSHIPS_NAMESPACE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_RELATIONSHIP_TYPE = _RELATIONSHIPS_NAMESPACE + '/'
+
+
+def get_workbook_path(directory: str = '') -> str:
+    # The single workbook goes next to the per fluid sheets, in "cwd/generated/excel_sheets"
+    directory_to_save_file = os.path.join(directory or os.getcwd(), 'generated', 'excel_sheets')
+
+    if not os.path.exists(directory_to_save_file):
+        os.makedirs(directory_to_save_file)
+
+    return os.path.join(directory_to_save_file, WORKBOOK_NAME)
+
+
+def get_sheet_columns(fluid_values: dict, lengths) -> dict:
+    # The length is the first column, like in test.create_excel_sheet
+    columns = {'length': fluid_values.get('length', lengths)}
+    columns.update(fluid_values)
+
+    return columns
+
+
+def get_summary_rows(fluids_tables_by_env: dict) -> (list, list):
+    """
+    This would return the headers and rows of the summary sheet,
+    one row for each fluid and env type with the smallest and largest value of each quantity.
+    """
+    headers = ['fluid', 'env_type', 'points']
+    for quantity in SUMMARY_QUANTITIES:
+        headers += [f'min_{quantity}', f'max_{quantity}']
+
+    rows = []
+    for env_type, fluids_tables in fluids_tables_by_env.items():
+        for fluid_name, fluid_values in fluids_tables.items():
+            row = [fluid_name, env_type, int(np.size(fluid_values[SUMMARY_QUANTITIES[0]]))]
+
+            for quantity in SUMMARY_QUANTITIES:
+                row += [float(np.min(fluid_values[quantity])), float(np.max(fluid_values[quantity]))]
+
+            rows.append(row)
+
+    return headers, rows
+
+
+def _write_sheet_part(path_to_part: str, title: str, headers: list, rows) -> int:
+    """
+    This runs in a worker process, it writes one sheet to a workbook of its own.
+    The text is written inline rather than to a shared strings table, so the sheet can be copied into
+    the final workbook as it is.
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+
+    headers = [CellRichText(header) for header in headers]
+    rows = ([CellRichText(value) if isinstance(value, str) else value for value in row] for row in rows)
+
+    number_of_rows = append_sheet_rows(workbook, title, headers, rows)
+    workbook.save(filename=path_to_part)
+
+    return number_of_rows
+
+
+def _write_column_sheet_part(path_to_part: str, title: str, columns: dict) -> int:
+    return _write_sheet_part(path_to_part, title, list(columns.keys()), iter_column_rows(list(columns.values())))
+
+
+def _assemble_parts(path_to_file: str, paths_to_parts: list):
+    """
+    This would put the sheets of the part workbooks, in order, into a single workbook.
+    The styles, theme and document properties are taken from the first part, they are the same in all of them.
+    """
+    sheets = []  # (title, part, name of the sheet in the part)
+
+    for path_to_part in paths_to_parts:
+        with zipfile.ZipFile(path_to_part) as part:
+            workbook = ElementTree.fromstring(part.read('xl/workbook.xml'))
+            relationships = ElementTree.fromstring(part.read('xl/_rels/workbook.xml.rels'))
+
+        targets = {relationship.get('Id'): relationship.get('Target').lstrip('/') for relationship in relationships}
+
+        for sheet in workbook.iter(f'{{{_SPREADSHEET_NAMESPACE}}}sheet'):
+            sheets.append((sheet.get('name'), path_to_part, targets[sheet.get(f'{{{_RELATIONSHIPS_NAMESPACE}}}id')]))
+
+    # The parts were written on their own, so the sheets a big sheet continues on can still clash with other titles
+    sheets = [(title, path_to_part, sheet_name) for title, (_, path_to_part, sheet_name)
+              in zip(get_unique_sheet_titles([title for title, _, _ in sheets]), sheets)]
+
+    content_types = [f'<Override PartName="/xl/worksheets/sheet{index}.xml" '
+                     f'ContentType="{_CONTENT_TYPES["worksheet"]}"/>' for index in range(1, len(sheets) + 1)]
+    workbook_sheets = [f'<sheet name={quoteattr(title)} sheetId="{index}" r:id="rId{index}"/>'
+                       for index, (title, _, _) in enumerate(sheets, start=1)]
+    workbook_relationships = [f'<Relationship Id="rId{index}" Type="{_RELATIONSHIP_TYPE}worksheet" '
+                              f'Target="/xl/worksheets/sheet{index}.xml"/>' for index in range(1, len(sheets) + 1)]
+    workbook_relationships += [
+        f'<Relationship Id="rId{len(sheets) + 1}" Type="{_RELATIONSHIP_TYPE}styles" Target="styles.xml"/>',
+        f'<Relationship Id="rId{len(sheets) + 2}" Type="{_RELATIONSHIP_TYPE}theme" Target="theme/theme1.xml"/>',
+    ]
+
+    with zipfile.ZipFile(path_to_file, 'w', compression=zipfile.ZIP_DEFLATED) as final_workbook:
+        final_workbook.writestr('[Content_Types].xml', (
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            f'<Default Extension="rels" ContentType="{_CONTENT_TYPES["relationships"]}"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            f'<Override PartName="/xl/workbook.xml" ContentType="{_CONTENT_TYPES["workbook"]}"/>'
+            f'<Override PartName="/xl/styles.xml" ContentType="{_CONTENT_TYPES["styles"]}"/>'
+            f'<Override PartName="/xl/theme/theme1.xml" ContentType="{_CONTENT_TYPES["theme"]}"/>'
+            f'<Override PartName="/docProps/core.xml" ContentType="{_CONTENT_TYPES["core"]}"/>'
+            f'<Override PartName="/docProps/app.xml" ContentType="{_CONTENT_TYPES["app"]}"/>'
+            + ''.join(content_types) + '</Types>'))
+        final_workbook.writestr('xl/workbook.xml', (
+            f'<workbook xmlns="{_SPREADSHEET_NAMESPACE}" xmlns:r="{_RELATIONSHIPS_NAMESPACE}">'
+            '<sheets>' + ''.join(workbook_sheets) + '</sheets></workbook>'))
+        final_workbook.writestr('xl/_rels/workbook.xml.rels', (
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            + ''.join(workbook_relationships) + '</Relationships>'))
+
+        with zipfile.ZipFile(paths_to_parts[0]) as first_part:
+            for name in ['_rels/.rels', 'docProps/app.xml', 'docProps/core.xml', 'xl/styles.xml',
+                         'xl/theme/theme1.xml']:
+                final_workbook.writestr(name, first_part.read(name))
+
+        for index, (_, path_to_part, sheet_name) in enumerate(sheets, start=1):
+            # The sheets are streamed across so a big sheet is never read into memory
+            with zipfile.ZipFile(path_to_part) as part, part.open(sheet_name) as source, \
+                    final_workbook.open(f'xl/worksheets/sheet{index}.xml', 'w', force_zip64=True) as destination:
+                shutil.copyfileobj(source, destination)
+
+
+def write_fluids_workbook(path_to_file: str, fluids_tables_by_env: dict, lengths, workers: int = 1) -> int:
+    """
+    This would write the values of every fluid, for every env type, into one workbook:
+    a summary sheet first, then one sheet for each fluid and env type.
+    fluids_tables_by_env is laid out like
+    {
+        env_type: {
+            fluid_name: {head_loss: [], reynolds_number: [], ...}
+        }
+    }
+    lengths is used for the length column when the values do not have one.
+
+    With more than one worker, each sheet is written to a temporary workbook in its own process
+    and the sheets are put together into the final workbook at the end.
+    It returns the number of rows written.
+    """
+    summary_headers, summary_rows = get_summary_rows(fluids_tables_by_env)
+
+    sheets = [(f'{fluid_name} {env_type}', get_sheet_columns(fluid_values, lengths))
+              for env_type, fluids_tables in fluids_tables_by_env.items()
+              for fluid_name, fluid_values in fluids_tables.items()]
+    # Long fluid names that start the same would be cut to the same title
+    titles = get_unique_sheet_titles([SUMMARY_SHEET_TITLE] + [title for title, _ in sheets])[1:]
+    sheets = [(title, columns) for title, (_, columns) in zip(titles, sheets)]
+
+    count('cells_written', len(summary_rows) * len(summary_headers) +
+          sum(max(np.size(column) for column in columns.values()) * len(columns) for _, columns in sheets))
+
+    with stage('write_fluids_workbook'):
+        if workers <= 1:
+            workbook = openpyxl.Workbook(write_only=True)
+            number_of_rows = append_sheet_rows(workbook, SUMMARY_SHEET_TITLE, summary_headers, summary_rows)
+
+            for title, columns in sheets:
+                number_of_rows += append_sheet_rows(workbook, title, list(columns.keys()),
+                                                    iter_column_rows(list(columns.values())))
+
+            workbook.save(filename=path_to_file)
+
+            return number_of_rows
+
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(path_to_file))) as parts_directory:
+            paths_to_parts = [os.path.join(parts_directory, f'part{index}.xlsx')
+                              for index in range(len(sheets) + 1)]
+
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_write_sheet_part, paths_to_parts[0], SUMMARY_SHEET_TITLE,
+                                           summary_headers, summary_rows)]
+                futures += [executor.submit(_write_column_sheet_part, path_to_part, title, columns)
+                            for path_to_part, (title, columns) in zip(paths_to_parts[1:], sheets)]
+
+                number_of_rows = sum(future.result() for future in futures)
+
+            _assemble_parts(path_to_file, paths_to_parts)
+
+    return number_of_rows
@@ -0,0 +1,273 @@
+"""
+Timers, counters and optional profiling of a run, written to a JSON report.
+
+The stages that can be slow are wrapped in stage(name) (calculating, writing the files, rendering the graphs)
+and count(name, amount) keeps counts like the points calculated, the cells written and the figures drawn.
+Nothing is measured until it is enabled, then stage returns a shared do-nothing context manager and count
+returns straight away, so the hooks can stay in the code.
+
+It is enabled with the --instrument flag of test.py and batch.py, or for any run (the UI apps too)
+with the FLUID_INSTRUMENT environment variable:
+    FLUID_INSTRUMENT=1                      stage timers and counters
+    FLUID_INSTRUMENT=cprofile,tracemalloc   the same, plus a cProfile of the run and the peak memory
+                                            and top allocations from tracemalloc
+    FLUID_INSTRUMENT=0                      nothing, like "", false, no and off
+An unknown option in FLUID_INSTRUMENT is reported on stderr and nothing is measured.
+When it is enabled with the environment variable the report is written when the process exits,
+to FLUID_INSTRUMENT_REPORT or "cwd/generated/reports/instrumentation_{time}_{pid}.json".
+The cProfile stats are also dumped next to the report, as .prof, for snakeviz or pstats.
+
+Only the process the run started in is measured, work done in worker processes is timed as part of
+the stage that started them.
+"""
+import atexit
+import contextlib
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+
+INSTRUMENT_OPTIONS = ['timers', 'cprofile', 'tracemalloc']
+# The values of FLUID_INSTRUMENT that leave it off
+DISABLED_VALUES = ['', '0', 'false', 'no', 'off']
+PROFILE_TOP_FUNCTIONS = 30
+TRACEMALLOC_TOP_ALLOCATIONS = 10
+
+_NULL_STAGE = contextlib.nullcontext()
+
+# The instrumentation of the current run, None while it is disabled
+_instrumentation = None
+
+
+class Instrumentation:
+    """
+    The stage times, counters and profilers of one run.
+    """
+
+    def __init__(self, options: list):
+        unknown_options = [option for option in options if option not in INSTRUMENT_OPTIONS]
+        if len(unknown_options) > 0:
+            raise ValueError(f'Unknown instrument options {", ".join(unknown_options)}, '
+                             f'they should be some of {", ".join(INSTRUMENT_OPTIONS)}')
+
+        self.options = sorted(set(options) | {'timers'})
+        self.started = datetime.datetime.now()
+        self.start_time = time.perf_counter()
+        self.stages = {}  # name: [calls, seconds]
+        self.counters = {}
+        self.profiler = None
+        # The UI calculates on worker threads
+        self._lock = threading.Lock()
+
+        if 'tracemalloc' in self.options:
+            import tracemalloc
+
+            tracemalloc.start()
+
+        if 'cprofile' in self.options:
+            import cProfile
+
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+
+            with self._lock:
+                stage = self.stages.setdefault(name, [0, 0.0])
+                stage[0] += 1
+                stage[1] += seconds
+
+    def count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def stop(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+
+    def get_profile_report(self, path_to_stats: str = None) -> list:
+        """
+        This would return the functions that took the most time, by cumulative time,
+        and dump the whole profile to path_to_stats when it is given.
+        """
+        import pstats
+
+        stats = pstats.Stats(self.profiler)
+
+        if path_to_stats is not None:
+            stats.dump_stats(path_to_stats)
+
+        functions = []
+        for (file_name, line_number, function_name), (_, calls, own_time, cumulative_time, _) in \
+                stats.stats.items():
+            functions.append({'function': f'{file_name}:{line_number}({function_name})', 'calls': calls,
+                              'own_seconds': own_time, 'cumulative_seconds': cumulative_time})
+
+        functions.sort(key=lambda function: function['cumulative_seconds'], reverse=True)
+
+        return functions[:PROFILE_TOP_FUNCTIONS]
+
+    @staticmethod
+    def get_memory_report() -> dict:
+        import tracemalloc
+
+        current, peak = tracemalloc.get_traced_memory()
+        statistics = tracemalloc.take_snapshot().statistics('lineno')[:TRACEMALLOC_TOP_ALLOCATIONS]
+
+        return {
+            'current_bytes': current,
+            'peak_bytes': peak,
+            'top_allocations': [{'location': str(statistic.traceback), 'bytes': statistic.size,
+                                 'blocks': statistic.count} for statistic in statistics],
+        }
+
+    def get_report(self, path_to_stats: str = None) -> dict:
+        with self._lock:
+            report = {
+                'started': self.started.isoformat(timespec='seconds'),
+                'seconds': time.perf_counter() - self.start_time,
+                'argv': sys.argv,
+                'pid': os.getpid(),
+                'options': self.options,
+                'stages': {name: {'calls': calls, 'seconds': seconds}
+                           for name, (calls, seconds) in self.stages.items()},
+                'counters': dict(self.counters),
+            }
+
+        if self.profiler is not None:
+            report['profile'] = self.get_profile_report(path_to_stats)
+
+        if 'tracemalloc' in self.options:
+            report['memory'] = self.get_memory_report()
+
+        return report
+
+
+def parse_options(value: str) -> list:
+    # "1", "true" and "timers" all mean only the timers and counters, "", "0", "false", "no" and "off" mean nothing
+    if value.strip().lower() in DISABLED_VALUES:
+        return []
+
+    options = [option.strip().lower() for option in value.split(',') if option.strip() != '']
+
+    return ['timers' if option in ['1', 'true', 'yes', 'on'] else option for option in options]
+
+
+def enable(options: list = None) -> Instrumentation:
+    """
+    This would start measuring, with the timers and counters and any of the other INSTRUMENT_OPTIONS.
+    """
+    global _instrumentation
+
+    if _instrumentation is None:
+        _instrumentation = Instrumentation(options or ['timers'])
+
+    return _instrumentation
+
+
+def disable():
+    global _instrumentation
+
+    if _instrumentation is not None:
+        _instrumentation.stop()
+
+        if 'tracemalloc' in _instrumentation.options:
+            import tracemalloc
+
+            tracemalloc.stop()
+
+        _instrumentation = None
+
+
+def is_enabled() -> bool:
+    return _instrumentation is not None
+
+
+def stage(name: str):
+    """
+    This would time the code in the with block as the stage name, when the instrumentation is enabled.
+    """
+    if _instrumentation is None:
+        return _NULL_STAGE
+
+    return _instrumentation.stage(name)
+
+
+def count(name: str, amount: int = 1):
+    if _instrumentation is None:
+        return
+
+    _instrumentation.count(name, amount)
+
+
+def get_report_path(directory: str = '') -> str:
+    directory_to_save_file = os.path.join(directory or os.getcwd(), 'generated', 'reports')
+
+    if not os.path.exists(directory_to_save_file):
+        os.makedirs(directory_to_save_file, exist_ok=True)
+
+    return os.path.join(directory_to_save_file,
+                        f'instrumentation_{datetime.datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}.json')
+
+
+def write_report(path_to_file: str = None) -> str:
+    """
+    This would stop measuring and write the report to path_to_file (get_report_path() by default).
+    It returns the path of the report, or None when the instrumentation was not enabled.
+    """
+    instrumentation = _instrumentation
+
+    if instrumentation is None:
+        return None
+
+    instrumentation.stop()
+    path_to_file = path_to_file or get_report_path()
+    report = instrumentation.get_report(f'{os.path.splitext(path_to_file)[0]}.prof')
+
+    with open(path_to_file, 'w') as file:
+        json.dump(report, file, indent=2)
+
+    disable()
+
+    return path_to_file
+
+
+def enable_from_environment() -> bool:
+    """
+    This would enable the instrumentation when FLUID_INSTRUMENT is set,
+    and write the report to FLUID_INSTRUMENT_REPORT when the process exits.
+    """
+    options = parse_options(os.environ.get('FLUID_INSTRUMENT', ''))
+
+    if len(options) == 0 or is_enabled():
+        return False
+
+    import multiprocessing
+
+    # Worker processes get the environment too, only the process of the run writes a report
+    if multiprocessing.parent_process() is not None:
+        return False
+
+    # This runs on import, a typo in the variable should not stop test.py, batch.py or the apps
+    try:
+        enable(options)
+    except ValueError as e:
+        print(f'FLUID_INSTRUMENT is ignored: {e}', file=sys.stderr)
+
+        return False
+
+    atexit.register(write_report, os.environ.get('FLUID_INSTRUMENT_REPORT') or None)
+
+    return True
+
+
+enable_from_environment()
@@ -0,0 +1,122 @@
+"""
+Compiled kernels for the frictional factor correlations.
+
+There are two backends:
+    numpy: the masked array version in vectorized.get_frictional_factors, always available.
+    numba: NumPy ufuncs compiled with numba.vectorize, only available when numba is installed.
+           Each point is evaluated in one pass without the temporary arrays the numpy version needs.
+
+The backend can be picked for a single call, or for everything with set_kernel_backend()
+or the FLUID_KERNEL_BACKEND environment variable.
+By default numba is used when it is installed.
+"""
+import importlib.util
+import math
+import os
+
+import numpy as np
+
+from vectorized import LAMINAR_REYNOLDS_NUMBER_LIMIT, get_frictional_factors as get_frictional_factors_numpy, \
+    calculate_frictional_factors_for_turbulent as calculate_frictional_factors_for_turbulent_numpy
+
+KERNEL_BACKENDS = ['numpy', 'numba']
+
+_numba_kernels = {}
+# Set from FLUID_KERNEL_BACKEND by set_kernel_backend_from_environment below
+_kernel_backend = 'numpy'
+
+
+def is_numba_available() -> bool:
+    return importlib.util.find_spec('numba') is not None
+
+
+def set_kernel_backend(backend: str):
+    global _kernel_backend
+
+    if backend not in KERNEL_BACKENDS:
+        raise ValueError(f'Unknown kernel backend {backend}, it should be one of {", ".join(KERNEL_BACKENDS)}')
+
+    if backend == 'numba' and not is_numba_available():
+        raise ImportError('numba is not installed, use the numpy kernel backend')
+
+    _kernel_backend = backend
+
+
+def set_kernel_backend_from_environment():
+    # numba takes long to import, so it is only looked for here and imported when the kernels are compiled
+    backend = os.environ.get('FLUID_KERNEL_BACKEND', 'numba' if is_numba_available() else 'numpy')
+
+    try:
+        set_kernel_backend(backend)
+    except ValueError as e:
+        raise ValueError(f'FLUID_KERNEL_BACKEND is not valid: {e}') from None
+
+
+set_kernel_backend_from_environment()
+
+
+def get_kernel_backend() -> str:
+    return _kernel_backend
+
+
+def _get_numba_kernels() -> dict:
+    """
+    The kernels are compiled the first time they are needed so importing this module stays cheap.
+    """
+    if len(_numba_kernels) > 0:
+        return _numba_kernels
+
+    import numba
+
+    signature = ['float64(float64, float64, float64)']
+
+    @numba.vectorize(['float64(float64)'], cache=True)
+    def laminar(reynold_number):
+        return 64 / reynold_number
+
+    @numba.vectorize(signature, cache=True)
+    def turbulent(reynold_number, pipe_roughness, diameter):
+        return 2 * ((8 / reynold_number) ** 12 + (
+                (2.457 * math.log((0.27 * pipe_roughness / diameter) + (7 / reynold_number) ** 0.9)) ** 16 + (
+                37530 / reynold_number) ** 16) ** (-3 / 2)) ** (1 / 12)
+
+    @numba.vectorize(signature, cache=True)
+    def frictional_factor(reynold_number, pipe_roughness, diameter):
+        if reynold_number < LAMINAR_REYNOLDS_NUMBER_LIMIT:
+            return 64 / reynold_number
+
+        return 2 * ((8 / reynold_number) ** 12 + (
+                (2.457 * math.log((0.27 * pipe_roughness / diameter) + (7 / reynold_number) ** 0.9)) ** 16 + (
+                37530 / reynold_number) ** 16) ** (-3 / 2)) ** (1 / 12)
+
+    _numba_kernels.update({'laminar': laminar, 'turbulent': turbulent, 'frictional_factor': frictional_factor})
+
+    return _numba_kernels
+
+
+def calculate_frictional_factors_for_laminar_flow(reynold_numbers, backend: str = None) -> np.ndarray:
+    if (backend or _kernel_backend) == 'numba':
+        return _get_numba_kernels()['laminar'](np.asarray(reynold_numbers, dtype=float))
+
+    return 64 / np.asarray(reynold_numbers, dtype=float)
+
+
+def calculate_frictional_factors_for_turbulent(reynold_numbers, pipe_roughness, diameters,
+                                               backend: str = None) -> np.ndarray:
+    if (backend or _kernel_backend) == 'numba':
+        return _get_numba_kernels()['turbulent'](np.asarray(reynold_numbers, dtype=float), pipe_roughness,
+                                                 np.asarray(diameters, dtype=float))
+
+    return calculate_frictional_factors_for_turbulent_numpy(reynold_numbers, pipe_roughness=pipe_roughness,
+                                                            diameters=diameters)
+
+
+def get_frictional_factors(reynold_numbers, pipe_roughness: float, diameters, backend: str = None) -> np.ndarray:
+    """
+    Same as vectorized.get_frictional_factors but with the chosen backend.
+    """
+    if (backend or _kernel_backend) == 'numba':
+        return _get_numba_kernels()['frictional_factor'](np.asarray(reynold_numbers, dtype=float), pipe_roughness,
+                                                         np.asarray(diameters, dtype=float))
+
+    return get_frictional_factors_numpy(reynold_numbers, pipe_roughness=pipe_roughness, diameters=diameters)
@@ -0,0 +1,122 @@
+"""
+Out of core version of sweep.sweep_values.
+
+The results are written into memory mapped .npy files in a directory, a chunk at a time,
+so the memory used is bounded by the chunk size instead of the size of the whole sweep.
+A finished sweep can be opened again with open_memmap_sweep, the arrays are memory mapped
+so nothing is copied or read from disk until it is used.
+
+The directory holds one {quantity}.npy file for each quantity in FLUID_QUANTITIES_DIMENSIONS,
+one coords_{dimension}.npy file for each numeric axis and a sweep.json file with the fluid names.
+"""
+import json
+import os
+
+import numpy as np
+
+from sweep import SWEEP_DIMENSIONS, FLUID_QUANTITIES_DIMENSIONS, SweepResult, resolve_sweep_axes, get_stored_shape, \
+    sweep_values
+
+DEFAULT_CHUNK_POINTS = 2 ** 20  # About 8 MB for each full size quantity in a chunk
+METADATA_FILE_NAME = 'sweep.json'
+
+
+def run_memmap_sweep(directory: str, fluids_values: dict, lengths=None, diameters=None, velocities=None,
+                     gravities=None, chunk_points: int = DEFAULT_CHUNK_POINTS) -> SweepResult:
+    """
+    This would evaluate the same grid as sweep.sweep_values and write it to directory.
+
+    Each chunk is one fluid and as many diameters as fit in chunk_points points
+    (at least one diameter, so a chunk is never smaller than the length x velocity x gravity grid).
+    Each chunk is calculated and written straight into the memory mapped files, then dropped.
+    It returns the finished sweep, opened memory mapped.
+    """
+    assert chunk_points > 0
+
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    axes = resolve_sweep_axes(lengths, diameters, velocities, gravities)
+    fluid_names = list(fluids_values.keys())
+
+    axes_lengths = {dim: len(values) for dim, values in axes.items()}
+    axes_lengths['fluid'] = len(fluid_names)
+
+    # The sweep is only marked as complete once every chunk is written
+    metadata = {'fluids': fluid_names, 'complete': False}
+    _write_metadata(directory, metadata)
+
+    for dim, values in axes.items():
+        np.save(os.path.join(directory, f'coords_{dim}.npy'), values)
+
+    paths_to_files = {quantity: os.path.join(directory, f'{quantity}.npy')
+                      for quantity in FLUID_QUANTITIES_DIMENSIONS}
+
+    for quantity, dimensions in FLUID_QUANTITIES_DIMENSIONS.items():
+        # Create the files at their full size, nothing is written to them yet
+        output = np.lib.format.open_memmap(paths_to_files[quantity], mode='w+', dtype=float,
+                                           shape=get_stored_shape(dimensions, axes_lengths))
+        del output
+
+    points_per_diameter = axes_lengths['length'] * axes_lengths['velocity'] * axes_lengths['g']
+    diameters_per_chunk = max(1, chunk_points // points_per_diameter)
+
+    fluid_axis = SWEEP_DIMENSIONS.index('fluid')
+    diameter_axis = SWEEP_DIMENSIONS.index('diameter')
+
+    for fluid_index, fluid_name in enumerate(fluid_names):
+        for start in range(0, axes_lengths['diameter'], diameters_per_chunk):
+            stop = min(start + diameters_per_chunk, axes_lengths['diameter'])
+
+            chunk = sweep_values({fluid_name: fluids_values[fluid_name]}, lengths=axes['length'],
+                                 diameters=axes['diameter'][start:stop], velocities=axes['velocity'],
+                                 gravities=axes['g'])
+
+            index = [slice(None)] * len(SWEEP_DIMENSIONS)
+            index[fluid_axis] = slice(fluid_index, fluid_index + 1)
+            index[diameter_axis] = slice(start, stop)
+
+            for quantity, path_to_file in paths_to_files.items():
+                # The files are mapped again for every chunk, unmapping them afterwards releases the pages
+                # that were written, otherwise they would all stay in memory until the end
+                output = np.load(path_to_file, mmap_mode='r+')
+                output[tuple(index)] = chunk.data[quantity]
+                output.flush()
+                del output
+
+            del chunk
+
+    metadata['complete'] = True
+    _write_metadata(directory, metadata)
+
+    return open_memmap_sweep(directory)
+
+
+def _write_metadata(directory: str, metadata: dict):
+    with open(os.path.join(directory, METADATA_FILE_NAME), 'w') as file:
+        json.dump(metadata, file)
+
+
+def open_memmap_sweep(directory: str, mode: str = 'r') -> SweepResult:
+    """
+    This would open a sweep written by run_memmap_sweep without copying it into memory.
+    """
+    with open(os.path.join(directory, METADATA_FILE_NAME)) as file:
+        metadata = json.load(file)
+
+    if not metadata['complete']:
+        raise ValueError(f'The sweep in {directory} was not finished')
+
+    coords = {'fluid': metadata['fluids']}
+    for dim in SWEEP_DIMENSIONS[1:]:
+        coords[dim] = np.load(os.path.join(directory, f'coords_{dim}.npy'))
+
+    axes_lengths = {dim: len(values) for dim, values in coords.items()}
+
+    data = {quantity: np.load(os.path.join(directory, f'{quantity}.npy'), mmap_mode=mode)
+            for quantity in FLUID_QUANTITIES_DIMENSIONS}
+    data['length'] = coords['length'].reshape(get_stored_shape(('length',), axes_lengths))
+    data['velocity'] = coords['velocity'].reshape(get_stored_shape(('velocity',), axes_lengths))
+    data['diameter'] = coords['diameter'].reshape(get_stored_shape(('diameter',), axes_lengths))
+
+    return SweepResult(SWEEP_DIMENSIONS, coords, data)
@@ -0,0 +1,149 @@
+"""
+Parallel version of sweep.sweep_values.
+
+The sweep is split into chunks along its largest axis (the fluids, the lengths, the diameters, the velocities or
+the gravities, whichever has the most values) and each chunk is handed to a worker in a process pool,
+so a few fluids over a dense grid are spread over the workers as well as many fluids over a small one.
+The workers write straight into shared memory buffers that hold the whole result,
+so nothing has to be pickled back to the main process, and the result is a view of those buffers
+rather than a copy of them. The buffers are freed once nothing uses the result any more.
+Every point is calculated with the same functions as the serial path, so the result is the same
+whatever the number of workers or the chunk size.
+"""
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from sweep import SWEEP_DIMENSIONS, FLUID_QUANTITIES_DIMENSIONS, SweepResult, resolve_sweep_axes, get_stored_shape, \
+    sweep_values
+
+CHUNKS_PER_WORKER = 4  # More chunks than workers, so a worker that finishes early takes another one
+
+
+class _SharedArray:
+    """
+    This would keep a shared memory block open for as long as an array made from it with np.asarray is used.
+    The array only refers to the block through this object, so closing the block never finds it still exported.
+    """
+
+    def __init__(self, memory: shared_memory.SharedMemory, shape: tuple):
+        self.memory = memory
+        address = np.frombuffer(memory.buf, dtype=np.uint8).ctypes.data
+        self.__array_interface__ = {'shape': shape, 'typestr': np.dtype(float).str, 'data': (address, False),
+                                    'version': 3}
+
+
+def get_chunk_dimension(axes_lengths: dict) -> str:
+    # The dimension with the most values, the first one in SWEEP_DIMENSIONS when some have as many
+    return max(SWEEP_DIMENSIONS, key=lambda dim: axes_lengths[dim])
+
+
+def _compute_chunk(buffers: dict, fluids_values: dict, axes: dict, dimension: str, start: int):
+    """
+    This runs in a worker process, it calculates the values from start along dimension that are in axes
+    (and fluids_values) and writes them to the shared buffers.
+    The quantities that do not depend on dimension come out the same in every chunk, only the first one writes them.
+    """
+    result = sweep_values(fluids_values, lengths=axes['length'], diameters=axes['diameter'],
+                          velocities=axes['velocity'], gravities=axes['g'])
+    stop = start + result.shape[SWEEP_DIMENSIONS.index(dimension)]
+
+    chunk_index = [slice(None)] * len(SWEEP_DIMENSIONS)
+    chunk_index[SWEEP_DIMENSIONS.index(dimension)] = slice(start, stop)
+
+    for quantity, (name, shape) in buffers.items():
+        if dimension in FLUID_QUANTITIES_DIMENSIONS[quantity]:
+            index = tuple(chunk_index)
+        elif start == 0:
+            index = ...
+        else:
+            continue
+
+        memory = shared_memory.SharedMemory(name=name)
+
+        try:
+            output = np.ndarray(shape, dtype=float, buffer=memory.buf)
+            output[index] = result.data[quantity]
+            del output
+        finally:
+            memory.close()
+
+
+def sweep_values_parallel(fluids_values: dict, lengths=None, diameters=None, velocities=None, gravities=None,
+                          workers: int = None, chunk_size: int = None) -> SweepResult:
+    """
+    This takes the same arguments as sweep.sweep_values and gives back the same SweepResult.
+
+    workers is the number of processes, it defaults to the number of CPUs.
+    chunk_size is the number of values of the largest axis (see get_chunk_dimension) each worker calculates
+    at a time, by default the axis is split into CHUNKS_PER_WORKER chunks for each worker.
+    """
+    axes = resolve_sweep_axes(lengths, diameters, velocities, gravities)
+
+    workers = os.cpu_count() if workers is None else workers
+
+    if workers <= 1:
+        return sweep_values(fluids_values, lengths=axes['length'], diameters=axes['diameter'],
+                            velocities=axes['velocity'], gravities=axes['g'])
+
+    fluid_names = list(fluids_values.keys())
+    axes_lengths = {dim: len(values) for dim, values in axes.items()}
+    axes_lengths['fluid'] = len(fluid_names)
+
+    dimension = get_chunk_dimension(axes_lengths)
+    if chunk_size is None:
+        chunk_size = max(math.ceil(axes_lengths[dimension] / (workers * CHUNKS_PER_WORKER)), 1)
+
+    assert chunk_size > 0
+
+    memories = {}
+    buffers = {}
+
+    try:
+        for quantity, dimensions in FLUID_QUANTITIES_DIMENSIONS.items():
+            shape = get_stored_shape(dimensions, axes_lengths)
+            memory = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * 8, 1))
+            memories[quantity] = memory
+            buffers[quantity] = (memory.name, shape)
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = []
+
+            for start in range(0, axes_lengths[dimension], chunk_size):
+                chunk_fluids_values = fluids_values
+                chunk_axes = dict(axes)
+
+                if dimension == 'fluid':
+                    chunk_fluids_values = {name: fluids_values[name] for name in fluid_names[start:start + chunk_size]}
+                else:
+                    chunk_axes[dimension] = axes[dimension][start:start + chunk_size]
+
+                futures.append(executor.submit(_compute_chunk, buffers, chunk_fluids_values, chunk_axes, dimension,
+                                               start))
+
+            for future in futures:
+                # Raise any error that happened in a worker
+                future.result()
+    except BaseException:
+        for memory in memories.values():
+            memory.close()
+            memory.unlink()
+        raise
+
+    data = {}
+    for quantity, memory in memories.items():
+        # The name is not needed any more, the block itself lives on until the arrays are let go
+        memory.unlink()
+        data[quantity] = np.asarray(_SharedArray(memory, buffers[quantity][1]))
+
+    data['length'] = axes['length'].reshape(get_stored_shape(('length',), axes_lengths))
+    data['velocity'] = axes['velocity'].reshape(get_stored_shape(('velocity',), axes_lengths))
+    data['diameter'] = axes['diameter'].reshape(get_stored_shape(('diameter',), axes_lengths))
+
+    coords = {'fluid': fluid_names}
+    coords.update(axes)
+
+    return SweepResult(SWEEP_DIMENSIONS, coords, data)
@@ -0,0 +1,141 @@
+"""
+Fluids and pipes prepared for evaluating many points.
+
+Most of what goes into a point only depends on the fluid (the prandtl number and Pr ** 0.4, density / viscosity,
+-density * g) or only on the pipe (1 / diameter and the roughness term of the turbulent correlation).
+PreparedFluid and PreparedGeometry work those out once, so evaluating a sweep only does the work that really
+depends on the point: the reynolds number, the frictional factor and the head loss.
+
+    water = PreparedFluid(4187, 0.000895, 1000, 9.81)
+    pipes = PreparedGeometry(diameters)
+    values = water.get_values(lengths, pipes, velocities)
+
+A PreparedGeometry can be shared by every fluid that is evaluated on the same diameters.
+The properties can also be arrays, with one fluid along the first axis like vectorized.get_values_for_fluids.
+The results match the scalar functions in calculations.py to vectorized.RESULT_TOLERANCE.
+"""
+import numpy as np
+
+from calculations import PIPE_ROUGHNESS, THERMAL_CONDUCTIVITY, LENGTHS, DIAMETERS, VELOCITY
+
+LAMINAR_REYNOLDS_NUMBER_LIMIT = 2000
+
+
+def _get_power_of_two(values: np.ndarray, number_of_squares: int) -> np.ndarray:
+    # values ** (2 ** number_of_squares)
+    for _ in range(number_of_squares):
+        values = values * values
+
+    return values
+
+
+class PreparedGeometry:
+    """
+    The terms of the correlations that only depend on the diameter of the pipe.
+    """
+
+    def __init__(self, diameters, pipe_roughness: float = PIPE_ROUGHNESS):
+        self.diameters = np.asarray(diameters, dtype=float)
+        self.pipe_roughness = pipe_roughness
+        self.inverse_diameters = 1 / self.diameters
+        # The first term in the logarithm of the turbulent correlation, 0.27 * roughness / diameter
+        self.roughness_terms = 0.27 * pipe_roughness * self.inverse_diameters
+
+
+class PreparedFluid:
+    """
+    The terms of the correlations that only depend on the fluid and the gravity.
+    """
+
+    def __init__(self, specific_heat_capacity: float, dynamic_viscosity: float, density: float, g: float,
+                 conductivity: float = THERMAL_CONDUCTIVITY):
+        self.specific_heat_capacity = specific_heat_capacity
+        self.dynamic_viscosity = dynamic_viscosity
+        self.density = density
+        self.g = g
+
+        # reynolds number = density * diameter * velocity / viscosity
+        self.density_over_viscosity = np.divide(density, dynamic_viscosity)
+        self.prandtl_number = np.divide(np.multiply(dynamic_viscosity, specific_heat_capacity), conductivity)
+        # heat transfer coefficient = 0.023 * Re ** 0.8 * Pr ** 0.4 * conductivity / diameter
+        self.heat_transfer_factor = 0.023 * self.prandtl_number ** 0.4 * conductivity
+        # head loss = frictional factor * length * velocity ** 2 / (2 * g * diameter)
+        self.head_loss_factor = np.divide(1, np.multiply(2, g))
+        self.pressure_factor = np.negative(np.multiply(density, g))
+
+    def get_reynolds_numbers(self, geometry: PreparedGeometry, velocities) -> np.ndarray:
+        return self.density_over_viscosity * (geometry.diameters * velocities)
+
+    @staticmethod
+    def get_frictional_factors(reynold_numbers, geometry: PreparedGeometry, backend: str = None) -> np.ndarray:
+        """
+        The same as kernels.get_frictional_factors, with the diameter terms taken from geometry
+        when the numpy backend is used.
+        """
+        # kernels imports vectorized, which imports this module
+        import kernels
+
+        if (backend or kernels.get_kernel_backend()) == 'numba':
+            return kernels.get_frictional_factors(reynold_numbers, geometry.pipe_roughness, geometry.diameters,
+                                                  backend=backend)
+
+        reynold_numbers, roughness_terms = np.broadcast_arrays(reynold_numbers, geometry.roughness_terms)
+
+        is_laminar = reynold_numbers < LAMINAR_REYNOLDS_NUMBER_LIMIT
+
+        frictional_factors = np.empty(reynold_numbers.shape)
+        frictional_factors[is_laminar] = 64 / reynold_numbers[is_laminar]
+
+        # One division for every turbulent point instead of one for each term
+        inverse_reynold_numbers = 1 / reynold_numbers[~is_laminar]
+
+        # The 12th and 16th powers are taken by squaring, np.power is a lot slower on the negative logarithm
+        laminar_terms = _get_power_of_two((8 * inverse_reynold_numbers) ** 3, 2)
+        logarithm_terms = _get_power_of_two(
+            2.457 * np.log(roughness_terms[~is_laminar] + (7 * inverse_reynold_numbers) ** 0.9), 4)
+        turbulent_terms = _get_power_of_two(37530 * inverse_reynold_numbers, 4)
+
+        frictional_factors[~is_laminar] = 2 * (laminar_terms + (logarithm_terms + turbulent_terms) ** (-3 / 2)) ** (
+                1 / 12)
+
+        return frictional_factors
+
+    def get_values(self, lengths=None, geometry: PreparedGeometry = None, velocities=None) -> dict:
+        """
+        This returns the same dictionary as vectorized.get_values_array for the points of
+        lengths, geometry and velocities (LENGTHS, DIAMETERS and VELOCITY by default), broadcast together.
+        """
+        geometry = PreparedGeometry(DIAMETERS) if geometry is None else geometry
+        lengths = np.asarray(LENGTHS if lengths is None else lengths, dtype=float)
+        velocities = np.asarray(VELOCITY if velocities is None else velocities, dtype=float)
+
+        reynold_numbers = self.get_reynolds_numbers(geometry, velocities)
+        frictional_factors = self.get_frictional_factors(reynold_numbers, geometry)
+
+        head_losses = (frictional_factors * lengths * velocities ** 2 * geometry.inverse_diameters *
+                       self.head_loss_factor)
+        pressures = self.pressure_factor * head_losses
+        coefficients_of_heat_transfer = (self.heat_transfer_factor * reynold_numbers ** 0.8 *
+                                         geometry.inverse_diameters)
+
+        values = {
+            'head_loss': head_losses,
+            'frictional_factor': frictional_factors,
+            'heat_transfer_coefficient': coefficients_of_heat_transfer,
+            'reynolds_number': reynold_numbers,
+            'pressure': pressures,
+            'length': lengths,
+            'velocity': velocities,
+            'diameter': geometry.diameters,
+        }
+
+        # Everything has the shape of all the points, like in get_values_array
+        shape = np.broadcast_shapes(*(value.shape for value in values.values()))
+
+        return {key: value if value.shape == shape else np.broadcast_to(value, shape)
+                for key, value in values.items()}
+
+
+def prepare_fluid(fluid_values: dict, g: float) -> PreparedFluid:
+    # fluid_values is one of the entries of calculations.FLUIDS_VALUES
+    return PreparedFluid(fluid_values['shc'], fluid_values['viscosity'], fluid_values['density'], g)
@@ -0,0 +1,261 @@
+"""
+Properties of the fluids in FLUIDS against temperature.
+
+FLUIDS_VALUES has one shc, density and viscosity for each fluid. PROPERTY_TABLES has them, with the
+saturation pressure, every 20 °C over the range each fluid is usually a liquid in. They are saturated liquid
+values rounded from published saturation tables (bubble point for the R407 blends), good to a few percent:
+fine for comparing fluids like this project does, but check a reference such as CoolProp or REFPROP before
+using them for a design. The properties of a liquid hardly change with pressure, so they only depend on
+the temperature, as long as the pressure is above the saturation pressure (below it the fluid boils).
+
+A natural cubic spline goes through the points of each property (through the logarithm for the viscosity and
+the saturation pressure, which change exponentially), and it is sampled every TABLE_STEP °C into a table the
+first time the property is looked up. Lookups then only interpolate linearly between two neighbours of that
+table, for any number of temperatures in one go, so they cost about the same as a multiplication per point.
+
+    get_fluid_properties('R134a', 40)                  {'shc': ..., 'density': ..., 'viscosity': ...}
+    get_fluids_values(40)                              every fluid, laid out like FLUIDS_VALUES
+    get_values_at_temperatures('Water', temperatures, 9.81)
+"""
+import functools
+
+import numpy as np
+
+from calculations import FLUIDS
+from prepared import PreparedFluid, PreparedGeometry
+
+TABLE_STEP = 0.05  # °C between the points of the interpolation tables
+PROPERTY_COLUMNS = ['saturation_pressure', 'density', 'shc', 'viscosity']
+# These are interpolated through their logarithm
+LOGARITHMIC_PROPERTIES = ['saturation_pressure', 'viscosity']
+
+# fluid_name: rows of (temperature °C, saturation pressure Pa, density kg/m3, shc J/kg.K, viscosity Pa.s)
+PROPERTY_TABLES = {
+    FLUIDS[0]: [  # R407a
+        (-20, 330e3, 1300, 1340, 0.000245),
+        (0, 660e3, 1236, 1400, 0.000200),
+        (20, 1190e3, 1165, 1490, 0.000160),
+        (40, 1970e3, 1087, 1620, 0.000128),
+        (60, 3080e3, 993, 1850, 0.000099),
+    ],
+    FLUIDS[1]: [  # R245fa
+        (-20, 19e3, 1454, 1240, 0.000790),
+        (0, 53e3, 1404, 1270, 0.000574),
+        (20, 123e3, 1352, 1310, 0.000429),
+        (40, 250e3, 1297, 1350, 0.000331),
+        (60, 463e3, 1238, 1400, 0.000258),
+    ],
+    FLUIDS[2]: [  # R1234ze
+        (-20, 97e3, 1300, 1280, 0.000335),
+        (0, 216e3, 1240, 1320, 0.000268),
+        (20, 427e3, 1179, 1370, 0.000213),
+        (40, 767e3, 1111, 1440, 0.000172),
+        (60, 1280e3, 1034, 1540, 0.000138),
+    ],
+    FLUIDS[3]: [  # R1234yf
+        (-20, 151e3, 1232, 1240, 0.000262),
+        (0, 316e3, 1176, 1290, 0.000207),
+        (20, 592e3, 1110, 1370, 0.000163),
+        (40, 1018e3, 1037, 1470, 0.000129),
+        (60, 1642e3, 951, 1630, 0.000100),
+    ],
+    FLUIDS[4]: [  # Water
+        (0, 611, 999.8, 4217, 0.001792),
+        (20, 2339, 998.2, 4182, 0.001002),
+        (40, 7384, 992.2, 4179, 0.000653),
+        (60, 19940, 983.2, 4185, 0.000466),
+        (80, 47390, 971.8, 4197, 0.000355),
+    ],
+    FLUIDS[5]: [  # Ammonia
+        (-20, 190.2e3, 665.1, 4520, 0.000236),
+        (0, 429.4e3, 638.6, 4600, 0.000190),
+        (20, 857.5e3, 610.2, 4740, 0.000152),
+        (40, 1555e3, 579.4, 4960, 0.000121),
+        (60, 2614e3, 545.2, 5280, 0.000097),
+    ],
+    FLUIDS[6]: [  # R134a
+        (-20, 132.7e3, 1358.3, 1293, 0.000333),
+        (0, 292.8e3, 1295.3, 1341, 0.000267),
+        (20, 572.1e3, 1225.3, 1405, 0.000211),
+        (40, 1016.6e3, 1146.7, 1498, 0.000161),
+        (60, 1681.8e3, 1052.9, 1636, 0.000127),
+    ],
+    FLUIDS[7]: [  # Propane
+        (-20, 244.6e3, 554.3, 2340, 0.000150),
+        (0, 474.4e3, 528.6, 2450, 0.000124),
+        (20, 836.5e3, 500.1, 2600, 0.000102),
+        (40, 1369.4e3, 467.5, 2780, 0.000083),
+        (60, 2116e3, 429.2, 3070, 0.000066),
+    ],
+    FLUIDS[8]: [  # R600a
+        (-20, 72e3, 602.0, 2180, 0.000245),
+        (0, 157e3, 580.6, 2290, 0.000196),
+        (20, 302e3, 557.3, 2420, 0.000160),
+        (40, 531e3, 530.8, 2560, 0.000131),
+        (60, 867e3, 503.0, 2730, 0.000108),
+    ],
+    FLUIDS[9]: [  # R407c
+        (-20, 291e3, 1287, 1350, 0.000248),
+        (0, 600e3, 1223, 1410, 0.000203),
+        (20, 1106e3, 1156, 1500, 0.000165),
+        (40, 1852e3, 1081, 1610, 0.000133),
+        (60, 2920e3, 990, 1800, 0.000105),
+    ],
+}
+
+
+def get_spline_second_derivatives(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    This would return the second derivatives of the natural cubic spline through the points (x, y)
+    at every point, they are 0 at both ends.
+    """
+    number_of_points = len(x)
+    steps = np.diff(x)
+
+    # The continuity of the first derivative at every inner point gives a tridiagonal system
+    matrix = np.zeros((number_of_points, number_of_points))
+    right_side = np.zeros(number_of_points)
+    matrix[0, 0] = matrix[-1, -1] = 1
+
+    for index in range(1, number_of_points - 1):
+        matrix[index, index - 1] = steps[index - 1]
+        matrix[index, index] = 2 * (steps[index - 1] + steps[index])
+        matrix[index, index + 1] = steps[index]
+        right_side[index] = 6 * ((y[index + 1] - y[index]) / steps[index] -
+                                 (y[index] - y[index - 1]) / steps[index - 1])
+
+    return np.linalg.solve(matrix, right_side)
+
+
+def evaluate_spline(x: np.ndarray, y: np.ndarray, second_derivatives: np.ndarray, points) -> np.ndarray:
+    points = np.asarray(points, dtype=float)
+    index = np.clip(np.searchsorted(x, points) - 1, 0, len(x) - 2)
+
+    step = x[index + 1] - x[index]
+    after = (points - x[index]) / step
+    before = 1 - after
+
+    return (before * y[index] + after * y[index + 1] +
+            ((before ** 3 - before) * second_derivatives[index] +
+             (after ** 3 - after) * second_derivatives[index + 1]) * step ** 2 / 6)
+
+
+def get_temperature_range(fluid_name: str) -> (float, float):
+    rows = _get_rows(fluid_name)
+
+    return rows[0][0], rows[-1][0]
+
+
+def _get_rows(fluid_name: str) -> list:
+    if fluid_name not in PROPERTY_TABLES:
+        raise ValueError(f'There is no property table for {fluid_name}, '
+                         f'there are tables for {", ".join(PROPERTY_TABLES)}')
+
+    return PROPERTY_TABLES[fluid_name]
+
+
+@functools.lru_cache(maxsize=None)
+def get_interpolation_table(fluid_name: str, quantity: str) -> (float, np.ndarray):
+    """
+    This would sample the spline of quantity every TABLE_STEP °C over the temperature range of the fluid.
+    It returns the first temperature and the samples, it is only worked out once for each fluid and quantity.
+    """
+    if quantity not in PROPERTY_COLUMNS:
+        raise ValueError(f'Unknown property {quantity}, it should be one of {", ".join(PROPERTY_COLUMNS)}')
+
+    rows = np.array(_get_rows(fluid_name), dtype=float)
+    temperatures = rows[:, 0]
+    values = rows[:, PROPERTY_COLUMNS.index(quantity) + 1]
+
+    if quantity in LOGARITHMIC_PROPERTIES:
+        values = np.log(values)
+
+    number_of_samples = int(round((temperatures[-1] - temperatures[0]) / TABLE_STEP)) + 1
+    samples = evaluate_spline(temperatures, values, get_spline_second_derivatives(temperatures, values),
+                              np.linspace(temperatures[0], temperatures[-1], number_of_samples))
+
+    if quantity in LOGARITHMIC_PROPERTIES:
+        samples = np.exp(samples)
+
+    # The tables are shared by every lookup, so they can not be changed by mistake
+    samples.setflags(write=False)
+
+    return temperatures[0], samples
+
+
+def get_property(fluid_name: str, quantity: str, temperatures):
+    """
+    This would look quantity up at temperatures (°C), a number or an array of any shape.
+    It raises ValueError for temperatures outside the table of the fluid, or that are not finite.
+    """
+    start, samples = get_interpolation_table(fluid_name, quantity)
+    temperatures = np.asarray(temperatures, dtype=float)
+
+    # NaN is neither below nor above the range, so it has to be caught on its own
+    if not np.all(np.isfinite(temperatures)):
+        raise ValueError(f'The temperatures to look up in the table of {fluid_name} have to be finite numbers')
+
+    minimum_temperature, maximum_temperature = get_temperature_range(fluid_name)
+    if np.any(temperatures < minimum_temperature) or np.any(temperatures > maximum_temperature):
+        raise ValueError(f'The table of {fluid_name} goes from {minimum_temperature} to {maximum_temperature} °C')
+
+    positions = (temperatures - start) / TABLE_STEP
+    index = np.clip(positions.astype(int), 0, len(samples) - 2)
+    fraction = positions - index
+
+    values = samples[index] + fraction * (samples[index + 1] - samples[index])
+
+    return float(values) if values.ndim == 0 else values
+
+
+def get_saturation_pressure(fluid_name: str, temperatures):
+    return get_property(fluid_name, 'saturation_pressure', temperatures)
+
+
+def get_fluid_properties(fluid_name: str, temperature, pressure: float = None) -> dict:
+    """
+    This would return the properties of the fluid at temperature (°C), laid out like an entry of FLUIDS_VALUES.
+    When the pressure (Pa) is given it is checked to be high enough for the fluid to be a liquid.
+    """
+    if pressure is not None and np.any(pressure < get_saturation_pressure(fluid_name, temperature)):
+        raise ValueError(f'{fluid_name} boils at {temperature} °C below '
+                         f'{np.max(get_saturation_pressure(fluid_name, temperature)):.0f} Pa, '
+                         f'the tables are for the liquid')
+
+    return {quantity: get_property(fluid_name, quantity, temperature) for quantity in ['shc', 'density', 'viscosity']}
+
+
+def get_fluids_values(temperature: float, fluid_names: list = None) -> dict:
+    """
+    This would return the properties of every fluid in fluid_names (all of PROPERTY_TABLES by default)
+    at temperature, laid out like FLUIDS_VALUES so it can be used anywhere FLUIDS_VALUES is.
+    """
+    fluid_names = list(PROPERTY_TABLES) if fluid_names is None else fluid_names
+
+    return {fluid_name: get_fluid_properties(fluid_name, temperature) for fluid_name in fluid_names}
+
+
+def get_values_at_temperatures(fluid_name: str, temperatures, g: float, lengths=None, diameters=None,
+                               velocities=None) -> dict:
+    """
+    This would calculate the values of a fluid at every temperature in one go.
+    The returned arrays are like the ones of vectorized.get_values_array, with the temperatures
+    on an extra first axis.
+    """
+    temperatures = np.asarray(temperatures, dtype=float).ravel()
+    properties = get_fluid_properties(fluid_name, temperatures)
+
+    points_shape = np.broadcast_shapes(*(np.shape(axis) for axis in [lengths, diameters, velocities]
+                                         if axis is not None))
+    # The temperatures go on their own axis so they broadcast against the points
+    temperatures_shape = (len(temperatures),) + (1,) * max(len(points_shape), 1)
+
+    fluid = PreparedFluid(properties['shc'].reshape(temperatures_shape),
+                          properties['viscosity'].reshape(temperatures_shape),
+                          properties['density'].reshape(temperatures_shape), g)
+    geometry = None if diameters is None else PreparedGeometry(diameters)
+
+    values = fluid.get_values(lengths, geometry, velocities)
+    values['temperature'] = temperatures
+
+    return values
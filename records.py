@@ -0,0 +1,162 @@
+"""
+Compact records for fluids and their results.
+
+FluidData holds the properties of one fluid in __slots__, so it has no instance dictionary
+(the desktop apps keep one for every fluid they show). FLUID_PROPERTIES_DTYPE of vectorized.py
+is the same record as a row of a structured array, get_fluids_table turns a list of FluidData into one.
+
+ResultTable keeps the results of many fluids in a single float array, laid out as
+(fluid, column, points...), with the names of the fluids and the columns next to it.
+The results of ten thousand fluids at ten points take 10000 * 8 columns * 10 points * 8 bytes = 6.4 MB,
+where a dictionary of python lists for each fluid would box every value.
+Being one array, a table is pickled (to send it to another process) as a single buffer,
+batch.py hands the results of a job around as one ResultTable for each env type for that reason.
+"""
+import numpy as np
+
+from vectorized import FLUID_PROPERTIES_DTYPE, check_fluid_names, get_values_for_fluids
+
+# The columns of a ResultTable by default, in the order get_values_array returns them
+RESULT_TABLE_COLUMNS = ['head_loss', 'frictional_factor', 'heat_transfer_coefficient', 'reynolds_number', 'pressure',
+                        'length', 'velocity', 'diameter']
+
+
+class FluidData:
+    """
+    The name and properties of one fluid, with the same keys as an entry of calculations.FLUIDS_VALUES.
+    """
+    __slots__ = ('name', 'density', 'shc', 'viscosity')
+
+    def __init__(self, name: str, density: float = 0, shc: float = 0, viscosity: float = 0):
+        self.name = name
+        self.density = density
+        self.shc = shc
+        self.viscosity = viscosity
+
+    def __repr__(self) -> str:
+        return f'FluidData({self.name!r}, density={self.density}, shc={self.shc}, viscosity={self.viscosity})'
+
+    def is_valid(self) -> bool:
+        return len(self.name) > 0 and self.density > 0 and self.shc > 0 and self.viscosity > 0
+
+    def get_properties(self) -> dict:
+        # The properties laid out like an entry of calculations.FLUIDS_VALUES
+        return {'shc': self.shc, 'density': self.density, 'viscosity': self.viscosity}
+
+    @classmethod
+    def from_properties(cls, name: str, properties: dict):
+        return cls(name, density=properties['density'], shc=properties['shc'], viscosity=properties['viscosity'])
+
+
+def get_fluids_table(fluids: list) -> np.ndarray:
+    """
+    This would put a list of FluidData into a structured array with FLUID_PROPERTIES_DTYPE,
+    which vectorized.get_values_for_fluids takes as it is.
+    It raises ValueError for names that do not fit in it.
+    """
+    check_fluid_names([fluid.name for fluid in fluids])
+    table = np.empty(len(fluids), dtype=FLUID_PROPERTIES_DTYPE)
+
+    for index, fluid in enumerate(fluids):
+        table[index] = (fluid.name, fluid.shc, fluid.density, fluid.viscosity)
+
+    return table
+
+
+class ResultTable:
+    """
+    The results of many fluids in one array, values[fluid, column, points...].
+
+    table['head_loss'] gives the head losses of every fluid, table.get_fluid('Water') gives the columns
+    of one fluid like test.get_values does. Both are views into values, nothing is copied.
+    """
+    __slots__ = ('fluids', 'columns', 'values', '_fluid_indices', '_column_indices')
+
+    def __init__(self, fluids: list, columns: list, values: np.ndarray):
+        values = np.ascontiguousarray(values, dtype=float)
+        assert values.shape[:2] == (len(fluids), len(columns))
+
+        self.fluids = [str(fluid) for fluid in fluids]
+        self.columns = list(columns)
+        self.values = values
+        self._fluid_indices = {fluid: index for index, fluid in enumerate(self.fluids)}
+        self._column_indices = {column: index for index, column in enumerate(self.columns)}
+
+    def __len__(self) -> int:
+        return len(self.fluids)
+
+    def __contains__(self, fluid_name: str) -> bool:
+        return fluid_name in self._fluid_indices
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.values[:, self._column_indices[column]]
+
+    def __getstate__(self):
+        return self.fluids, self.columns, self.values
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    @property
+    def points_shape(self) -> tuple:
+        return self.values.shape[2:]
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes
+
+    def get_fluid(self, fluid_name: str) -> dict:
+        """
+        This would return {column: values} of one fluid, it can go straight into test.create_excel_sheet.
+        """
+        fluid_values = self.values[self._fluid_indices[fluid_name]]
+
+        return {column: fluid_values[index] for index, column in enumerate(self.columns)}
+
+    def get_fluid_table(self, fluid_name: str):
+        # A table of only one fluid that is a view into values, so just its rows are pickled
+        index = self._fluid_indices[fluid_name]
+
+        return ResultTable([fluid_name], self.columns, self.values[index:index + 1])
+
+    def to_tables(self) -> dict:
+        # {fluid_name: {column: values}}, the layout result_cache.get_cached_values_for_fluids returns
+        return {fluid_name: self.get_fluid(fluid_name) for fluid_name in self.fluids}
+
+    @classmethod
+    def from_stacked_values(cls, stacked_values: dict, columns: list = None):
+        """
+        This would make a table from the result of vectorized.get_values_for_fluids.
+        """
+        columns = RESULT_TABLE_COLUMNS if columns is None else columns
+        values = np.stack([stacked_values[column] for column in columns], axis=1)
+
+        return cls(list(stacked_values['fluid']), columns, values)
+
+    @classmethod
+    def from_tables(cls, fluids_tables: dict, columns: list = None):
+        """
+        This would make a table from {fluid_name: {column: values}}, every fluid has to have the same points.
+        """
+        if len(fluids_tables) == 0:
+            # There would be nothing to take the columns and the shape of the points from
+            raise ValueError('A table needs at least one fluid')
+
+        columns = list(next(iter(fluids_tables.values())).keys()) if columns is None else columns
+        values = np.array([[np.asarray(fluid_values[column], dtype=float) for column in columns]
+                           for fluid_values in fluids_tables.values()], dtype=float)
+
+        return cls(list(fluids_tables.keys()), columns, values)
+
+
+def get_result_table(fluids, g: float, lengths=None, diameters=None, velocities=None) -> ResultTable:
+    """
+    This would calculate a ResultTable for fluids, a list of FluidData, a structured array with
+    FLUID_PROPERTIES_DTYPE or a dictionary laid out like calculations.FLUIDS_VALUES.
+    """
+    if isinstance(fluids, list):
+        # Through a dictionary, so the names are kept whatever their length
+        fluids = {fluid.name: fluid.get_properties() for fluid in fluids}
+
+    return ResultTable.from_stacked_values(get_values_for_fluids(fluids, g, lengths=lengths, diameters=diameters,
+                                                                 velocities=velocities))
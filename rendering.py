@@ -0,0 +1,162 @@
+"""
+Headless rendering of the graphs in GRAPH_DETAILS to image files, on the Agg backend.
+
+Every (graph, env type) figure is saved to "{directory}/generated/images/{env_type}",
+as "{y_axis} against {x_axis}_{env_type}.{format}" like the images already there.
+
+Big sweeps are decimated to the pixels of the axes first (see decimation.py): lines to the pixel columns,
+and points drawn as markers to one point for each pixel they are drawn at.
+The figures are drawn on a FigureTemplate: the figure, its axes and one line per fluid are built once
+(in each worker process) and only the data, labels and title change from one graph to the next.
+With more than one worker the figures are rendered in separate processes, each with its own template.
+
+pyplot is never used, so nothing here opens a window or needs a display.
+"""
+import os
+
+from calculations import GRAPH_DETAILS
+from decimation import decimate, decimate_points, get_number_of_buckets
+from instrumentation import stage, count
+
+IMAGE_FORMATS = ['png', 'svg', 'pdf']
+FIGURE_SIZE = (8, 6)
+COLORS = ['r', 'g', 'b', 'c', 'm', 'y', 'k', 'pink', 'chartreuse', 'burlywood']
+DEFAULT_LINE_STYLE = {'linestyle': '-', 'marker': 'None', 'markersize': 6}
+NO_LINE_STYLES = ['None', 'none', '', ' ']  # The points are drawn as markers on their own
+
+# The template of the current process, made the first time something is rendered
+_figure_template = None
+
+
+class FigureTemplate:
+    """
+    A figure with one axes that is drawn again for every graph instead of being made from scratch.
+    """
+
+    def __init__(self, figure_size: tuple = FIGURE_SIZE):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self.figure = Figure(figsize=figure_size)
+        FigureCanvasAgg(self.figure)
+        self.axes = self.figure.add_subplot()
+        self.lines = []
+        # The labels and line style the legend was made with, its handles copy the style of the lines
+        self.legend_key = None
+
+    def set_fluids(self, fluid_names: list):
+        # Lines are only added or removed when the number of fluids changes
+        while len(self.lines) < len(fluid_names):
+            line, = self.axes.plot([], [], color=COLORS[len(self.lines) % len(COLORS)])
+            self.lines.append(line)
+
+        while len(self.lines) > len(fluid_names):
+            self.lines.pop().remove()
+
+    def set_legend(self, fluid_names: list, style: dict):
+        # Made again only when the fluids or the style of the lines change
+        legend_key = (list(fluid_names), sorted(style.items()))
+
+        if self.legend_key != legend_key:
+            self.legend_key = legend_key
+            self.axes.legend(self.lines, list(fluid_names))
+
+    def render(self, path_to_file: str, fluids_columns: dict, y_axis: str, x_axis: str, line_style: dict = None):
+        """
+        This would draw a graph of y_axis against x_axis for every fluid and save it to path_to_file,
+        the format is taken from the extension.
+        fluids_columns is {fluid_name: {x_axis: values, y_axis: values}}.
+        """
+        style = dict(DEFAULT_LINE_STYLE)
+        style.update(line_style or {})
+
+        self.set_fluids(list(fluids_columns.keys()))
+        is_markers = style['linestyle'] in NO_LINE_STYLES
+
+        for line, columns in zip(self.lines, fluids_columns.values()):
+            if is_markers:
+                # Decimated below, once the limits are known
+                line.set_data(columns[x_axis], columns[y_axis])
+            else:
+                # A file can not show more points than its pixels either
+                line.set_data(*decimate(columns[x_axis], columns[y_axis], get_number_of_buckets(self.axes)))
+
+            line.set(**style)
+
+        # After the style is set, so the legend shows the lines as they are drawn
+        self.set_legend(list(fluids_columns.keys()), style)
+
+        self.axes.set_xlabel(x_axis)
+        self.axes.set_ylabel(y_axis)
+        self.axes.set_title(f'graph of {y_axis} against {x_axis}')
+        self.axes.relim()
+        self.axes.autoscale_view()
+
+        if is_markers:
+            # Only one point is kept for each pixel the markers are drawn at
+            for line, columns in zip(self.lines, fluids_columns.values()):
+                line.set_data(*decimate_points(columns[x_axis], columns[y_axis], self.axes.transData))
+
+        self.figure.savefig(path_to_file)
+
+
+def get_image_path(env_type: str, y_axis: str, x_axis: str, image_format: str = 'png', directory: str = '') -> str:
+    directory_to_save_file = os.path.join(directory or os.getcwd(), 'generated', 'images', env_type)
+
+    if not os.path.exists(directory_to_save_file):
+        os.makedirs(directory_to_save_file, exist_ok=True)
+
+    return os.path.join(directory_to_save_file, f'{y_axis} against {x_axis}_{env_type}.{image_format}')
+
+
+def _render_figure(path_to_file: str, fluids_columns: dict, y_axis: str, x_axis: str, line_style: dict = None) -> str:
+    global _figure_template
+
+    if _figure_template is None:
+        _figure_template = FigureTemplate()
+
+    _figure_template.render(path_to_file, fluids_columns, y_axis, x_axis, line_style)
+
+    return path_to_file
+
+
+def render_figures(fluids_tables_by_env: dict, image_format: str = 'png', directory: str = '', workers: int = 1,
+                   line_style: dict = None, graph_details: list = None) -> list:
+    """
+    This would render every graph in graph_details (GRAPH_DETAILS by default) for every env type.
+    fluids_tables_by_env is laid out like
+    {
+        env_type: {
+            fluid_name: {head_loss: [], reynolds_number: [], ...}
+        }
+    }
+    With more than one worker the figures are rendered in that many processes.
+    It returns the paths of the images, in the order of the env types and then the graphs.
+    """
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f'Unknown image format {image_format}, it should be one of {", ".join(IMAGE_FORMATS)}')
+
+    graph_details = GRAPH_DETAILS if graph_details is None else graph_details
+    renders = []
+
+    for env_type, fluids_tables in fluids_tables_by_env.items():
+        for y_axis, x_axis in graph_details:
+            # Only the two columns the graph needs are sent to the workers
+            fluids_columns = {fluid_name: {x_axis: fluid_values[x_axis], y_axis: fluid_values[y_axis]}
+                              for fluid_name, fluid_values in fluids_tables.items()}
+
+            renders.append((get_image_path(env_type, y_axis, x_axis, image_format, directory), fluids_columns,
+                            y_axis, x_axis, line_style))
+
+    count('figures_drawn', len(renders))
+
+    with stage('render_figures'):
+        if workers <= 1 or len(renders) <= 1:
+            return [_render_figure(*render) for render in renders]
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(renders))) as executor:
+            futures = [executor.submit(_render_figure, *render) for render in renders]
+
+            return [future.result() for future in futures]
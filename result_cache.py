@@ -0,0 +1,180 @@
+"""
+In memory cache of the values calculated for each fluid.
+
+The results are kept in a bounded LRU cache keyed on (shc, viscosity, density, g, grid id),
+the grid id identifies the lengths, diameters and velocities the values were calculated on.
+RESULT_CACHE is shared by test.py and the desktop apps so a fluid whose values did not change is
+never calculated twice.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from calculations import LENGTHS, DIAMETERS, VELOCITY
+from disk_cache import get_disk_cache, get_cache_key
+from instrumentation import stage, count
+from vectorized import get_values_for_fluids, split_values_by_fluid
+
+DEFAULT_MAX_SIZE = 256
+
+
+def get_grid_id(lengths=None, diameters=None, velocities=None) -> str:
+    """
+    This would return an id for a grid of points, grids with the same values get the same id.
+    """
+    digest = hashlib.sha1()
+
+    for values in (LENGTHS if lengths is None else lengths, DIAMETERS if diameters is None else diameters,
+                   VELOCITY if velocities is None else velocities):
+        values = np.ascontiguousarray(values, dtype=float)
+        digest.update(str(values.shape).encode())
+        digest.update(values.tobytes())
+
+    return digest.hexdigest()
+
+
+def get_owned_values(values: dict) -> dict:
+    """
+    This would copy the arrays in values that are views into another array, like the rows of a stacked batch.
+    A cached view keeps the whole array it came from in memory, so the size of the cache would not bound it.
+    """
+    return {key: np.array(value) if isinstance(value, np.ndarray) and value.base is not None else value
+            for key, value in values.items()}
+
+
+class ResultCache:
+    """
+    A least recently used cache with hit and miss counters.
+    When it is full the entry that was used last the longest time ago is dropped.
+    It can be used from more than one thread, the realtime app calculates on a worker thread.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE):
+        assert max_size > 0
+
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self._entries
+
+    @staticmethod
+    def get_key(specific_heat_capacity: float, dynamic_viscosity: float, density: float, g: float,
+                grid_id: str) -> tuple:
+        return float(specific_heat_capacity), float(dynamic_viscosity), float(density), float(g), grid_id
+
+    def get(self, key: tuple):
+        # This would return None when the key is not in the cache
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+
+            return self._entries[key]
+
+    def put(self, key: tuple, values: dict):
+        values = get_owned_values(values)
+
+        with self._lock:
+            self._entries[key] = values
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, specific_heat_capacity: float = None, dynamic_viscosity: float = None,
+                   density: float = None, g: float = None, grid_id: str = None) -> int:
+        """
+        This would remove every entry that matches all the given values, with nothing given it clears the cache.
+        It returns the number of entries that were removed.
+        """
+        wanted = (specific_heat_capacity, dynamic_viscosity, density, g, grid_id)
+
+        with self._lock:
+            keys = [key for key in self._entries
+                    if all(value is None or key_value == value for key_value, value in zip(key, wanted))]
+
+            for key in keys:
+                del self._entries[key]
+
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def get_stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'max_size': self.max_size}
+
+
+RESULT_CACHE = ResultCache()
+
+
+def get_cached_values_for_fluids(fluids_values: dict, g: float, lengths=None, diameters=None, velocities=None,
+                                 cache: ResultCache = None) -> dict:
+    """
+    This does the same thing as split_values_by_fluid(get_values_for_fluids(...)),
+    but only the fluids that are not in the cache are calculated, in one batch.
+    The fluids that are not in the memory cache are looked for in the disk cache (disk_cache.get_disk_cache())
+    before they are calculated, so they are not calculated again on the next run either.
+    fluids_values is laid out like test.FLUIDS_VALUES.
+    """
+    cache = RESULT_CACHE if cache is None else cache
+    disk_cache = get_disk_cache()
+    grid_id = get_grid_id(lengths, diameters, velocities)
+
+    fluids_tables = {}
+    missing_fluids = {}
+    missing_keys = {}
+    missing_disk_keys = {}
+
+    for name, fluid_values in fluids_values.items():
+        key = cache.get_key(fluid_values['shc'], fluid_values['viscosity'], fluid_values['density'], g, grid_id)
+        values = cache.get(key)
+
+        if values is None and disk_cache is not None:
+            missing_disk_keys[name] = get_cache_key(fluid_values['shc'], fluid_values['viscosity'],
+                                                    fluid_values['density'], g, lengths, diameters, velocities)
+            values = disk_cache.get(missing_disk_keys[name])
+
+            if values is not None:
+                cache.put(key, values)
+
+        if values is None:
+            missing_fluids[name] = fluid_values
+            missing_keys[name] = key
+        else:
+            fluids_tables[name] = values
+
+    count('fluids_from_cache', len(fluids_tables))
+
+    if len(missing_fluids) > 0:
+        with stage('compute'):
+            calculated = split_values_by_fluid(get_values_for_fluids(missing_fluids, g, lengths=lengths,
+                                                                     diameters=diameters, velocities=velocities))
+
+        for name in missing_fluids:
+            # The rows of the batch are copied, so the batch is freed when this returns
+            values = get_owned_values(calculated[name])
+            count('points_computed', np.size(values['head_loss']))
+            cache.put(missing_keys[name], values)
+            fluids_tables[name] = values
+
+            if disk_cache is not None:
+                disk_cache.put(missing_disk_keys[name], values)
+
+    # Keep the same order as fluids_values
+    return {name: fluids_tables[name] for name in fluids_values}
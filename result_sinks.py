@@ -0,0 +1,334 @@
+"""
+Pluggable places to save the values of a fluid to.
+
+Every sink writes the same columns (RESULT_COLUMNS) and reads them back as a dictionary of arrays:
+    excel: the .xlsx sheets test.create_excel_sheet has always written.
+    npz: a compressed NumPy archive, one array per column.
+    npy: a directory with one .npy file per column, read back memory mapped.
+    parquet and feather: columnar files for other analytics tools, only available when pyarrow is installed.
+
+write_batches takes the batches from streaming.iter_values and writes them as they come in.
+
+openpyxl and pyarrow are only imported when a sink that needs them is used.
+"""
+import abc
+import importlib.util
+import os
+import shutil
+
+import numpy as np
+
+from calculations import LENGTHS
+from streaming import iter_rows
+
+
+def _import_pyarrow():
+    import pyarrow
+    import pyarrow.feather
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    return pyarrow
+
+
+RESULT_COLUMNS = ['length', 'head_loss', 'frictional_factor', 'heat_transfer_coefficient', 'reynolds_number',
+                  'velocity', 'diameter']
+
+
+def get_result_columns(fluid_values: dict, lengths=None) -> dict:
+    """
+    This would return the values of a fluid as flat float arrays in the order of RESULT_COLUMNS.
+    The length is taken from the values when they have one, otherwise from lengths (LENGTHS by default).
+    """
+    lengths = LENGTHS if lengths is None else lengths
+    values = [np.asarray(fluid_values.get('length', lengths), dtype=float)]
+    values += [np.asarray(fluid_values[column], dtype=float) for column in RESULT_COLUMNS[1:]]
+
+    values = np.broadcast_arrays(*values)
+
+    return {column: value.ravel() for column, value in zip(RESULT_COLUMNS, values)}
+
+
+class ResultSink(abc.ABC):
+    """
+    The base of the sinks, write() saves the columns to path_to_file and read() gives them back.
+    A sink that does not define both of them can not be made.
+    """
+    name = ''
+    extension = ''
+
+    def is_available(self) -> bool:
+        return True
+
+    @abc.abstractmethod
+    def write(self, path_to_file: str, columns: dict, title: str = ''):
+        pass
+
+    @abc.abstractmethod
+    def read(self, path_to_file: str) -> dict:
+        pass
+
+    def write_batches(self, path_to_file: str, batches, title: str = '') -> int:
+        """
+        This would write batches of columns, the sinks that can write as the batches come in override it.
+        By default the batches are put together and written in one go.
+        It returns the number of rows written.
+        """
+        batches = [get_result_columns(batch) for batch in batches]
+        columns = {column: np.concatenate([batch[column] for batch in batches]) for column in RESULT_COLUMNS}
+
+        self.write(path_to_file, columns, title=title)
+
+        return len(columns[RESULT_COLUMNS[0]])
+
+
+class ExcelSink(ResultSink):
+    name = 'excel'
+    extension = 'xlsx'
+
+    def write(self, path_to_file: str, columns: dict, title: str = ''):
+        from excel_export import write_excel_sheet
+
+        write_excel_sheet(path_to_file, title or 'Values', columns)
+
+    def read(self, path_to_file: str) -> dict:
+        import openpyxl
+
+        # Long results continue on more sheets, each with the headers on its first row
+        workbook = openpyxl.load_workbook(path_to_file, read_only=True)
+        headers = []
+        rows = []
+
+        for sheet in workbook.worksheets:
+            sheet_rows = sheet.iter_rows(values_only=True)
+            headers = list(next(sheet_rows))
+            rows.extend(sheet_rows)
+
+        workbook.close()
+        values = np.array(rows, dtype=float).reshape(-1, len(headers))
+
+        return {header: values[:, index] for index, header in enumerate(headers)}
+
+    def write_batches(self, path_to_file: str, batches, title: str = '') -> int:
+        import openpyxl
+        from excel_export import append_sheet_rows
+
+        workbook = openpyxl.Workbook(write_only=True)
+
+        number_of_rows = append_sheet_rows(workbook, title or 'Values', RESULT_COLUMNS,
+                                           iter_rows((get_result_columns(batch) for batch in batches),
+                                                     RESULT_COLUMNS))
+        workbook.save(filename=path_to_file)
+
+        return number_of_rows
+
+
+class NpzSink(ResultSink):
+    name = 'npz'
+    extension = 'npz'
+
+    def write(self, path_to_file: str, columns: dict, title: str = ''):
+        with open(path_to_file, 'wb') as file:
+            np.savez_compressed(file, **columns)
+
+    def read(self, path_to_file: str) -> dict:
+        with np.load(path_to_file) as archive:
+            return {column: archive[column] for column in archive.files}
+
+
+class NpySink(ResultSink):
+    """
+    The columns go to a directory, one {column}.npy file each, so they can be opened memory mapped
+    and only the parts that are used are read from disk.
+    """
+    name = 'npy'
+    extension = 'npy'
+
+    def write(self, path_to_file: str, columns: dict, title: str = ''):
+        if not os.path.exists(path_to_file):
+            os.makedirs(path_to_file)
+
+        for column, values in columns.items():
+            output = np.lib.format.open_memmap(os.path.join(path_to_file, f'{column}.npy'), mode='w+',
+                                               dtype=float, shape=np.shape(values))
+            output[...] = values
+            output.flush()
+            del output
+
+    def read(self, path_to_file: str) -> dict:
+        return {column: np.load(os.path.join(path_to_file, f'{column}.npy'), mmap_mode='r')
+                for column in RESULT_COLUMNS if os.path.exists(os.path.join(path_to_file, f'{column}.npy'))}
+
+    def write_batches(self, path_to_file: str, batches, title: str = '') -> int:
+        """
+        The number of rows is not known until the last batch, so the values are appended to raw files first
+        and the .npy header is put in front of them at the end.
+        """
+        if not os.path.exists(path_to_file):
+            os.makedirs(path_to_file)
+
+        paths_to_parts = {column: os.path.join(path_to_file, f'{column}.npy.part') for column in RESULT_COLUMNS}
+        parts = {column: open(path_to_part, 'wb') for column, path_to_part in paths_to_parts.items()}
+        number_of_rows = 0
+
+        try:
+            for batch in batches:
+                batch = get_result_columns(batch)
+
+                for column, part in parts.items():
+                    batch[column].astype('<f8').tofile(part)
+
+                number_of_rows += len(batch[RESULT_COLUMNS[0]])
+        finally:
+            for part in parts.values():
+                part.close()
+
+        for column, path_to_part in paths_to_parts.items():
+            with open(os.path.join(path_to_file, f'{column}.npy'), 'wb') as file, open(path_to_part, 'rb') as part:
+                np.lib.format.write_array_header_1_0(file, {'descr': '<f8', 'fortran_order': False,
+                                                            'shape': (number_of_rows,)})
+                shutil.copyfileobj(part, file)
+
+            os.remove(path_to_part)
+
+        return number_of_rows
+
+
+class ParquetSink(ResultSink):
+    name = 'parquet'
+    extension = 'parquet'
+
+    def is_available(self) -> bool:
+        return importlib.util.find_spec('pyarrow') is not None
+
+    def write(self, path_to_file: str, columns: dict, title: str = ''):
+        pyarrow = _import_pyarrow()
+
+        pyarrow.parquet.write_table(pyarrow.table(columns), path_to_file)
+
+    def read(self, path_to_file: str) -> dict:
+        pyarrow = _import_pyarrow()
+
+        table = pyarrow.parquet.read_table(path_to_file)
+        return {column: table.column(column).to_numpy() for column in table.column_names}
+
+    def write_batches(self, path_to_file: str, batches, title: str = '') -> int:
+        pyarrow = _import_pyarrow()
+
+        writer = None
+        number_of_rows = 0
+
+        try:
+            for batch in batches:
+                table = pyarrow.table(get_result_columns(batch))
+
+                if writer is None:
+                    writer = pyarrow.parquet.ParquetWriter(path_to_file, table.schema)
+
+                writer.write_table(table)
+                number_of_rows += table.num_rows
+        finally:
+            if writer is not None:
+                writer.close()
+
+        return number_of_rows
+
+
+class FeatherSink(ResultSink):
+    name = 'feather'
+    extension = 'feather'
+
+    def is_available(self) -> bool:
+        return importlib.util.find_spec('pyarrow') is not None
+
+    def write(self, path_to_file: str, columns: dict, title: str = ''):
+        pyarrow = _import_pyarrow()
+
+        pyarrow.feather.write_feather(pyarrow.table(columns), path_to_file)
+
+    def read(self, path_to_file: str) -> dict:
+        pyarrow = _import_pyarrow()
+
+        table = pyarrow.feather.read_table(path_to_file, memory_map=True)
+        return {column: table.column(column).to_numpy() for column in table.column_names}
+
+    def write_batches(self, path_to_file: str, batches, title: str = '') -> int:
+        pyarrow = _import_pyarrow()
+
+        # A feather file is an Arrow IPC file, so the batches can be written to it one after the other
+        writer = None
+        number_of_rows = 0
+
+        try:
+            for batch in batches:
+                table = pyarrow.table(get_result_columns(batch))
+
+                if writer is None:
+                    writer = pyarrow.ipc.new_file(path_to_file, table.schema)
+
+                writer.write_table(table)
+                number_of_rows += table.num_rows
+        finally:
+            if writer is not None:
+                writer.close()
+
+        return number_of_rows
+
+
+SINKS = {sink.name: sink for sink in [ExcelSink(), NpzSink(), NpySink(), ParquetSink(), FeatherSink()]}
+
+
+def get_sink(name: str) -> ResultSink:
+    if name not in SINKS:
+        raise ValueError(f'Unknown result sink {name}, it should be one of {", ".join(SINKS)}')
+
+    sink = SINKS[name]
+
+    if not sink.is_available():
+        raise ImportError(f'The {name} result sink needs pyarrow, install it to use it')
+
+    return sink
+
+
+def get_available_sinks() -> list:
+    return [name for name, sink in SINKS.items() if sink.is_available()]
+
+
+def get_result_path(fluid_name: str, env_type: str, sink: ResultSink, directory: str = '') -> str:
+    """
+    The excel sheets keep going to "cwd/generated/excel_sheets/{env_type}",
+    the other sinks go to "cwd/generated/{sink name}/{env_type}".
+    """
+    folder = 'excel_sheets' if sink.name == 'excel' else sink.name
+    directory_to_save_file = os.path.join(directory or os.getcwd(), 'generated', folder, env_type)
+
+    if not os.path.exists(directory_to_save_file):
+        os.makedirs(directory_to_save_file)
+
+    return os.path.join(directory_to_save_file, f'{fluid_name}_{env_type}.{sink.extension}')
+
+
+def save_fluid_values(fluid_values: dict, fluid_name: str, env_type: str, sink_name: str = 'excel',
+                      directory: str = '', lengths=None) -> str:
+    """
+    This would save the values of a fluid with the chosen sink and return where they were saved.
+    """
+    sink = get_sink(sink_name)
+    path_to_file = get_result_path(fluid_name, env_type, sink, directory)
+
+    sink.write(path_to_file, get_result_columns(fluid_values, lengths), title=f'Values for Fluid {fluid_name}')
+
+    return path_to_file
+
+
+def save_fluid_batches(batches, fluid_name: str, env_type: str, sink_name: str = 'excel',
+                       directory: str = '') -> str:
+    """
+    Same as save_fluid_values but for the batches from streaming.iter_values, they are written as they come in.
+    """
+    sink = get_sink(sink_name)
+    path_to_file = get_result_path(fluid_name, env_type, sink, directory)
+
+    sink.write_batches(path_to_file, batches, title=f'Values for Fluid {fluid_name}')
+
+    return path_to_file
@@ -0,0 +1,121 @@
+"""
+Precomputed grids for the sweep sliders of the realtime app.
+
+The graphs show the ten points of LENGTHS, DIAMETERS and VELOCITY. The sliders scale the lengths, diameters
+and velocities of those points (from MIN_SCALE to MAX_SCALE times) and set the gravity, and the lines have to
+follow while a slider is dragged, so nothing can be calculated then.
+
+The reynolds number, frictional factor and heat transfer coefficient depend on the diameter and the velocity,
+so they are calculated once for every diameter and velocity scale on the sliders, for every point,
+with one PreparedFluid for each fluid:
+    values[quantity][fluid, diameter step, velocity step, point]
+The head loss is f * L * v ** 2 / (2 * g * D), so it is kept for a length scale of 1 and g = 1
+and the length scale and gravity are a single multiplication of the ten points of a frame.
+Moving a slider only picks out [:, diameter step, velocity step] of each array.
+get_ranges gives the extent of the lines over every position of a slider, so the axes can stay fixed
+(and only the lines be drawn again) while it is dragged.
+
+The grid of each fluid is kept in SWEEP_GRID_CACHE, so when one fluid is edited only its grid is
+calculated again.
+"""
+import numpy as np
+
+from calculations import LENGTHS, DIAMETERS, VELOCITY, ENV_TYPES_GRAVITY
+from prepared import PreparedFluid, PreparedGeometry
+from result_cache import ResultCache, get_grid_id
+
+SLIDER_STEPS = 41  # Positions on each slider, the middle one is a scale of 1
+MIN_SCALE = 0.25
+MAX_SCALE = 4
+SWEEP_QUANTITIES = ['head_loss', 'frictional_factor', 'heat_transfer_coefficient', 'reynolds_number']
+
+# One entry is the grid of one fluid, about 0.5 MB with the default steps
+SWEEP_GRID_CACHE = ResultCache(max_size=32)
+
+
+def get_scales(steps: int = SLIDER_STEPS) -> np.ndarray:
+    # Evenly spaced on a logarithmic scale, so halving and doubling are as far from the middle
+    return np.geomspace(MIN_SCALE, MAX_SCALE, steps)
+
+
+def get_gravities(steps: int = SLIDER_STEPS) -> np.ndarray:
+    # From the horizontal to the vertical case, the two ends are the values the checkbox uses
+    return np.linspace(ENV_TYPES_GRAVITY['horizontal'], ENV_TYPES_GRAVITY['vertical'], steps)
+
+
+def get_fluid_grid(fluid_values: dict, scales: np.ndarray) -> dict:
+    """
+    This would return {quantity: values[diameter step, velocity step, point]} of one fluid,
+    for a length scale of 1 and g = 1. fluid_values is one of the entries of calculations.FLUIDS_VALUES.
+    """
+    diameters = np.multiply.outer(scales, DIAMETERS)[:, np.newaxis, :]
+    velocities = np.multiply.outer(scales, VELOCITY)[np.newaxis, :, :]
+
+    key = SWEEP_GRID_CACHE.get_key(fluid_values['shc'], fluid_values['viscosity'], fluid_values['density'], 1,
+                                   get_grid_id(LENGTHS, diameters, velocities))
+    grid = SWEEP_GRID_CACHE.get(key)
+
+    if grid is None:
+        fluid = PreparedFluid(fluid_values['shc'], fluid_values['viscosity'], fluid_values['density'], 1)
+        values = fluid.get_values(LENGTHS, PreparedGeometry(diameters), velocities)
+        grid = {quantity: np.ascontiguousarray(values[quantity]) for quantity in SWEEP_QUANTITIES}
+        SWEEP_GRID_CACHE.put(key, grid)
+
+    return grid
+
+
+class SweepGrid:
+    """
+    The grids of some fluids, stacked so a frame of every fluid is one index into each quantity.
+    """
+
+    def __init__(self, fluids_values: dict, steps: int = SLIDER_STEPS):
+        self.fluids = list(fluids_values.keys())
+        self.scales = get_scales(steps)
+        self.gravities = get_gravities(steps)
+
+        grids = [get_fluid_grid(fluid_values, self.scales) for fluid_values in fluids_values.values()]
+        self.values = {quantity: np.stack([grid[quantity] for grid in grids]) if len(grids) > 0 else
+                       np.empty((0, steps, steps, len(LENGTHS))) for quantity in SWEEP_QUANTITIES}
+
+    @property
+    def middle_step(self) -> int:
+        # The position of a scale of 1
+        return len(self.scales) // 2
+
+    def get_gravity_step(self, g: float) -> int:
+        return int(np.argmin(np.abs(self.gravities - g)))
+
+    def get_frame(self, length_step: int, diameter_step: int, velocity_step: int, gravity_step: int) -> dict:
+        """
+        This would return {quantity: values[fluid, point]} for the positions of the sliders,
+        with the same keys as vectorized.get_values_array.
+        """
+        frame = {quantity: self.values[quantity][:, diameter_step, velocity_step] for quantity in SWEEP_QUANTITIES}
+        frame['head_loss'] = frame['head_loss'] * (self.scales[length_step] / self.gravities[gravity_step])
+
+        frame['length'] = np.multiply(LENGTHS, self.scales[length_step])
+        frame['diameter'] = np.multiply(DIAMETERS, self.scales[diameter_step])
+        frame['velocity'] = np.multiply(VELOCITY, self.scales[velocity_step])
+
+        return frame
+
+    def get_ranges(self, steps: list, moving_slider: int) -> dict:
+        """
+        This would return {quantity: (lowest, highest)} over every fluid and every position of one slider,
+        with the other sliders at steps (the positions in the order get_frame takes them).
+        """
+        frames = []
+        for step in range(len(self.scales)):
+            frame_steps = list(steps)
+            frame_steps[moving_slider] = step
+            frames.append(self.get_frame(*frame_steps))
+
+        return {quantity: (min(np.min(frame[quantity]) for frame in frames),
+                           max(np.max(frame[quantity]) for frame in frames)) for quantity in frames[0]}
+
+    def get_fluid_frame(self, frame: dict, fluid_name: str) -> dict:
+        # The values of one fluid in a frame, laid out like test.get_values
+        index = self.fluids.index(fluid_name)
+
+        return {quantity: values[index] if np.ndim(values) == 2 else values for quantity, values in frame.items()}
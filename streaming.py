@@ -0,0 +1,86 @@
+"""
+Streaming version of vectorized.get_values_array.
+
+iter_values yields the values in batches as they are calculated instead of returning them all at the end,
+so whatever consumes them (result_sinks.save_fluid_batches, a StreamedLine) can start before the last point is done,
+and a slow consumer holds the calculation back instead of letting the results pile up in memory.
+
+Each batch is a dictionary with the same keys as get_values_array, every array in it is flat.
+"""
+import numpy as np
+
+from calculations import LENGTHS, DIAMETERS, VELOCITY
+from prepared import PreparedFluid, PreparedGeometry
+
+DEFAULT_BATCH_SIZE = 65536
+
+
+def iter_values(specific_heat_capacity: float, dynamic_viscosity: float, density: float, g: float,
+                lengths=None, diameters=None, velocities=None, batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    This would yield the values of a fluid batch_size points at a time.
+    lengths, diameters and velocities are broadcast together like in get_values_array, and the points
+    come out in the (C) order of the broadcast shape.
+    Only one batch of the inputs and the results is held in memory at a time.
+    """
+    assert batch_size > 0
+
+    lengths = np.asarray(LENGTHS if lengths is None else lengths, dtype=float)
+    diameters = np.asarray(DIAMETERS if diameters is None else diameters, dtype=float)
+    velocities = np.asarray(VELOCITY if velocities is None else velocities, dtype=float)
+
+    # These are views, the full grid is never built
+    lengths, diameters, velocities = np.broadcast_arrays(lengths, diameters, velocities)
+
+    # The terms that only depend on the fluid are worked out once for all the batches
+    fluid = PreparedFluid(specific_heat_capacity, dynamic_viscosity, density, g)
+
+    for start in range(0, lengths.size, batch_size):
+        stop = min(start + batch_size, lengths.size)
+
+        yield fluid.get_values(lengths.flat[start:stop], PreparedGeometry(diameters.flat[start:stop]),
+                               velocities.flat[start:stop])
+
+
+def iter_rows(batches, columns: list):
+    """
+    This would turn batches into rows with the given columns, for writers that take a row at a time.
+    """
+    for batch in batches:
+        yield from zip(*[batch[column].tolist() for column in columns])
+
+
+class StreamedLine:
+    """
+    The values of a matplotlib Line2D that grows as batches come in, so a graph can be drawn before the
+    last batch is calculated. The points go into a buffer that doubles when it is full, so adding a batch
+    only copies that batch and not the whole line again.
+    """
+
+    def __init__(self, line, x_axis: str, y_axis: str, capacity: int = DEFAULT_BATCH_SIZE):
+        self.line = line
+        self.x_axis = x_axis
+        self.y_axis = y_axis
+        self.values = np.empty((2, max(capacity, 1)))  # x on the first row, y on the second
+        self.size = 0
+
+    def extend(self, batch: dict):
+        number_of_points = len(batch[self.x_axis])
+
+        if self.size + number_of_points > self.values.shape[1]:
+            values = np.empty((2, max(2 * self.values.shape[1], self.size + number_of_points)))
+            values[:, :self.size] = self.values[:, :self.size]
+            self.values = values
+
+        self.values[0, self.size:self.size + number_of_points] = batch[self.x_axis]
+        self.values[1, self.size:self.size + number_of_points] = batch[self.y_axis]
+        self.size += number_of_points
+
+    def update_line(self):
+        """
+        This would give the line the points added so far, decimated like decimation.set_line_data.
+        It is only worth calling before a draw, the caller still has to rescale the axes and draw.
+        """
+        from decimation import set_line_data
+
+        set_line_data(self.line, self.values[0, :self.size], self.values[1, :self.size])
@@ -0,0 +1,197 @@
+"""
+Full parameter sweep over fluid x length x diameter x velocity x gravity.
+
+test.get_values zips LENGTHS, DIAMETERS and VELOCITY together so it only ever covers ten points.
+Here every axis gets its own array and they are laid out along different dimensions,
+so NumPy broadcasting evaluates every combination without any python loops.
+Quantities that do not depend on an axis (the reynolds number does not depend on the length for example)
+are only calculated once along that axis.
+"""
+import numpy as np
+
+from calculations import LENGTHS, DIAMETERS, VELOCITY, PIPE_ROUGHNESS, THERMAL_CONDUCTIVITY, ACCELERATION_DUE_GRAVITY
+from vectorized import calculate_reynolds_numbers, calculate_head_losses, calculate_pressures, \
+    calculate_coefficients_of_heat_transfer
+from kernels import get_frictional_factors
+
+SWEEP_DIMENSIONS = ('fluid', 'length', 'diameter', 'velocity', 'g')
+
+# The dimensions each quantity that depends on the fluid is stored along
+FLUID_QUANTITIES_DIMENSIONS = {
+    'head_loss': ('fluid', 'length', 'diameter', 'velocity', 'g'),
+    'frictional_factor': ('fluid', 'diameter', 'velocity'),
+    'heat_transfer_coefficient': ('fluid', 'diameter', 'velocity'),
+    'reynolds_number': ('fluid', 'diameter', 'velocity'),
+    'pressure': ('fluid', 'length', 'diameter', 'velocity', 'g'),
+}
+
+# Vertical and horizontal cases, the same values the desktop apps use
+GRAVITIES = [ACCELERATION_DUE_GRAVITY, 0.01]
+
+
+def get_sweep_axes(length_resolution: int = 10, diameter_resolution: int = 10, velocity_resolution: int = 10,
+                   gravities: list = None) -> dict:
+    """
+    This would return evenly spaced values for each axis of the sweep,
+    going from the smallest to the largest value in LENGTHS, DIAMETERS and VELOCITY.
+    The resolution of each axis is the number of values on it.
+    """
+    return {
+        'length': np.linspace(min(LENGTHS), max(LENGTHS), length_resolution),
+        'diameter': np.linspace(min(DIAMETERS), max(DIAMETERS), diameter_resolution),
+        'velocity': np.linspace(min(VELOCITY), max(VELOCITY), velocity_resolution),
+        'g': np.asarray(GRAVITIES if gravities is None else gravities, dtype=float),
+    }
+
+
+def resolve_sweep_axes(lengths=None, diameters=None, velocities=None, gravities=None) -> dict:
+    # The given axes as float arrays, the ones that are not given are taken from get_sweep_axes()
+    default_axes = get_sweep_axes()
+
+    return {
+        'length': np.asarray(default_axes['length'] if lengths is None else lengths, dtype=float),
+        'diameter': np.asarray(default_axes['diameter'] if diameters is None else diameters, dtype=float),
+        'velocity': np.asarray(default_axes['velocity'] if velocities is None else velocities, dtype=float),
+        'g': np.asarray(default_axes['g'] if gravities is None else gravities, dtype=float),
+    }
+
+
+def get_stored_shape(dimensions: tuple, axes_lengths: dict) -> tuple:
+    # The shape of a quantity in the SweepResult layout, size one along the dimensions it does not depend on
+    return tuple(axes_lengths[dim] if dim in dimensions else 1 for dim in SWEEP_DIMENSIONS)
+
+
+def _along_axis(values, dimension: str) -> np.ndarray:
+    # Reshape a 1d array so it lies along the given dimension of the sweep
+    shape = [1] * len(SWEEP_DIMENSIONS)
+    shape[SWEEP_DIMENSIONS.index(dimension)] = -1
+
+    return np.asarray(values, dtype=float).reshape(shape)
+
+
+class SweepResult:
+    """
+    A labelled N-dimensional result.
+    The dimensions are in SWEEP_DIMENSIONS order and coords holds the values along each of them.
+
+    The arrays are stored with size one along the dimensions they do not depend on,
+    indexing a quantity (result['head_loss']) broadcasts it to the full shape without copying.
+    """
+
+    def __init__(self, dims: tuple, coords: dict, data: dict):
+        self.dims = tuple(dims)
+        self.coords = coords
+        self.data = data
+
+    @property
+    def shape(self) -> tuple:
+        return tuple(len(self.coords[dim]) for dim in self.dims)
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape))
+
+    def keys(self):
+        return self.data.keys()
+
+    def __getitem__(self, quantity: str) -> np.ndarray:
+        return np.broadcast_to(self.data[quantity], self.shape)
+
+    def get_index(self, dim: str, label) -> int:
+        # Fluids are picked by name, the other axes by the closest value
+        if dim == 'fluid':
+            return list(self.coords[dim]).index(label)
+
+        return int(np.argmin(np.abs(np.asarray(self.coords[dim]) - label)))
+
+    def isel(self, **indices):
+        """
+        This would return the result at the given positions, say result.isel(fluid=0, g=1).
+        The dimensions that are selected are dropped from the result.
+        """
+        axes = [self.dims.index(dim) for dim in indices]
+        data = {}
+
+        for quantity, values in self.data.items():
+            index = [slice(None)] * len(self.dims)
+
+            for axis, dim in zip(axes, indices):
+                # Arrays that do not depend on this dimension only have one value along it
+                index[axis] = indices[dim] if values.shape[axis] > 1 else 0
+
+            data[quantity] = values[tuple(index)]
+
+        dims = tuple(dim for dim in self.dims if dim not in indices)
+        coords = {dim: self.coords[dim] for dim in dims}
+
+        return SweepResult(dims, coords, data)
+
+    def sel(self, **labels):
+        """
+        Same as isel but using the labels, say result.sel(fluid='Water', g=9.81)
+        """
+        return self.isel(**{dim: self.get_index(dim, label) for dim, label in labels.items()})
+
+
+def sweep_values(fluids_values: dict, lengths=None, diameters=None, velocities=None, gravities=None) -> SweepResult:
+    """
+    This would evaluate every fluid in fluids_values at every combination of the given axes.
+    fluids_values has the same layout as the one in test.py:
+    {
+        fluid_name: {'shc': ..., 'density': ..., 'viscosity': ...}
+    }
+
+    Axes that are not given are taken from get_sweep_axes().
+    """
+    default_axes = get_sweep_axes()
+    lengths = default_axes['length'] if lengths is None else lengths
+    diameters = default_axes['diameter'] if diameters is None else diameters
+    velocities = default_axes['velocity'] if velocities is None else velocities
+    gravities = default_axes['g'] if gravities is None else gravities
+
+    fluid_names = list(fluids_values.keys())
+    shcs = _along_axis([fluids_values[name]['shc'] for name in fluid_names], 'fluid')
+    densities = _along_axis([fluids_values[name]['density'] for name in fluid_names], 'fluid')
+    viscosities = _along_axis([fluids_values[name]['viscosity'] for name in fluid_names], 'fluid')
+
+    length_values = _along_axis(lengths, 'length')
+    diameter_values = _along_axis(diameters, 'diameter')
+    velocity_values = _along_axis(velocities, 'velocity')
+    gravity_values = _along_axis(gravities, 'g')
+
+    # These do not depend on the length or the gravity
+    reynold_numbers = calculate_reynolds_numbers(density=densities, diameter=diameter_values,
+                                                 velocity=velocity_values, dynamic_viscosity=viscosities)
+    frictional_factors = get_frictional_factors(reynold_numbers, pipe_roughness=PIPE_ROUGHNESS,
+                                                diameters=diameter_values)
+    prandtl_numbers = (viscosities * shcs) / THERMAL_CONDUCTIVITY
+    coefficients_of_heat_transfer = calculate_coefficients_of_heat_transfer(reynold_numbers,
+                                                                            diameters=diameter_values,
+                                                                            prandtl_number=prandtl_numbers,
+                                                                            conductivity=THERMAL_CONDUCTIVITY)
+
+    # These depend on every axis
+    head_losses = calculate_head_losses(frictional_factors, pipe_lengths=length_values, diameters=diameter_values,
+                                        velocities=velocity_values, g=gravity_values)
+    pressures = calculate_pressures(density=densities, head_losses=head_losses, g=gravity_values)
+
+    coords = {
+        'fluid': fluid_names,
+        'length': np.asarray(lengths, dtype=float),
+        'diameter': np.asarray(diameters, dtype=float),
+        'velocity': np.asarray(velocities, dtype=float),
+        'g': np.asarray(gravities, dtype=float),
+    }
+
+    data = {
+        'head_loss': head_losses,
+        'frictional_factor': frictional_factors,
+        'heat_transfer_coefficient': coefficients_of_heat_transfer,
+        'reynolds_number': reynold_numbers,
+        'pressure': pressures,
+        'length': length_values,
+        'velocity': velocity_values,
+        'diameter': diameter_values,
+    }
+
+    return SweepResult(SWEEP_DIMENSIONS, coords, data)
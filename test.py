@@ -1,131 +1,17 @@
-import math
 import os.path
 
-import matplotlib.pyplot as plt
-
-import openpyxl
-
-ENV_TYPE = 'vertical'
-ACCELERATION_DUE_GRAVITY = 9.81
-VELOCITY = [0.05, 0.1, 0.15, 0.2, 0.25, 0.3, 0.35, 0.4, 0.45, 0.5]
-DIAMETERS = [0.00159, 0.00318, 0.00477, 0.00636, 0.00795, 0.00954, 0.01113, 0.01272, 0.01431, 0.0159]
-LENGTHS = [0.2, 0.4, 0.6, 0.8, 1.0, 1.2, 1.4, 1.6, 1.8, 2.0]
-PIPE_ROUGHNESS = 0.03
-THERMAL_CONDUCTIVITY = 401
-GRAPH_DETAILS = [['head_loss', 'reynolds_number'], ['heat_transfer_coefficient', 'reynolds_number'],
-                 ['frictional_factor', 'reynolds_number']]
-
-FLUIDS = ['R407a', 'R245fa', 'R1234ze', 'R1234yf', 'Water', 'Ammonia', 'R134a', 'Propane', 'R600a', 'R407c']
-
-
-def calculate_reynolds_number(density: float, diameter: float, velocity: float, dynamic_viscosity: float) -> float:
-    # This function calculates the reynolds number
-
-    reynolds_number = (density * diameter * velocity) / dynamic_viscosity
-
-    return reynolds_number
-
-
-def calculate_frictional_factor_for_laminar_flow(reynold_number: float) -> float:
-    return 64 / reynold_number
-
-
-def calculate_frictional_factor_for_turbulent(reynold_number: float, pipe_roughness: float, diameter: float) -> float:
-    return 2 * ((8 / reynold_number) ** 12 + (
-            (2.457 * math.log((0.27 * pipe_roughness / diameter) + (7 / reynold_number) ** 0.9)) ** 16 + (
-            37530 / reynold_number) ** 16) ** (-3 / 2)) ** (
-                   1 / 12)
-
-
-def get_frictional_factor(reynold_number: float, pipe_roughness: float, is_laminar: bool, diameter: float) -> float:
-    if is_laminar:
-        frictional_factor = calculate_frictional_factor_for_laminar_flow(reynold_number)
-    else:
-        frictional_factor = calculate_frictional_factor_for_turbulent(reynold_number=reynold_number,
-                                                                      pipe_roughness=pipe_roughness, diameter=diameter)
-
-    return frictional_factor
-
-
-def calculate_head_loss(friction_factor: float, pipe_length: float, diameter: float, velocity: float, g: float):
-    head_loss = (friction_factor * pipe_length * velocity ** 2) / (diameter * 2 * g)
-    return head_loss
-
-
-def calculate_prandtl_number(dynamic_viscosity: float, specific_heat_capacity: float, conductivity: float) -> float:
-    prandtl_number = (dynamic_viscosity * specific_heat_capacity) / conductivity
-
-    return prandtl_number
-
-
-def calculate_pressure(density: float, head_loss: float, g: float) -> float:
-    return -density * g * head_loss
-
-
-def calculate_coefficient_of_heat_transfer(reynold_number: float, diameter: float, prandtl_number: float,
-                                           conductivity: float) -> float:
-    return 0.023 * (reynold_number ** 0.8) * (prandtl_number ** 0.4) * conductivity / diameter
-
-
-def get_values(specific_heat_capacity: float, dynamic_viscosity: float, density: float, g: float) -> dict:
-    # This function gets the various values and does the operation for each fluid
-
-    reynolds_number_values = []  # This list would store the reynold number for the fluid in what ever case
-    head_loss_values = []  # This list would store the head loss for the fluid in varuous cases
-    coefficient_of_heat_transfer_values = []
-    frictional_factors = []
-
-    # Get the values that would be used for all fluids
-    # specific_heat_capacity = float(input('Enter specific heat capacity: '))
-    # dynamic_viscosity = float(input('Enter the dynamic viscosity: '))
-    # density = float(input('Enter the density of the fluid: '))
-
-    for length, diameter, velocity in zip(LENGTHS, DIAMETERS, VELOCITY):
-        # Calculate the reynold's number.
-        reynold_number = calculate_reynolds_number(diameter=diameter, density=density, velocity=velocity,
-                                                   dynamic_viscosity=dynamic_viscosity)
-
-        # Get if the fluid is laminar or not
-        is_laminar = reynold_number < 2000
-
-        # Get the prandtl number
-        prandtl_number = calculate_prandtl_number(specific_heat_capacity=specific_heat_capacity,
-                                                  conductivity=THERMAL_CONDUCTIVITY,
-                                                  dynamic_viscosity=dynamic_viscosity)
-
-        # Get the frictional factor
-        frictional_factor = get_frictional_factor(reynold_number=reynold_number, pipe_roughness=PIPE_ROUGHNESS,
-                                                  is_laminar=is_laminar, diameter=diameter)
-
-        # Get the head loss
-        head_loss = calculate_head_loss(friction_factor=frictional_factor, pipe_length=length, diameter=diameter,
-                                        velocity=velocity, g=g)
-
-        # Get the pressure
-        pressure = calculate_pressure(density=density, head_loss=head_loss, g=g)
-
-        # Get the coefficient of heat transfer.
-        coefficient_of_heat_transfer = calculate_coefficient_of_heat_transfer(reynold_number=reynold_number,
-                                                                              diameter=diameter,
-                                                                              prandtl_number=prandtl_number,
-                                                                              conductivity=THERMAL_CONDUCTIVITY)
-
-        frictional_factors.append(frictional_factor)
-        coefficient_of_heat_transfer_values.append(coefficient_of_heat_transfer)
-        head_loss_values.append(head_loss)
-        reynolds_number_values.append(reynold_number)
-
-    return {
-        'head_loss': head_loss_values,
-        'frictional_factor': frictional_factors,
-        'heat_transfer_coefficient': coefficient_of_heat_transfer_values,
-        'reynolds_number': reynolds_number_values,
-        'velocity': VELOCITY,
-        'diameter': DIAMETERS,
-    }
+# The constants and calculations live in calculations.py so they can be imported without matplotlib and openpyxl,
+# they are imported here as well so everything that used them from this module still works
+from calculations import ENV_TYPE, ACCELERATION_DUE_GRAVITY, ENV_TYPES_GRAVITY, VELOCITY, DIAMETERS, LENGTHS, \
+    PIPE_ROUGHNESS, THERMAL_CONDUCTIVITY, GRAPH_DETAILS, FLUIDS, FLUIDS_VALUES, calculate_reynolds_number, \
+    calculate_frictional_factor_for_laminar_flow, calculate_frictional_factor_for_turbulent, get_frictional_factor, \
+    calculate_head_loss, calculate_prandtl_number, calculate_pressure, calculate_coefficient_of_heat_transfer, \
+    get_values
 
 
 def plot_graph(x: list, y: list, x_axis_label, y_axis_label, plot_title):
+    import matplotlib.pyplot as plt
+
     plt.plot(x, y, color='r')
     plt.xlabel(x_axis_label)
     plt.ylabel(y_axis_label)
@@ -175,127 +61,118 @@ def create_excel_sheet(fluids_values_dict: dict, fluid_name: str, env_type: str,
     _path_to_file = os.path.join(directory_to_save_file, f"{fluid_name}_{env_type}.xlsx")
 
 
-    wb = openpyxl.Workbook()  # Create a workbook
-    sheet = wb.active
-
-    sheet.title = f"Values for Fluid {fluid_name}"
-
-    number_of_columns = len(fluids_values_dict) + 1  # Include the length
-
-    # Now add the headers
-    headers = ['length'] + list(fluids_values_dict.keys())
-
-    # Write the headers to the Excel sheet
-    for i in range(number_of_columns):
-        cell = sheet.cell(row=1, column=i + 1)
-        cell.value = headers[i]
-
-    for column in range(len(headers)):
-        header = headers[column]
-
-        if header == 'length':
-            values = LENGTHS
-        else:
-            values = fluids_values_dict[header]
-
-        # Now loop through the values and add them to the sheet.
-        for _row in range(len(values)):
-            # The row starts from row 2
-            value = values[_row]
-            cell = sheet.cell(row=_row + 2, column=column + 1)
-            cell.value = value
+    # The length is the first column
+    columns = {'length': LENGTHS}
+    columns.update(fluids_values_dict)
 
     _path_to_file = _path_to_file.replace('/', '\\')
 
+    from disk_cache import write_output_if_changed
+    from excel_export import write_excel_sheet
+
     try:
-        wb.save(filename=_path_to_file)
+        # The rows are streamed to the file, so the whole sheet is never held in memory.
+        # A sheet that was already written from the same values is left as it is
+        write_output_if_changed(_path_to_file, columns,
+                                lambda: write_excel_sheet(_path_to_file, f"Values for Fluid {fluid_name}", columns))
     except Exception as e:
         print(e)
 
 
 if __name__ == '__main__':
     # Run some code
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Calculate, save and plot the values of every fluid')
+    parser.add_argument('--headless', action='store_true',
+                        help='save the graphs of both env types to generated/images instead of showing them')
+    parser.add_argument('--format', default='png', choices=['png', 'svg', 'pdf'], help='the format of the images')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='processes to render the images in')
+    parser.add_argument('--instrument', nargs='?', const='timers', default=None, metavar='OPTIONS',
+                        help='time the stages and count the work, OPTIONS is some of timers,cprofile,tracemalloc')
+    parser.add_argument('--instrument-report', default=None,
+                        help='where the instrumentation report goes, generated/reports by default')
+    arguments = parser.parse_args()
+
+    import instrumentation
+
+    if arguments.instrument is not None:
+        try:
+            instrumentation.enable(instrumentation.parse_options(arguments.instrument))
+        except ValueError as e:
+            parser.error(str(e))
 
     colors = ['r', 'g', 'b', 'c', 'm', 'y', 'k', 'pink', 'chartreuse', 'burlywood']
     print('Enter fluid names. Press enter to stop recording')
 
     print(f'Calculating for {",".join(FLUIDS)}')
-    fluids_values = {
-        FLUIDS[0]: {
-            'shc': 1520,
-            'density': 1145.1,
-            'viscosity': 0.000151
-        }, FLUIDS[1]: {
-            'shc': 1322,
-            'density': 1339,
-            'viscosity': 0.000401
-        }, FLUIDS[2]: {
-            'shc': 1386,
-            'density': 1163.1,
-            'viscosity': 0.000199
-        }, FLUIDS[3]: {
-            'shc': 1392,
-            'density': 1092,
-            'viscosity': 0.000154
-        }, FLUIDS[4]: {
-            'shc': 4187,
-            'density': 1000,
-            'viscosity': 0.000895
-        }, FLUIDS[5]: {
-            'shc': 4744,
-            'density': 696,
-            'viscosity': 0.000255
-        }, FLUIDS[6]: {
-            'shc': 1430,
-            'density': 1207.2,
-            'viscosity': 0.000181
-        }, FLUIDS[7]: {
-            'shc': 1630,
-            'density': 495,
-            'viscosity': 0.00011
-        }, FLUIDS[8]: {
-            'shc': 2430,
-            'density': 551,
-            'viscosity': 0.000151
-        }, FLUIDS[9]: {
-            'shc': 1540,
-            'density': 1134,
-            'viscosity': 0.000154
-        },
-    }
 
-    fluids_tables = {}
+    from excel_export import write_fluids_workbook, get_workbook_path
+    from result_cache import get_cached_values_for_fluids
+
+    # Calculate for all the fluids in one go
+    fluids_tables = get_cached_values_for_fluids(FLUIDS_VALUES, ACCELERATION_DUE_GRAVITY)
 
     for fluid in FLUIDS:
-        print(f'<------------Calculating for {fluid}-------------->')
-        fluid_value = get_values(fluids_values[fluid]['shc'], fluids_values[fluid]['viscosity'],
-                                 fluids_values[fluid]['density'], ACCELERATION_DUE_GRAVITY)
-        fluids_tables[fluid] = fluid_value
-        create_excel_sheet(fluid_value, fluid, env_type=ENV_TYPE)
+        print(f'<------------Saving values for {fluid}-------------->')
+        create_excel_sheet(fluids_tables[fluid], fluid, env_type=ENV_TYPE)
+
+    # Every fluid, for both the vertical and horizontal cases, in a single workbook as well
+    print('<------------Saving the values of all the fluids in one workbook-------------->')
+    from disk_cache import write_output_if_changed
+
+    fluids_tables_by_env = {env_type: get_cached_values_for_fluids(FLUIDS_VALUES, g)
+                            for env_type, g in ENV_TYPES_GRAVITY.items()}
+    workbook_values = {f'{env_type}/{fluid}/{key}': values
+                       for env_type, tables in fluids_tables_by_env.items()
+                       for fluid, fluid_values in tables.items() for key, values in fluid_values.items()}
+
+    write_output_if_changed(get_workbook_path(), workbook_values,
+                            lambda: write_fluids_workbook(get_workbook_path(), fluids_tables_by_env, LENGTHS))
 
     print('Plotting graphs >>>>>>>>>>>> Loading >>>>>>>>>>>>>>>>>>>')
 
-    for row in range(len(GRAPH_DETAILS)):
+    if arguments.headless:
+        from rendering import render_figures
+
+        # Every graph for every env type, rendered on the Agg backend in worker processes
+        for path_to_image in render_figures(fluids_tables_by_env, image_format=arguments.format,
+                                            workers=arguments.workers):
+            print(f'Saved {path_to_image}')
+    else:
+        import matplotlib.pyplot as plt
+
+        from decimation import connect_decimation, plot_decimated
+
+        for row in range(len(GRAPH_DETAILS)):
+
+            graph_detail = GRAPH_DETAILS[row]
+            y_axis = graph_detail[0]
+            x_axis = graph_detail[1]
 
-        graph_detail = GRAPH_DETAILS[row]
-        y_axis = graph_detail[0]
-        x_axis = graph_detail[1]
+            plt.clf()
+            # Big sweeps are cut down to what the window can show, again whenever it is zoomed or panned
+            connect_decimation(plt.gca())
 
-        plt.clf()
+            for specific_graph_number in range(len(FLUIDS)):
+                # Plot all the graphs on a canvas
+                plot_decimated(plt.gca(), fluids_tables[FLUIDS[specific_graph_number]][x_axis],
+                               fluids_tables[FLUIDS[specific_graph_number]][y_axis],
+                               color=colors[specific_graph_number])
 
-        for specific_graph_number in range(len(FLUIDS)):
-            # Plot all the graphs on a canvas
-            plt.plot(fluids_tables[FLUIDS[specific_graph_number]][x_axis],
-                     fluids_tables[FLUIDS[specific_graph_number]][y_axis],
-                     color=colors[specific_graph_number])
+            plt.xlabel(x_axis)
+            plt.ylabel(y_axis)
+            plt.title(f'graph of {y_axis} against {x_axis}')
+            plt.legend(FLUIDS)
 
-        plt.xlabel(x_axis)
-        plt.ylabel(y_axis)
-        plt.title(f'graph of {y_axis} against {x_axis}')
-        plt.legend(FLUIDS)
+            cwd = os.getcwd()
+            path_to_file = os.path.join(cwd, 'generated', 'desktop_app_images', ENV_TYPE,
+                                        f'{y_axis} against {x_axis}_{ENV_TYPE}.png')
 
-        cwd = os.getcwd()
-        path_to_file = os.path.join(cwd, 'generated', 'desktop_app_images', ENV_TYPE, f'{y_axis} against {x_axis}_{ENV_TYPE}.png')
+            # plt.savefig(path_to_file)
+            plt.show()  # Plot the graph and show a window
 
-        # plt.savefig(path_to_file)
-        plt.show()  # Plot the graph and show a window
+    # Also written when it was enabled with FLUID_INSTRUMENT
+    path_to_report = instrumentation.write_report(arguments.instrument_report)
+    if path_to_report is not None:
+        print(f'Instrumentation report: {path_to_report}')
@@ -0,0 +1,11 @@
+"""
+The modules are at the root of the project, next to this folder, and the tests must not leave anything in the
+disk cache or open a window.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['FLUID_DISK_CACHE'] = '0'
+os.environ.setdefault('MPLBACKEND', 'Agg')
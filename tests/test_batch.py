@@ -0,0 +1,88 @@
+"""
+The exit status of batch.py: 0 when everything was written, 1 when a part of the job failed
+and 2 when the job file is wrong.
+"""
+import json
+
+import pytest
+
+import batch
+
+WATER = {'shc': 4187, 'density': 1000, 'viscosity': 0.000895}
+
+
+def write_job(tmp_path, job, file_name: str = 'job.json') -> str:
+    path_to_job = tmp_path / file_name
+    path_to_job.write_text(job if isinstance(job, str) else json.dumps(job))
+
+    return str(path_to_job)
+
+
+def run_batch(tmp_path, path_to_job: str, output_dir=None) -> dict:
+    path_to_summary = str(tmp_path / 'summary.json')
+    status = batch.main([path_to_job, '--output-dir', str(output_dir or tmp_path / 'output'),
+                         '--summary', path_to_summary])
+
+    with open(path_to_summary) as file:
+        summary = json.load(file)
+
+    assert summary['status'] == status
+
+    return summary
+
+
+@pytest.mark.parametrize('grid', [False, True])
+def test_valid_job(tmp_path, grid):
+    job = {'fluids': {'Water': WATER, 'R134a': {'temperature': 40}}, 'sink': 'npz', 'grid': grid,
+           'lengths': [0.2, 0.4], 'diameters': [0.00159, 0.00318], 'velocities': [0.05, 0.1], 'plots': False}
+    summary = run_batch(tmp_path, write_job(tmp_path, job))
+
+    assert summary['status'] == batch.EXIT_OK == 0
+    # Two fluids, two env types and the workbook
+    assert len(summary['exported']) == 2 * 2 + 1
+    assert summary['points'] == 2 * 2 * (8 if grid else 2)
+
+
+@pytest.mark.parametrize('file_name, content', [
+    ('job.json', '{"fluids": [{"name": "Water", "shc": 4187, "density": 1000, "viscosity": 0.000895}]}'),
+    ('job.yaml', 'fluids:\n  Water: {shc: 4187, density: 1000, viscosity: 0.000895}\n'),
+    ('job.csv', 'name,shc,density,viscosity\nWater,4187,1000,0.000895\n'),
+])
+def test_job_file_types(tmp_path, file_name, content):
+    job = batch.parse_job(batch.read_job_file(write_job(tmp_path, content, file_name)))
+
+    assert job['fluids'] == {'Water': {key: float(value) for key, value in WATER.items()}}
+
+
+def test_failed_job(tmp_path):
+    # The output directory can not be made inside a file
+    output_file = tmp_path / 'output'
+    output_file.write_text('')
+    summary = run_batch(tmp_path, write_job(tmp_path, {'fluids': {'Water': WATER}, 'plots': False}),
+                        output_dir=output_file)
+
+    assert summary['status'] == batch.EXIT_FAILED == 1
+
+
+@pytest.mark.parametrize('job, file_name', [
+    ('{"fluids": {"Water": ', 'job.json'),
+    ('fluids: [Water', 'job.yaml'),
+    ({}, 'job.json'),
+    ({'fluids': {'Water': {'shc': 4187}}}, 'job.json'),
+    ({'fluids': {'Water': WATER}, 'sink': 'pdf'}, 'job.json'),
+    ({'fluids': {'Water': WATER}, 'lengths': {'start': 0.2}}, 'job.json'),
+    ({'fluids': {'Water': WATER}, 'velocities': [-1]}, 'job.json'),
+    ({'fluids': {'R134a': {'temperature': float('nan')}}}, 'job.json'),
+    ({'fluids': {'Water': WATER}}, 'job.txt'),
+])
+def test_invalid_job(tmp_path, job, file_name):
+    summary = run_batch(tmp_path, write_job(tmp_path, job, file_name))
+
+    assert summary['status'] == batch.EXIT_INVALID_JOB == 2
+    assert not (tmp_path / 'output').exists()
+
+
+def test_missing_job_file(tmp_path):
+    summary = run_batch(tmp_path, str(tmp_path / 'missing.json'))
+
+    assert summary['status'] == batch.EXIT_INVALID_JOB
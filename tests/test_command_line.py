@@ -0,0 +1,20 @@
+"""
+The command line of test.py and batch.py refuses what it can not run with a usage error.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize('arguments', [['test.py', '--headless'], ['batch.py', 'job.json']])
+def test_unknown_instrument_option(tmp_path, arguments):
+    result = subprocess.run([sys.executable, os.path.join(ROOT, arguments[0]), *arguments[1:],
+                             '--instrument', 'bogus'], cwd=tmp_path, capture_output=True, text=True, timeout=120)
+
+    assert result.returncode == 2
+    assert 'error: Unknown instrument options bogus' in result.stderr
+    assert 'Traceback' not in result.stderr
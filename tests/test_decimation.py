@@ -0,0 +1,108 @@
+"""
+The decimated lines have to keep what can be seen of the full ones.
+"""
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+from decimation import DECIMATION_METHODS, connect_decimation, decimate, decimate_lttb, decimate_min_max, \
+    decimate_points, plot_decimated
+
+NUMBER_OF_POINTS = 100000
+
+
+def get_line():
+    x = np.linspace(0, 10, NUMBER_OF_POINTS)
+    y = np.sin(x)
+    # A spike a single point wide, it has to be drawn whatever the number of buckets
+    y[NUMBER_OF_POINTS // 3] = 5
+
+    return x, y
+
+
+def test_min_max_keeps_every_column_range():
+    x, y = get_line()
+    number_of_buckets = 200
+    decimated_x, decimated_y = decimate_min_max(x, y, number_of_buckets)
+
+    assert len(decimated_x) <= 4 * number_of_buckets
+    assert decimated_x[0] == x[0] and decimated_x[-1] == x[-1]
+    assert np.all(np.diff(decimated_x) >= 0)
+
+    columns = np.minimum((x * (number_of_buckets / x[-1])).astype(int), number_of_buckets - 1)
+    decimated_columns = np.minimum((decimated_x * (number_of_buckets / x[-1])).astype(int), number_of_buckets - 1)
+    for column in range(number_of_buckets):
+        assert decimated_y[decimated_columns == column].max() == y[columns == column].max()
+        assert decimated_y[decimated_columns == column].min() == y[columns == column].min()
+
+
+def test_lttb_keeps_the_ends_and_the_spike():
+    x, y = get_line()
+    decimated_x, decimated_y = decimate_lttb(x, y, 500)
+
+    assert len(decimated_x) == 500
+    assert decimated_x[0] == x[0] and decimated_x[-1] == x[-1]
+    assert decimated_y.max() == 5
+
+
+@pytest.mark.parametrize('method', DECIMATION_METHODS)
+def test_lines_that_go_back_are_kept(method):
+    x = np.tile(np.linspace(0, 1, 1000), 10)
+    y = np.arange(len(x), dtype=float)
+    decimated_x, decimated_y = decimate(x, y, 100, method=method)
+
+    np.testing.assert_array_equal(decimated_x, x)
+    np.testing.assert_array_equal(decimated_y, y)
+
+
+def test_range_keeps_one_point_past_each_edge():
+    x, y = get_line()
+    decimated_x, _ = decimate(x, y, 100, x_range=(2, 4))
+
+    assert decimated_x[0] < 2 <= decimated_x[1]
+    assert decimated_x[-2] <= 4 < decimated_x[-1]
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError, match='Unknown decimation method'):
+        decimate(*get_line(), 100, method='every_other')
+
+
+def test_points_keep_every_drawn_pixel():
+    figure, axes = plt.subplots(figsize=(2, 2), dpi=50)
+
+    try:
+        x = np.random.default_rng(0).random(20000)
+        y = np.random.default_rng(1).random(20000)
+        axes.set_xlim(0, 1)
+        axes.set_ylim(0, 1)
+        decimated_x, decimated_y = decimate_points(x, y, axes.transData)
+
+        def get_pixels(points_x, points_y):
+            return {tuple(pixel) for pixel in np.floor(
+                axes.transData.transform(np.column_stack([points_x, points_y]))).astype(int)}
+
+        assert len(decimated_x) < len(x)
+        assert get_pixels(decimated_x, decimated_y) == get_pixels(x, y)
+    finally:
+        plt.close(figure)
+
+
+def test_zoom_decimates_again():
+    figure, axes = plt.subplots()
+
+    try:
+        x, y = get_line()
+        line = plot_decimated(axes, x, y)
+        connect_decimation(axes)
+        number_of_drawn_points = len(line.get_xdata())
+
+        axes.set_xlim(2, 4)
+        zoomed_x = line.get_xdata()
+
+        assert number_of_drawn_points < NUMBER_OF_POINTS
+        assert zoomed_x[1] >= 2 and zoomed_x[-2] <= 4
+        # The zoomed range gets as much detail as the full one had
+        assert np.count_nonzero((x >= 2) & (x <= 4)) > len(zoomed_x) > number_of_drawn_points / 10
+    finally:
+        plt.close(figure)
@@ -0,0 +1,67 @@
+"""
+The entries of disk_cache.DiskCache: round trip, broken entries and the eviction of the least recently used.
+"""
+import os
+
+import numpy as np
+import pytest
+
+from disk_cache import ENTRY_EXTENSION, EVICTION_TARGET, DiskCache, get_cache_key
+
+VALUES = {'head_loss': np.linspace(0.1, 1, 10), 'reynolds_number': np.linspace(100, 1000, 10)}
+
+
+def test_round_trip(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    key = get_cache_key(4187, 0.000895, 1000, 9.81)
+
+    assert cache.get(key) is None
+    cache.put(key, VALUES)
+    values = cache.get(key)
+
+    assert values.keys() == VALUES.keys()
+    for name, expected in VALUES.items():
+        np.testing.assert_array_equal(values[name], expected)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_keys_follow_the_inputs():
+    key = get_cache_key(4187, 0.000895, 1000, 9.81)
+
+    assert key == get_cache_key(4187, 0.000895, 1000, 9.81)
+    assert key != get_cache_key(4187, 0.000895, 1000, 1.62)
+    assert key != get_cache_key(4187, 0.000895, 1000, 9.81, lengths=[0.2, 0.4])
+
+
+@pytest.mark.parametrize('content', [b'', b'not an archive', b'PK\x03\x04 cut short'])
+def test_broken_entry_is_a_miss_and_removed(tmp_path, content):
+    cache = DiskCache(str(tmp_path))
+    cache.put('key', VALUES)
+    path_to_entry = tmp_path / f'key{ENTRY_EXTENSION}'
+    path_to_entry.write_bytes(content)
+
+    assert cache.get('key') is None
+    assert not path_to_entry.exists()
+
+    # The entry can be put again once it was removed
+    cache.put('key', VALUES)
+    np.testing.assert_array_equal(cache.get('key')['head_loss'], VALUES['head_loss'])
+
+
+def test_least_recently_used_are_evicted(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    for index in range(4):
+        cache.put(f'key{index}', VALUES)
+        # Spread the last used times, the file system may not tell writes in the same instant apart
+        os.utime(tmp_path / f'key{index}{ENTRY_EXTENSION}', (index, index))
+
+    entry_size = cache.get_entries()[0][1]
+    cache.get('key0')
+    cache.max_size = 3 * entry_size
+    cache.put('key4', VALUES)
+
+    # Down to EVICTION_TARGET of max_size, key1 and key2 were used last the longest time ago
+    remaining = [key for key, _, _ in cache.get_entries()]
+    assert cache.get_size() <= cache.max_size * EVICTION_TARGET
+    assert 'key1' not in remaining and 'key2' not in remaining
+    assert 'key4' in remaining
@@ -0,0 +1,122 @@
+"""
+Every array engine against the scalar functions of calculations.py, which are the reference.
+"""
+import numpy as np
+import pytest
+
+import kernels
+from calculations import FLUIDS_VALUES, ENV_TYPES_GRAVITY, LENGTHS, DIAMETERS, VELOCITY, PIPE_ROUGHNESS, \
+    calculate_pressure, get_values
+from prepared import PreparedFluid, PreparedGeometry
+from result_cache import ResultCache, get_cached_values_for_fluids
+from vectorized import FLUID_NAME_LENGTH, RESULT_TOLERANCE, get_fluid_properties_table, get_values_array, \
+    get_values_for_fluids, split_values_by_fluid
+
+QUANTITIES = ['head_loss', 'frictional_factor', 'heat_transfer_coefficient', 'reynolds_number', 'pressure']
+FLUID_NAMES = list(FLUIDS_VALUES.keys())
+GRAVITIES = list(ENV_TYPES_GRAVITY.values())
+
+
+def get_expected_values(fluid_name: str, g: float) -> dict:
+    # The values of calculations.get_values, with the pressure it works out but does not return
+    fluid_values = FLUIDS_VALUES[fluid_name]
+    expected = {key: np.asarray(values, dtype=float) for key, values in
+                get_values(fluid_values['shc'], fluid_values['viscosity'], fluid_values['density'], g).items()}
+    expected['pressure'] = np.array([calculate_pressure(density=fluid_values['density'], head_loss=head_loss, g=g)
+                                     for head_loss in expected['head_loss']])
+
+    return expected
+
+
+def assert_matches_scalar(values: dict, fluid_name: str, g: float):
+    expected = get_expected_values(fluid_name, g)
+
+    for quantity in QUANTITIES:
+        np.testing.assert_allclose(values[quantity], expected[quantity], rtol=RESULT_TOLERANCE, atol=0,
+                                   err_msg=f'{quantity} of {fluid_name} at g = {g}')
+
+
+def test_points_cover_both_flow_regimes():
+    # Otherwise the laminar and turbulent branches would not both be checked
+    reynolds_numbers = np.concatenate([get_expected_values(fluid_name, GRAVITIES[0])['reynolds_number']
+                                       for fluid_name in FLUID_NAMES])
+
+    assert np.any(reynolds_numbers < 2000) and np.any(reynolds_numbers >= 2000)
+
+
+@pytest.mark.parametrize('g', GRAVITIES)
+@pytest.mark.parametrize('fluid_name', FLUID_NAMES)
+def test_get_values_array(fluid_name, g):
+    fluid_values = FLUIDS_VALUES[fluid_name]
+    values = get_values_array(fluid_values['shc'], fluid_values['viscosity'], fluid_values['density'], g)
+
+    assert_matches_scalar(values, fluid_name, g)
+
+
+@pytest.mark.parametrize('g', GRAVITIES)
+def test_get_values_for_fluids(g):
+    fluids_values = split_values_by_fluid(get_values_for_fluids(FLUIDS_VALUES, g), keys=QUANTITIES)
+
+    assert list(fluids_values.keys()) == FLUID_NAMES
+    for fluid_name, values in fluids_values.items():
+        assert_matches_scalar(values, fluid_name, g)
+
+
+@pytest.mark.parametrize('g', GRAVITIES)
+def test_prepared_fluids_sharing_a_geometry(g):
+    geometry = PreparedGeometry(DIAMETERS)
+
+    for fluid_name, fluid_values in FLUIDS_VALUES.items():
+        fluid = PreparedFluid(fluid_values['shc'], fluid_values['viscosity'], fluid_values['density'], g)
+
+        assert_matches_scalar(fluid.get_values(LENGTHS, geometry, VELOCITY), fluid_name, g)
+
+
+@pytest.mark.parametrize('backend', kernels.KERNEL_BACKENDS)
+def test_prepared_fluid_backends(backend):
+    if backend == 'numba' and not kernels.is_numba_available():
+        pytest.skip('numba is not installed')
+
+    # The prepared fluids follow the backend picked for everything, like the grid sweeps
+    previous_backend = kernels.get_kernel_backend()
+    kernels.set_kernel_backend(backend)
+
+    try:
+        test_prepared_fluids_sharing_a_geometry(GRAVITIES[0])
+    finally:
+        kernels.set_kernel_backend(previous_backend)
+
+
+@pytest.mark.parametrize('backend', kernels.KERNEL_BACKENDS)
+def test_kernel_frictional_factors(backend):
+    if backend == 'numba' and not kernels.is_numba_available():
+        pytest.skip('numba is not installed')
+
+    for fluid_name in FLUID_NAMES:
+        expected = get_expected_values(fluid_name, GRAVITIES[0])
+        frictional_factors = kernels.get_frictional_factors(expected['reynolds_number'], PIPE_ROUGHNESS,
+                                                            np.asarray(DIAMETERS), backend=backend)
+
+        np.testing.assert_allclose(frictional_factors, expected['frictional_factor'], rtol=RESULT_TOLERANCE, atol=0)
+
+
+def test_long_fluid_names_sharing_a_prefix():
+    # Both names are longer than the name field of FLUID_PROPERTIES_DTYPE and only differ past it
+    names = ['x' * FLUID_NAME_LENGTH + '_a', 'x' * FLUID_NAME_LENGTH + '_b']
+    fluids_values = dict(zip(names, (FLUIDS_VALUES[fluid_name] for fluid_name in FLUID_NAMES)))
+    g = GRAVITIES[0]
+
+    fluids_values_by_name = split_values_by_fluid(get_values_for_fluids(fluids_values, g), keys=QUANTITIES)
+    cached_values_by_name = get_cached_values_for_fluids(fluids_values, g, cache=ResultCache())
+
+    assert list(fluids_values_by_name.keys()) == names
+    assert list(cached_values_by_name.keys()) == names
+
+    for name, fluid_name in zip(names, FLUID_NAMES):
+        assert_matches_scalar(fluids_values_by_name[name], fluid_name, g)
+
+        for quantity in ['head_loss', 'frictional_factor', 'heat_transfer_coefficient', 'reynolds_number']:
+            np.testing.assert_array_equal(cached_values_by_name[name][quantity], fluids_values_by_name[name][quantity])
+
+    with pytest.raises(ValueError, match='longer than'):
+        get_fluid_properties_table(fluids_values)
@@ -0,0 +1,36 @@
+"""
+FLUID_INSTRUMENT, which is read when instrumentation.py is imported.
+"""
+import pytest
+
+import instrumentation
+
+
+@pytest.fixture(autouse=True)
+def disabled():
+    instrumentation.disable()
+    yield
+    instrumentation.disable()
+
+
+@pytest.mark.parametrize('value', ['', '0', 'false', 'False', 'no', 'off', ' OFF '])
+def test_disabled_values(monkeypatch, value):
+    monkeypatch.setenv('FLUID_INSTRUMENT', value)
+
+    assert instrumentation.parse_options(value) == []
+    assert not instrumentation.enable_from_environment()
+    assert not instrumentation.is_enabled()
+
+
+def test_unknown_option_is_reported_and_ignored(monkeypatch, capsys):
+    monkeypatch.setenv('FLUID_INSTRUMENT', 'timers,bogus')
+
+    assert not instrumentation.enable_from_environment()
+    assert not instrumentation.is_enabled()
+    assert 'bogus' in capsys.readouterr().err
+
+
+@pytest.mark.parametrize('value, options', [('1', ['timers']), ('true', ['timers']),
+                                            ('cprofile, tracemalloc', ['cprofile', 'tracemalloc'])])
+def test_parse_options(value, options):
+    assert instrumentation.parse_options(value) == options
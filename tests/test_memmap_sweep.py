@@ -0,0 +1,43 @@
+"""
+The out of core sweep has to hold the same values as the sweep done in memory, whatever the chunks.
+"""
+import json
+
+import numpy as np
+import pytest
+
+from calculations import FLUIDS_VALUES
+from memmap_sweep import METADATA_FILE_NAME, open_memmap_sweep, run_memmap_sweep
+from sweep import sweep_values
+
+FLUIDS = {fluid_name: FLUIDS_VALUES[fluid_name] for fluid_name in ['Water', 'Ammonia']}
+AXES = {'lengths': np.linspace(0.2, 2, 4), 'diameters': np.linspace(0.00159, 0.0159, 7),
+        'velocities': np.linspace(0.05, 0.5, 3)}
+
+
+# One diameter per chunk, a few per chunk and the whole sweep in one chunk
+@pytest.mark.parametrize('chunk_points', [1, 50, 10 ** 6])
+def test_memmap_sweep_is_the_sweep(tmp_path, chunk_points):
+    expected = sweep_values(FLUIDS, **AXES)
+    result = run_memmap_sweep(str(tmp_path), FLUIDS, chunk_points=chunk_points, **AXES)
+
+    assert result.shape == expected.shape
+    assert list(result.coords['fluid']) == list(FLUIDS)
+    for quantity in expected.keys():
+        np.testing.assert_array_equal(result[quantity], expected[quantity])
+
+    # Opened again, the files are memory mapped instead of read
+    reopened = open_memmap_sweep(str(tmp_path))
+    assert isinstance(reopened.data['head_loss'], np.memmap)
+    np.testing.assert_array_equal(reopened['head_loss'], expected['head_loss'])
+
+
+def test_unfinished_sweep_is_refused(tmp_path):
+    run_memmap_sweep(str(tmp_path), FLUIDS, **AXES)
+
+    # What is left behind when a run is stopped before its last chunk
+    with open(tmp_path / METADATA_FILE_NAME, 'w') as file:
+        json.dump({'fluids': list(FLUIDS), 'complete': False}, file)
+
+    with pytest.raises(ValueError, match='not finished'):
+        open_memmap_sweep(str(tmp_path))
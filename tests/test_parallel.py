@@ -0,0 +1,43 @@
+"""
+The sweep split over worker processes against the serial sweep and the scalar functions of calculations.py.
+"""
+import numpy as np
+import pytest
+
+from calculations import FLUIDS_VALUES, LENGTHS, DIAMETERS, VELOCITY
+from parallel import get_chunk_dimension, sweep_values_parallel
+from sweep import sweep_values
+from test_engines import FLUID_NAMES, GRAVITIES, QUANTITIES, assert_matches_scalar
+
+
+def test_parallel_sweep_matches_scalar():
+    result = sweep_values_parallel(FLUIDS_VALUES, lengths=LENGTHS, diameters=DIAMETERS, velocities=VELOCITY,
+                                   gravities=GRAVITIES, workers=2)
+    # calculations.get_values zips the axes together, so its points are the diagonal of the grid
+    points = np.arange(len(LENGTHS))
+
+    for fluid_index, fluid_name in enumerate(FLUID_NAMES):
+        for g_index, g in enumerate(GRAVITIES):
+            values = result.isel(fluid=fluid_index, g=g_index)
+
+            assert_matches_scalar({quantity: values[quantity][points, points, points] for quantity in QUANTITIES},
+                                  fluid_name, g)
+
+
+@pytest.mark.parametrize('workers, chunk_size', [(2, None), (3, 1), (2, 4)])
+def test_parallel_sweep_is_the_serial_sweep(workers, chunk_size):
+    fluids_values = {fluid_name: FLUIDS_VALUES[fluid_name] for fluid_name in FLUID_NAMES[:2]}
+    axes = {'lengths': np.linspace(0.2, 2, 7), 'diameters': np.linspace(0.00159, 0.0159, 12),
+            'velocities': np.linspace(0.05, 0.5, 5)}
+
+    serial = sweep_values(fluids_values, **axes)
+    parallel = sweep_values_parallel(fluids_values, workers=workers, chunk_size=chunk_size, **axes)
+
+    for quantity in serial.keys():
+        np.testing.assert_array_equal(parallel[quantity], serial[quantity])
+
+
+def test_chunks_go_along_the_largest_axis():
+    assert get_chunk_dimension({'fluid': 2, 'length': 7, 'diameter': 12, 'velocity': 5, 'g': 2}) == 'diameter'
+    # The first of the largest ones when some have as many values
+    assert get_chunk_dimension({'fluid': 2, 'length': 7, 'diameter': 7, 'velocity': 5, 'g': 2}) == 'length'
@@ -0,0 +1,64 @@
+"""
+The interpolation of property_tables.py and the fluids looked up at a temperature in a job file.
+"""
+import numpy as np
+import pytest
+
+import batch
+from calculations import ACCELERATION_DUE_GRAVITY, LENGTHS, DIAMETERS, VELOCITY
+from property_tables import PROPERTY_COLUMNS, PROPERTY_TABLES, get_fluid_properties, get_property, \
+    get_temperature_range, get_values_at_temperatures
+from vectorized import RESULT_TOLERANCE, get_values_array
+
+FLUID_NAMES = list(PROPERTY_TABLES)
+
+
+@pytest.mark.parametrize('fluid_name', FLUID_NAMES)
+def test_table_rows_are_kept(fluid_name):
+    rows = np.array(PROPERTY_TABLES[fluid_name], dtype=float)
+
+    for column, quantity in enumerate(PROPERTY_COLUMNS, start=1):
+        np.testing.assert_allclose(get_property(fluid_name, quantity, rows[:, 0]), rows[:, column], rtol=1e-9)
+
+
+@pytest.mark.parametrize('temperature', [float('nan'), float('inf'), -1000, 1000])
+def test_temperatures_outside_the_table(temperature):
+    with pytest.raises(ValueError):
+        get_property(FLUID_NAMES[0], 'density', [20, temperature])
+
+
+def test_unknown_fluid_and_property():
+    with pytest.raises(ValueError, match='no property table'):
+        get_property('Mercury', 'density', 20)
+
+    with pytest.raises(ValueError, match='Unknown property'):
+        get_property(FLUID_NAMES[0], 'colour', 20)
+
+
+def test_values_at_temperatures():
+    fluid_name = FLUID_NAMES[0]
+    temperatures = np.linspace(*get_temperature_range(fluid_name), 5)
+    values = get_values_at_temperatures(fluid_name, temperatures, ACCELERATION_DUE_GRAVITY,
+                                        lengths=LENGTHS, diameters=DIAMETERS, velocities=VELOCITY)
+
+    for index, temperature in enumerate(temperatures):
+        properties = get_fluid_properties(fluid_name, temperature)
+        expected = get_values_array(properties['shc'], properties['viscosity'], properties['density'],
+                                    ACCELERATION_DUE_GRAVITY)
+
+        for quantity in ['head_loss', 'frictional_factor', 'heat_transfer_coefficient', 'reynolds_number']:
+            np.testing.assert_allclose(values[quantity][index], expected[quantity], rtol=RESULT_TOLERANCE, atol=0)
+
+
+def test_csv_job_with_a_temperature_column(tmp_path):
+    fluid_name = FLUID_NAMES[0]
+    path_to_job = tmp_path / 'job.csv'
+    # The density of the fluid is given, the rest is looked up at 20 °C
+    path_to_job.write_text(f'name,shc,density,viscosity,temperature\n'
+                           f'Water,4187,1000,0.000895,\n'
+                           f'{fluid_name},,900,,20\n')
+
+    fluids_values = batch.parse_job(batch.read_job_file(str(path_to_job)))['fluids']
+
+    assert fluids_values['Water'] == {'shc': 4187, 'density': 1000, 'viscosity': 0.000895}
+    assert fluids_values[fluid_name] == {**get_fluid_properties(fluid_name, 20), 'density': 900}
@@ -0,0 +1,77 @@
+"""
+FluidData and ResultTable hold the same values as the dictionaries they stand in for.
+"""
+import pickle
+
+import numpy as np
+import pytest
+
+from calculations import FLUIDS_VALUES, ACCELERATION_DUE_GRAVITY
+from records import RESULT_TABLE_COLUMNS, FluidData, ResultTable, get_fluids_table, get_result_table
+from vectorized import FLUID_NAME_LENGTH, get_values_for_fluids, split_values_by_fluid
+
+FLUIDS = [FluidData.from_properties(fluid_name, FLUIDS_VALUES[fluid_name]) for fluid_name in ['Water', 'Ammonia']]
+
+
+def test_fluid_data():
+    water = FLUIDS[0]
+
+    assert not hasattr(water, '__dict__')
+    assert water.get_properties() == FLUIDS_VALUES['Water']
+    assert water.is_valid() and not FluidData('Water').is_valid()
+
+
+@pytest.mark.parametrize('fluids', [FLUIDS, get_fluids_table(FLUIDS),
+                                    {fluid.name: fluid.get_properties() for fluid in FLUIDS}])
+def test_result_table_holds_the_values(fluids):
+    table = get_result_table(fluids, ACCELERATION_DUE_GRAVITY)
+    expected = split_values_by_fluid(get_values_for_fluids(FLUIDS_VALUES, ACCELERATION_DUE_GRAVITY),
+                                     keys=RESULT_TABLE_COLUMNS)
+
+    assert table.fluids == ['Water', 'Ammonia']
+    assert table.columns == RESULT_TABLE_COLUMNS
+    for fluid_name, fluid_values in table.to_tables().items():
+        for column, values in fluid_values.items():
+            np.testing.assert_array_equal(values, expected[fluid_name][column])
+
+
+def test_result_table_views():
+    table = get_result_table(FLUIDS, ACCELERATION_DUE_GRAVITY)
+    ammonia = table.get_fluid_table('Ammonia')
+
+    assert 'Water' in table and 'Water' not in ammonia
+    assert np.shares_memory(table['head_loss'], table.values)
+    assert np.shares_memory(table.get_fluid('Water')['head_loss'], table.values)
+    np.testing.assert_array_equal(ammonia.values[0], table.values[1])
+    # Only the rows of the one fluid are pickled
+    assert len(pickle.dumps(ammonia)) < len(pickle.dumps(table))
+
+
+def test_result_table_pickles():
+    table = get_result_table(FLUIDS, ACCELERATION_DUE_GRAVITY)
+    copy = pickle.loads(pickle.dumps(table))
+
+    assert copy.fluids == table.fluids and copy.columns == table.columns
+    np.testing.assert_array_equal(copy.values, table.values)
+    np.testing.assert_array_equal(copy.get_fluid('Ammonia')['pressure'], table.get_fluid('Ammonia')['pressure'])
+
+
+def test_result_table_from_tables():
+    table = get_result_table(FLUIDS, ACCELERATION_DUE_GRAVITY)
+    copy = ResultTable.from_tables(table.to_tables())
+
+    assert copy.fluids == table.fluids and copy.columns == table.columns
+    np.testing.assert_array_equal(copy.values, table.values)
+
+    with pytest.raises(ValueError):
+        ResultTable.from_tables({})
+
+
+def test_long_names():
+    fluids = [FluidData.from_properties('x' * FLUID_NAME_LENGTH + suffix, FLUIDS_VALUES['Water'])
+              for suffix in ['_a', '_b']]
+
+    # The structured array can not hold them, the table keeps them as they are
+    with pytest.raises(ValueError, match='longer than'):
+        get_fluids_table(fluids)
+    assert get_result_table(fluids, ACCELERATION_DUE_GRAVITY).fluids == [fluid.name for fluid in fluids]
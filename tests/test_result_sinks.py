@@ -0,0 +1,68 @@
+"""
+Every result sink has to read back the columns it wrote.
+"""
+import numpy as np
+import pytest
+
+from calculations import FLUIDS_VALUES, ACCELERATION_DUE_GRAVITY, LENGTHS, DIAMETERS, VELOCITY
+from result_sinks import RESULT_COLUMNS, SINKS, ResultSink, get_result_columns, get_sink
+from test_workbook import WORKBOOK_TOLERANCE, get_fluids_tables_by_env
+from vectorized import get_values_array
+
+
+@pytest.mark.parametrize('sink_name', list(SINKS.keys()))
+def test_sink_round_trip(tmp_path, sink_name):
+    sink = SINKS[sink_name]
+    if not sink.is_available():
+        pytest.skip(f'{sink_name} needs a package that is not installed')
+
+    columns = get_result_columns(get_fluids_tables_by_env(['Water'])['vertical']['Water'])
+    path_to_file = str(tmp_path / f'Water.{sink.extension}')
+
+    sink.write(path_to_file, columns, title='Values for Fluid Water')
+    read_columns = sink.read(path_to_file)
+
+    # Only the workbook does not keep every digit
+    tolerance = WORKBOOK_TOLERANCE if sink_name == 'excel' else 0
+
+    assert list(read_columns.keys()) == list(columns.keys())
+    for column, values in columns.items():
+        np.testing.assert_allclose(read_columns[column], values, rtol=tolerance, atol=0)
+
+
+@pytest.mark.parametrize('sink_name', list(SINKS.keys()))
+def test_batches_are_written_as_one_table(tmp_path, sink_name):
+    sink = SINKS[sink_name]
+    if not sink.is_available():
+        pytest.skip(f'{sink_name} needs a package that is not installed')
+
+    water = FLUIDS_VALUES['Water']
+    batches = [get_values_array(water['shc'], water['viscosity'], water['density'], ACCELERATION_DUE_GRAVITY,
+                                lengths=LENGTHS[points], diameters=DIAMETERS[points], velocities=VELOCITY[points])
+               for points in (slice(0, 2), slice(2, 5))]
+    path_to_file = str(tmp_path / f'Water.{sink.extension}')
+
+    assert sink.write_batches(path_to_file, iter(batches)) == 5
+
+    read_columns = sink.read(path_to_file)
+    tolerance = WORKBOOK_TOLERANCE if sink_name == 'excel' else 0
+
+    assert list(read_columns.keys()) == RESULT_COLUMNS
+    for column in RESULT_COLUMNS:
+        np.testing.assert_allclose(read_columns[column],
+                                   np.concatenate([get_result_columns(batch)[column] for batch in batches]),
+                                   rtol=tolerance, atol=0)
+
+
+def test_unknown_sink():
+    with pytest.raises(ValueError, match='Unknown result sink'):
+        get_sink('pdf')
+
+
+def test_sinks_have_to_read_and_write():
+    class WriteOnlySink(ResultSink):
+        def write(self, path_to_file: str, columns: dict, title: str = ''):
+            pass
+
+    with pytest.raises(TypeError):
+        WriteOnlySink()
@@ -0,0 +1,60 @@
+"""
+The batches of streaming.iter_values put together have to be the values of get_values_array.
+"""
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+from calculations import FLUIDS_VALUES, ACCELERATION_DUE_GRAVITY
+from streaming import StreamedLine, iter_rows, iter_values
+from vectorized import get_values_array
+
+WATER = FLUIDS_VALUES['Water']
+AXES = {'lengths': np.linspace(0.2, 2, 4)[:, None, None], 'diameters': np.linspace(0.00159, 0.0159, 5)[:, None],
+        'velocities': np.linspace(0.05, 0.5, 3)}
+NUMBER_OF_POINTS = 4 * 5 * 3
+
+
+def get_batches(batch_size: int) -> list:
+    return list(iter_values(WATER['shc'], WATER['viscosity'], WATER['density'], ACCELERATION_DUE_GRAVITY,
+                            batch_size=batch_size, **AXES))
+
+
+@pytest.mark.parametrize('batch_size', [1, 7, NUMBER_OF_POINTS, 10 * NUMBER_OF_POINTS])
+def test_batches_are_the_values(batch_size):
+    batches = get_batches(batch_size)
+    expected = get_values_array(WATER['shc'], WATER['viscosity'], WATER['density'], ACCELERATION_DUE_GRAVITY,
+                                **AXES)
+
+    assert len(batches) == -(-NUMBER_OF_POINTS // batch_size)
+    assert all(len(batch['head_loss']) <= batch_size for batch in batches)
+    for key, values in expected.items():
+        # The points come in the C order of the broadcast shape
+        np.testing.assert_array_equal(np.concatenate([batch[key] for batch in batches]),
+                                      np.broadcast_to(values, expected['head_loss'].shape).ravel())
+
+
+def test_rows():
+    batches = get_batches(7)
+    rows = list(iter_rows(batches, ['length', 'head_loss']))
+
+    assert len(rows) == NUMBER_OF_POINTS
+    assert rows[8] == (batches[1]['length'][1], batches[1]['head_loss'][1])
+
+
+def test_streamed_line_grows():
+    figure, axes = plt.subplots()
+    line, = axes.plot([], [])
+    streamed_line = StreamedLine(line, 'length', 'head_loss', capacity=5)
+    batches = get_batches(7)
+
+    try:
+        for batch in batches:
+            streamed_line.extend(batch)
+        streamed_line.update_line()
+    finally:
+        plt.close(figure)
+
+    np.testing.assert_array_equal(line.get_xdata(), np.concatenate([batch['length'] for batch in batches]))
+    np.testing.assert_array_equal(line.get_ydata(), np.concatenate([batch['head_loss'] for batch in batches]))
+    assert streamed_line.values.shape[1] >= NUMBER_OF_POINTS
@@ -0,0 +1,66 @@
+"""
+The workbook of every fluid has to read back as the values it was written from, in sheets Excel can open.
+"""
+import numpy as np
+import openpyxl
+import pytest
+
+from calculations import FLUIDS_VALUES, ENV_TYPES_GRAVITY, LENGTHS
+from excel_export import EXCEL_MAX_SHEET_TITLE_LENGTH, SUMMARY_SHEET_TITLE, get_unique_sheet_titles, \
+    write_fluids_workbook
+from result_cache import ResultCache, get_cached_values_for_fluids
+
+# The numbers in a workbook are written with fewer digits than a float has (Excel itself only keeps 15)
+WORKBOOK_TOLERANCE = 1e-15
+
+
+def get_fluids_tables_by_env(fluid_names: list) -> dict:
+    fluids_values = {fluid_name: FLUIDS_VALUES[fluid_name] for fluid_name in fluid_names}
+
+    return {env_type: get_cached_values_for_fluids(fluids_values, g, cache=ResultCache())
+            for env_type, g in ENV_TYPES_GRAVITY.items()}
+
+
+def read_sheet(sheet) -> dict:
+    rows = sheet.iter_rows(values_only=True)
+    headers = next(rows)
+    columns = list(zip(*rows))
+
+    return {header: np.array(column, dtype=float) for header, column in zip(headers, columns)}
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_fluids_workbook_round_trip(tmp_path, workers):
+    fluids_tables_by_env = get_fluids_tables_by_env(['Water', 'Ammonia', 'R134a'])
+    path_to_file = str(tmp_path / 'fluids.xlsx')
+
+    write_fluids_workbook(path_to_file, fluids_tables_by_env, LENGTHS, workers=workers)
+
+    workbook = openpyxl.load_workbook(path_to_file, read_only=True)
+    try:
+        assert workbook.sheetnames == [SUMMARY_SHEET_TITLE] + [
+            f'{fluid_name} {env_type}' for env_type, fluids_tables in fluids_tables_by_env.items()
+            for fluid_name in fluids_tables]
+
+        summary_rows = list(workbook[SUMMARY_SHEET_TITLE].iter_rows(values_only=True))
+        assert len(summary_rows) == 1 + 3 * len(fluids_tables_by_env)
+
+        for env_type, fluids_tables in fluids_tables_by_env.items():
+            for fluid_name, fluid_values in fluids_tables.items():
+                columns = read_sheet(workbook[f'{fluid_name} {env_type}'])
+
+                np.testing.assert_allclose(columns['length'], LENGTHS, rtol=WORKBOOK_TOLERANCE, atol=0)
+                for column, values in fluid_values.items():
+                    np.testing.assert_allclose(columns[column], values, rtol=WORKBOOK_TOLERANCE, atol=0)
+    finally:
+        workbook.close()
+
+
+def test_sheet_titles_stay_unique_when_cut():
+    long_title = 'x' * EXCEL_MAX_SHEET_TITLE_LENGTH
+    titles = get_unique_sheet_titles([long_title + ' vertical', long_title + ' horizontal', 'Water', 'WATER'])
+
+    assert all(len(title) <= EXCEL_MAX_SHEET_TITLE_LENGTH for title in titles)
+    # Excel does not tell titles apart by their case
+    assert len({title.lower() for title in titles}) == len(titles)
+    assert titles[2] == 'Water'
@@ -0,0 +1,200 @@
+"""
+Array based version of the calculations in test.py.
+
+Every function here takes NumPy arrays (or plain floats) of any shape and works on all the points at once
+instead of going through them one by one like test.get_values does.
+The arrays are broadcast against each other, so a (n, 1) array of lengths and a (1, m) array of velocities
+would give a (n, m) result.
+
+The results match the scalar functions in test.py to a relative tolerance of 1e-12 (RESULT_TOLERANCE).
+Run this file directly to check that.
+"""
+import numpy as np
+
+from calculations import LENGTHS, DIAMETERS, VELOCITY
+from prepared import LAMINAR_REYNOLDS_NUMBER_LIMIT, PreparedFluid, PreparedGeometry
+
+RESULT_TOLERANCE = 1e-12
+
+# One row per fluid, used to pass the properties of many fluids at once.
+# Longer names would be cut to fit the name field, so they are refused instead (see check_fluid_names)
+FLUID_NAME_LENGTH = 32
+FLUID_PROPERTIES_DTYPE = np.dtype([('name', f'U{FLUID_NAME_LENGTH}'), ('shc', float), ('density', float),
+                                   ('viscosity', float)])
+
+# The same columns test.get_values returns
+VALUES_KEYS = ['head_loss', 'frictional_factor', 'heat_transfer_coefficient', 'reynolds_number', 'velocity',
+               'diameter']
+
+
+def calculate_reynolds_numbers(density, diameter, velocity, dynamic_viscosity) -> np.ndarray:
+    # This function calculates the reynolds number for every point
+    return (density * np.asarray(diameter, dtype=float) * velocity) / dynamic_viscosity
+
+
+def calculate_frictional_factors_for_laminar_flow(reynold_numbers) -> np.ndarray:
+    return 64 / np.asarray(reynold_numbers, dtype=float)
+
+
+def calculate_frictional_factors_for_turbulent(reynold_numbers, pipe_roughness, diameters) -> np.ndarray:
+    reynold_numbers = np.asarray(reynold_numbers, dtype=float)
+
+    return 2 * ((8 / reynold_numbers) ** 12 + (
+            (2.457 * np.log((0.27 * pipe_roughness / diameters) + (7 / reynold_numbers) ** 0.9)) ** 16 + (
+            37530 / reynold_numbers) ** 16) ** (-3 / 2)) ** (1 / 12)
+
+
+def get_frictional_factors(reynold_numbers, pipe_roughness: float, diameters) -> np.ndarray:
+    """
+    The array version of test.get_frictional_factor.
+    Instead of an if statement, the laminar points are picked out with a mask,
+    so each correlation is only evaluated on the points it is meant for.
+    """
+    reynold_numbers, diameters = np.broadcast_arrays(np.asarray(reynold_numbers, dtype=float),
+                                                     np.asarray(diameters, dtype=float))
+
+    is_laminar = reynold_numbers < LAMINAR_REYNOLDS_NUMBER_LIMIT
+    is_turbulent = ~is_laminar
+
+    frictional_factors = np.empty(reynold_numbers.shape)
+    frictional_factors[is_laminar] = calculate_frictional_factors_for_laminar_flow(reynold_numbers[is_laminar])
+    frictional_factors[is_turbulent] = calculate_frictional_factors_for_turbulent(
+        reynold_numbers[is_turbulent], pipe_roughness=pipe_roughness, diameters=diameters[is_turbulent])
+
+    return frictional_factors
+
+
+def calculate_head_losses(friction_factors, pipe_lengths, diameters, velocities, g) -> np.ndarray:
+    return (friction_factors * pipe_lengths * np.asarray(velocities, dtype=float) ** 2) / (diameters * 2 * g)
+
+
+def calculate_pressures(density, head_losses, g) -> np.ndarray:
+    return -density * g * np.asarray(head_losses, dtype=float)
+
+
+def calculate_coefficients_of_heat_transfer(reynold_numbers, diameters, prandtl_number, conductivity) -> np.ndarray:
+    reynold_numbers = np.asarray(reynold_numbers, dtype=float)
+
+    return 0.023 * (reynold_numbers ** 0.8) * (prandtl_number ** 0.4) * conductivity / diameters
+
+
+def get_values_array(specific_heat_capacity: float, dynamic_viscosity: float, density: float, g: float,
+                     lengths=None, diameters=None, velocities=None) -> dict:
+    """
+    This does the same thing as test.get_values but for whole arrays of points in one call.
+
+    lengths, diameters and velocities default to LENGTHS, DIAMETERS and VELOCITY, which gives the same
+    ten points as test.get_values. They are broadcast together, so every returned array has the broadcast shape:
+    {
+        head_loss: np.ndarray,
+        frictional_factor: np.ndarray,
+        heat_transfer_coefficient: np.ndarray,
+        reynolds_number: np.ndarray,
+        pressure: np.ndarray,
+        length: np.ndarray,
+        velocity: np.ndarray,
+        diameter: np.ndarray,
+    }
+    """
+    lengths = np.asarray(LENGTHS if lengths is None else lengths, dtype=float)
+    diameters = np.asarray(DIAMETERS if diameters is None else diameters, dtype=float)
+    velocities = np.asarray(VELOCITY if velocities is None else velocities, dtype=float)
+
+    # The terms that only depend on the fluid or on the diameter are worked out once, see prepared.py
+    fluid = PreparedFluid(specific_heat_capacity, dynamic_viscosity, density, g)
+
+    return fluid.get_values(lengths, PreparedGeometry(diameters), velocities)
+
+
+def check_fluid_names(names):
+    # The names have to fit in the name field of FLUID_PROPERTIES_DTYPE as they are
+    for name in names:
+        if len(name) > FLUID_NAME_LENGTH:
+            raise ValueError(f'The fluid name {name!r} is longer than {FLUID_NAME_LENGTH} characters')
+
+
+def get_fluid_properties_table(fluids_values: dict) -> np.ndarray:
+    """
+    This would turn a dictionary with the same layout as test.FLUIDS_VALUES
+    {
+        fluid_name: {'shc': ..., 'density': ..., 'viscosity': ...}
+    }
+    into a structured array with FLUID_PROPERTIES_DTYPE.
+    It raises ValueError for names that do not fit in it.
+    """
+    check_fluid_names(fluids_values)
+    table = np.empty(len(fluids_values), dtype=FLUID_PROPERTIES_DTYPE)
+
+    for index, (name, fluid_values) in enumerate(fluids_values.items()):
+        table[index] = (name, fluid_values['shc'], fluid_values['density'], fluid_values['viscosity'])
+
+    return table
+
+
+def get_values_for_fluids(fluid_properties, g: float, lengths=None, diameters=None, velocities=None) -> dict:
+    """
+    This would calculate the values for many fluids in one go.
+    fluid_properties is either a structured array with FLUID_PROPERTIES_DTYPE or a dictionary laid out like
+    test.FLUIDS_VALUES.
+
+    The returned arrays are stacked, the first axis is the fluid and the rest is the shape of the points.
+    The fluid names are stored under 'fluid', as a list of the names they were given with.
+    """
+    if isinstance(fluid_properties, dict):
+        # The names stay as they are in a list, only the properties go into arrays
+        fluid_names = list(fluid_properties.keys())
+        fluid_properties = {key: np.array([fluid_values[key] for fluid_values in fluid_properties.values()],
+                                          dtype=float) for key in ['shc', 'density', 'viscosity']}
+    else:
+        fluid_names = [str(name) for name in fluid_properties['name']]
+
+    lengths = np.asarray(LENGTHS if lengths is None else lengths, dtype=float)
+    diameters = np.asarray(DIAMETERS if diameters is None else diameters, dtype=float)
+    velocities = np.asarray(VELOCITY if velocities is None else velocities, dtype=float)
+
+    points_shape = np.broadcast_shapes(lengths.shape, diameters.shape, velocities.shape)
+
+    # Put the fluids on their own axis so they broadcast against the points
+    fluids_shape = (len(fluid_names),) + (1,) * len(points_shape)
+
+    values = get_values_array(fluid_properties['shc'].reshape(fluids_shape),
+                              fluid_properties['viscosity'].reshape(fluids_shape),
+                              fluid_properties['density'].reshape(fluids_shape), g,
+                              lengths=lengths, diameters=diameters, velocities=velocities)
+
+    stacked_shape = (len(fluid_names),) + points_shape
+    values = {key: np.broadcast_to(value, stacked_shape) for key, value in values.items()}
+    values['fluid'] = fluid_names
+
+    return values
+
+
+def split_values_by_fluid(fluids_values: dict, keys: list = None) -> dict:
+    """
+    This would split the stacked result of get_values_for_fluids into one dictionary per fluid,
+    {
+        fluid_name: {head_loss: np.ndarray, ...}
+    }
+    By default only the keys test.get_values returns are kept, so each one can go straight into
+    test.create_excel_sheet.
+    """
+    keys = VALUES_KEYS if keys is None else keys
+
+    return {name: {key: fluids_values[key][index] for key in keys}
+            for index, name in enumerate(fluids_values['fluid'])}
+
+
+if __name__ == '__main__':
+    # Check the array results against the scalar functions in test.py
+    from calculations import get_values, ACCELERATION_DUE_GRAVITY
+
+    fluid = {'shc': 4187, 'density': 1000, 'viscosity': 0.000895}  # Water
+
+    scalar_values = get_values(fluid['shc'], fluid['viscosity'], fluid['density'], ACCELERATION_DUE_GRAVITY)
+    array_values = get_values_array(fluid['shc'], fluid['viscosity'], fluid['density'], ACCELERATION_DUE_GRAVITY)
+
+    for key in ['head_loss', 'frictional_factor', 'heat_transfer_coefficient', 'reynolds_number']:
+        expected = np.asarray(scalar_values[key])
+        largest_error = np.max(np.abs(array_values[key] - expected) / np.abs(expected))
+        print(f'{key}: largest relative error {largest_error:.3e}')
+        assert largest_error <= RESULT_TOLERANCE